@@ -0,0 +1,62 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.vector_index import EmbeddingMatrix, IVFIndex, normalize
+
+def synthetic_embeddings(count: int, dim: int, clusters: int = 200, seed: int = 0):
+    """Clustered random vectors that roughly mimic topic-grouped embeddings."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim))
+    labels = rng.integers(0, clusters, count)
+    return normalize(centers[labels] + 0.6 * rng.standard_normal((count, dim)))
+
+def evaluate(vectors, queries, k: int = 10, nprobes=(1, 2, 4, 8, 16, 32), n_lists: int = None):
+    """Compare IVF recall@k and latency against exact search for several nprobe values."""
+    ids = list(range(len(vectors)))
+    exact = EmbeddingMatrix()
+    exact.add_many(ids, vectors)
+    ivf = IVFIndex(n_lists=n_lists, min_train_size=len(vectors))
+    ivf.add_many(ids, vectors)
+
+    start = time.perf_counter()
+    truth = [set(event_id for event_id, _ in hits) for hits in (exact.search(q, k) for q in queries)]
+    exact_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    results = [{"index": "exact", "nprobe": None, "recall": 1.0, "latency_ms": exact_ms}]
+    for nprobe in nprobes:
+        ivf.nprobe = nprobe
+        start = time.perf_counter()
+        found = [set(event_id for event_id, _ in ivf.search(q, k)) for q in queries]
+        latency_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        recall = np.mean([len(f & t) / max(len(t), 1) for f, t in zip(found, truth)])
+        results.append({"index": "ivf", "nprobe": nprobe, "recall": float(recall), "latency_ms": latency_ms})
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall vs latency of the IVF index against exact search")
+    parser.add_argument("--count", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--lists", type=int, default=None)
+    args = parser.parse_args()
+
+    vectors = synthetic_embeddings(args.count, args.dim)
+    # Queries are perturbed corpus points, like a new event close to past ones
+    rng = np.random.default_rng(1)
+    picks = vectors[rng.choice(args.count, args.queries, replace=False)]
+    queries = normalize(picks + 0.05 * rng.standard_normal(picks.shape))
+
+    print(f"📏 {args.count} vectors x {args.dim} dims, recall@{args.k} over {args.queries} queries")
+    for row in evaluate(vectors, queries, args.k, n_lists=args.lists):
+        label = "exact" if row["nprobe"] is None else f"ivf nprobe={row['nprobe']}"
+        print(f"   {label:<16} recall={row['recall']:.3f}  latency={row['latency_ms']:.2f} ms/query")
+
+if __name__ == "__main__":
+    main()
@@ -1,137 +1,311 @@
 import json
+import uuid
 import asyncio
 import webbrowser
 import subprocess
 import sys
 import os
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 # Add the project root to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from backend.db import get_connection
 from backend.organizer import ContextOrganizer
+from backend.embedding_cache import embedding_memory
+from backend.tts import get_tts, cached_audio
+from backend.intents import parse_command as parse_intent, get_model_parser
+from backend.intent_cache import get_intent_cache, get_intent_embedder, embed_command
+from backend.writer import get_writer
+from utils.helpers import day_window
+
+# The audit INSERT is queued, not awaited, so the command is identified by a
+# client-generated request_id rather than its row id
+INSERT_COMMAND_SQL = """
+    INSERT INTO user_commands
+        (request_id, command_text, parsed_intent, executed, result, timestamp, parse_source, parse_similarity)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Today's tasks: Calendar/Notion items plus keyword hits from the full-text index
+TODAY_TASKS_FILTER = """
+    AND (source = 'Calendar' OR source = 'Notion' OR 
+         (source = 'Slack' AND id IN (SELECT rowid FROM events_fts WHERE events_fts MATCH 'task*')) OR
+         (source = 'Gmail' AND id IN (SELECT rowid FROM events_fts WHERE events_fts MATCH 'urgent*')))
+"""
+
+def _time_str(ts_epoch: int):
+    return datetime.fromtimestamp(ts_epoch).strftime("%I:%M %p")
+
+def update_recap_state(state: dict, events: list):
+    """Fold events into the recap aggregates: per-source count and first three items."""
+    sources = state.setdefault("sources", {})
+    for event_id, source, content, metadata, ts_epoch in events:
+        entry = sources.setdefault(source, {"count": 0, "first": []})
+        entry["count"] += 1
+        entry["first"] = sorted(entry["first"] + [[ts_epoch, event_id, content[:100]]])[:3]
+    return state
+
+def render_recap(state: dict):
+    """Recap text from its aggregates; sources in order of their first activity."""
+    sources = state.get("sources")
+    if not sources:
+        return "Yesterday was a quiet day with no recorded activities."
+    recap_parts = ["Here's your recap from yesterday:"]
+    for source, entry in sorted(sources.items(), key=lambda item: item[1]["first"][0][:2]):
+        recap_parts.append(f"In {source}, you had {entry['count']} activities:")
+        for ts_epoch, _, content in entry["first"]:  # Limit to top 3 per source
+            recap_parts.append(f"At {_time_str(ts_epoch)}: {content}...")
+    return " ".join(recap_parts)
+
+def update_plan_state(state: dict, events: list):
+    """Fold task events into the plan aggregates: meetings, high priority, the rest counted."""
+    for event_id, source, content, metadata, ts_epoch in events:
+        metadata_dict = json.loads(metadata) if metadata else {}
+        if source == "Calendar" or "meeting" in content.lower():
+            state.setdefault("meetings", []).append([ts_epoch, event_id, content])
+        elif metadata_dict.get("priority") == "high":
+            state.setdefault("high_priority", []).append([ts_epoch, event_id, content])
+        else:
+            state["medium_priority"] = state.get("medium_priority", 0) + 1
+    for key in ("meetings", "high_priority"):
+        if key in state:
+            state[key].sort()
+    return state
+
+def render_plan(state: dict):
+    """Plan text from its aggregates."""
+    meetings = state.get("meetings", [])
+    high_priority = state.get("high_priority", [])
+    medium_priority = state.get("medium_priority", 0)
+    if not (meetings or high_priority or medium_priority):
+        return "You have a light day ahead with no specific tasks scheduled."
+    
+    plan_parts = ["Here's your plan for today:"]
+    if meetings:
+        plan_parts.append(f"You have {len(meetings)} meetings scheduled:")
+        for ts_epoch, _, content in meetings:
+            plan_parts.append(f"At {_time_str(ts_epoch)}: {content}")
+    if high_priority:
+        plan_parts.append(f"You have {len(high_priority)} high-priority tasks:")
+        for _, _, content in high_priority:
+            plan_parts.append(f"• {content}")
+    if medium_priority:
+        plan_parts.append(f"And {medium_priority} medium-priority items to review.")
+    return " ".join(plan_parts)
+
+def render_period(summary: dict, label: str):
+    """Period recap text from the rolled-up aggregates of get_period_summary."""
+    if not summary["total"]:
+        return f"No recorded activities {label}."
+    parts = [f"Here's your recap {label}: {summary['total']} activities across {len(summary['sources'])} sources."]
+    for entry in summary["sources"]:
+        line = f"{entry['source']}: {entry['events']}"
+        if entry["high_priority"]:
+            line += f", {entry['high_priority']} high priority"
+        parts.append(line + ".")
+    if summary["threads"]:
+        threads = ", ".join(f"{t['title']} ({t['events']} events)" for t in summary["threads"])
+        parts.append(f"Most active threads: {threads}.")
+    busiest = summary["busiest_day"]
+    if busiest and len(summary["days"]) > 1:
+        day = date.fromisoformat(busiest["day"])
+        parts.append(f"Your busiest day was {day.strftime('%A, %B %d')} with {busiest['events']} activities.")
+    return " ".join(parts)
+
+# Longest custom range a briefing may cover
+MAX_PERIOD_DAYS = 366
+
+# kind -> (briefing_type, day offset from today, event filter, update, render)
+BRIEFINGS = {
+    "yesterday": ("recap", -1, "", update_recap_state, render_recap),
+    "today": ("plan", 0, TODAY_TASKS_FILTER, update_plan_state, render_plan),
+}
 
 class ContextAssistant:
-    def __init__(self):
-        self.conn = get_connection()
-        self.organizer = ContextOrganizer()
+    def __init__(self, conn=None, command_parser=None, writer=None, intent_embedder=None):
+        self.conn = conn or get_connection()
+        self.organizer = ContextOrganizer(conn=self.conn)
+        self.writer = writer or get_writer()
+        # Fallback for commands the intent table misses (see COMMAND_PARSER in backend/intents.py)
+        self.command_parser = command_parser or get_model_parser()
+        # Embeds commands for the semantic intent cache; None leaves the cache off
+        self.intent_embedder = intent_embedder or get_intent_embedder()
         # You'll add ElevenLabs and OpenAI clients here when you have API keys
         # self.elevenlabs_client = ElevenLabs(api_key=settings.ELEVENLABS_API_KEY)
         # self.openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
     
-    def get_yesterday_events(self):
-        """Get events from yesterday for the recap."""
-        yesterday = datetime.now() - timedelta(days=1)
-        yesterday_start = yesterday.replace(hour=0, minute=0, second=0, microsecond=0)
-        yesterday_end = yesterday.replace(hour=23, minute=59, second=59, microsecond=999999)
-        
+    def get_events_between(self, start_epoch: int, end_epoch: int, where: str = "", params: tuple = ()):
+        """Events with start <= ts_epoch < end (an index range scan), oldest first."""
         cur = self.conn.cursor()
-        cur.execute("""
-            SELECT source, content, metadata, timestamp
+        cur.execute(f"""
+            SELECT source, content, metadata, ts_epoch
             FROM events
-            WHERE timestamp BETWEEN ? AND ?
-            ORDER BY timestamp ASC
-        """, (yesterday_start, yesterday_end))
-        
-        return cur.fetchall()
+            WHERE ts_epoch >= ? AND ts_epoch < ? {where}
+            ORDER BY ts_epoch ASC, id ASC
+        """, (start_epoch, end_epoch) + tuple(params))
+        return [
+            (source, content, metadata, datetime.fromtimestamp(ts_epoch))
+            for source, content, metadata, ts_epoch in cur.fetchall()
+        ]
+    
+    def get_yesterday_events(self):
+        """Get events from yesterday for the recap."""
+        yesterday = datetime.now().date() - timedelta(days=1)
+        return self.get_events_between(*day_window(yesterday))
     
     def get_today_tasks(self):
         """Get today's tasks and meetings."""
         today = datetime.now().date()
-        today_start = datetime.combine(today, datetime.min.time())
-        today_end = datetime.combine(today, datetime.max.time())
-        
+        return self.get_events_between(*day_window(today), TODAY_TASKS_FILTER)
+    
+    def get_new_events(self, start_epoch: int, end_epoch: int, after_id: int, through_id: int, where: str = ""):
+        """(id, source, content, metadata, ts_epoch) rows in the window with after_id < id <= through_id."""
         cur = self.conn.cursor()
-        cur.execute("""
-            SELECT source, content, metadata, timestamp
+        cur.execute(f"""
+            SELECT id, source, content, metadata, ts_epoch
             FROM events
-            WHERE timestamp BETWEEN ? AND ?
-            AND (source = 'Calendar' OR source = 'Notion' OR 
-                 (source = 'Slack' AND content LIKE '%task%') OR
-                 (source = 'Gmail' AND content LIKE '%urgent%'))
-            ORDER BY timestamp ASC
-        """, (today_start, today_end))
-        
+            WHERE id > ? AND id <= ? AND ts_epoch >= ? AND ts_epoch < ? {where}
+            ORDER BY ts_epoch ASC, id ASC
+        """, (after_id, through_id, start_epoch, end_epoch))
         return cur.fetchall()
     
+    def get_briefing(self, kind: str, day=None):
+        """Return (text, changed) for the cached (type, day) briefing.
+        
+        The stored row keeps the JSON aggregates behind its text and the highest
+        event id they cover. It is reused as is while no newer event falls in the
+        day's window; otherwise only the new events are folded in and re-rendered.
+        `changed` is True only when the rendered text differs from the stored one
+        (new events the briefing filters out just advance the watermark).
+        """
+        briefing_type, offset, where, update, render = BRIEFINGS[kind]
+        day = day or datetime.now().date() + timedelta(days=offset)
+        start, end = day_window(day)
+        cur = self.conn.cursor()
+        cur.execute("""
+            SELECT content, last_event_id, state FROM voice_briefings
+            WHERE briefing_type = ? AND briefing_day = ?
+        """, (briefing_type, day.isoformat()))
+        row = cur.fetchone()
+        previous, watermark, state = row if row else (None, 0, None)
+        cur.execute("""
+            SELECT MAX(id) FROM events WHERE id > ? AND ts_epoch >= ? AND ts_epoch < ?
+        """, (watermark or 0, start, end))
+        newest = cur.fetchone()[0]
+        if row is not None and newest is None:
+            return previous, False
+        
+        state = json.loads(state) if state else {}
+        if newest is not None:
+            state = update(state, self.get_new_events(start, end, watermark or 0, newest, where))
+            watermark = newest
+        text = render(state)
+        cur.execute("""
+            INSERT INTO voice_briefings
+                (briefing_type, briefing_day, content, audio_file_path, last_event_id, state, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT (briefing_type, briefing_day) WHERE briefing_day IS NOT NULL DO UPDATE SET
+                content = excluded.content,
+                last_event_id = excluded.last_event_id,
+                state = excluded.state,
+                updated_at = excluded.updated_at,
+                played = CASE WHEN voice_briefings.content = excluded.content THEN voice_briefings.played ELSE FALSE END
+        """, (briefing_type, day.isoformat(), text, self.audio_path(text), watermark or 0, json.dumps(state)))
+        self.conn.commit()
+        return text, text != previous
+    
+    def get_period_summary(self, start_day: date, end_day: date, top_threads: int = 5):
+        """Aggregate the daily rollups over start_day..end_day (inclusive); reads
+        about days × sources rows no matter how many events the period holds."""
+        bounds = (start_day.isoformat(), end_day.isoformat())
+        cur = self.conn.cursor()
+        cur.execute("""
+            SELECT source, SUM(event_count) AS events, SUM(high_priority), SUM(medium_priority), SUM(low_priority)
+            FROM daily_source_stats WHERE day BETWEEN ? AND ?
+            GROUP BY source HAVING events > 0
+            ORDER BY events DESC, source
+        """, bounds)
+        sources = [
+            {"source": source, "events": events, "high_priority": high, "medium_priority": medium, "low_priority": low}
+            for source, events, high, medium, low in cur.fetchall()
+        ]
+        cur.execute("""
+            SELECT day, SUM(event_count) AS events FROM daily_source_stats
+            WHERE day BETWEEN ? AND ? GROUP BY day HAVING events > 0 ORDER BY day
+        """, bounds)
+        days = [{"day": day, "events": events} for day, events in cur.fetchall()]
+        cur.execute("""
+            SELECT d.thread_id, t.title, SUM(d.event_count) AS events
+            FROM daily_thread_stats d JOIN threads t ON t.id = d.thread_id
+            WHERE d.day BETWEEN ? AND ?
+            GROUP BY d.thread_id HAVING events > 0
+            ORDER BY events DESC, d.thread_id LIMIT ?
+        """, bounds + (top_threads,))
+        threads = [{"id": thread_id, "title": title, "events": events} for thread_id, title, events in cur.fetchall()]
+        return {
+            "start": bounds[0],
+            "end": bounds[1],
+            "total": sum(entry["events"] for entry in sources),
+            "sources": sources,
+            "days": days,
+            "threads": threads,
+            "busiest_day": max(days, key=lambda entry: entry["events"]) if days else None,
+        }
+    
+    def get_period_briefing(self, start_day: date, end_day: date, briefing_type: str = "custom"):
+        """Return (text, changed) for a weekly/custom recap built from the daily rollups.
+        
+        The row is keyed by briefing_day "START/END"; it is only rewritten (and the
+        audio only regenerated) when the rendered text differs from the stored one.
+        """
+        if end_day < start_day:
+            raise ValueError("end must not be before start")
+        if (end_day - start_day).days >= MAX_PERIOD_DAYS:
+            raise ValueError(f"periods are limited to {MAX_PERIOD_DAYS} days")
+        summary = self.get_period_summary(start_day, end_day)
+        if briefing_type == "weekly":
+            label = "for the past week"
+        else:
+            label = f"from {start_day.strftime('%B %d')} to {end_day.strftime('%B %d')}"
+        text = render_period(summary, label)
+        
+        period = f"{summary['start']}/{summary['end']}"
+        cur = self.conn.cursor()
+        cur.execute("""
+            SELECT content FROM voice_briefings WHERE briefing_type = ? AND briefing_day = ?
+        """, (briefing_type, period))
+        row = cur.fetchone()
+        if row is not None and row[0] == text:
+            return text, False
+        cur.execute("""
+            INSERT INTO voice_briefings (briefing_type, briefing_day, content, audio_file_path, state, updated_at)
+            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT (briefing_type, briefing_day) WHERE briefing_day IS NOT NULL DO UPDATE SET
+                content = excluded.content,
+                state = excluded.state,
+                updated_at = excluded.updated_at,
+                played = FALSE
+        """, (briefing_type, period, text, self.audio_path(text), json.dumps(summary)))
+        self.conn.commit()
+        return text, True
+    
+    def get_last_week(self):
+        """(start, end) dates of the seven days ending yesterday."""
+        yesterday = datetime.now().date() - timedelta(days=1)
+        return yesterday - timedelta(days=6), yesterday
+    
+    def generate_weekly_recap(self):
+        """Generate a recap of the past seven days."""
+        return self.get_period_briefing(*self.get_last_week(), "weekly")[0]
+    
     def generate_yesterday_recap(self):
         """Generate a voice recap of yesterday's activities."""
-        events = self.get_yesterday_events()
-        
-        if not events:
-            return "Yesterday was a quiet day with no recorded activities."
-        
-        # Group events by source
-        sources = {}
-        for event in events:
-            source, content, metadata, timestamp = event
-            if source not in sources:
-                sources[source] = []
-            sources[source].append((content, timestamp))
-        
-        # Generate recap text
-        recap_parts = ["Here's your recap from yesterday:"]
-        
-        for source, source_events in sources.items():
-            recap_parts.append(f"In {source}, you had {len(source_events)} activities:")
-            for content, timestamp in source_events[:3]:  # Limit to top 3 per source
-                time_str = timestamp.strftime("%I:%M %p")
-                recap_parts.append(f"At {time_str}: {content[:100]}...")
-        
-        recap_text = " ".join(recap_parts)
-        
-        # Store the briefing
-        self.store_voice_briefing("daily", recap_text, "yesterday_recap")
-        
-        return recap_text
+        return self.get_briefing("yesterday")[0]
     
     def generate_today_plan(self):
         """Generate a voice briefing of today's plan."""
-        tasks = self.get_today_tasks()
-        
-        if not tasks:
-            return "You have a light day ahead with no specific tasks scheduled."
-        
-        # Categorize tasks
-        meetings = []
-        high_priority = []
-        medium_priority = []
-        
-        for task in tasks:
-            source, content, metadata, timestamp = task
-            metadata_dict = json.loads(metadata) if metadata else {}
-            
-            if source == "Calendar" or "meeting" in content.lower():
-                meetings.append((content, timestamp))
-            elif metadata_dict.get("priority") == "high":
-                high_priority.append((content, timestamp))
-            else:
-                medium_priority.append((content, timestamp))
-        
-        # Generate plan text
-        plan_parts = ["Here's your plan for today:"]
-        
-        if meetings:
-            plan_parts.append(f"You have {len(meetings)} meetings scheduled:")
-            for content, timestamp in meetings:
-                time_str = timestamp.strftime("%I:%M %p")
-                plan_parts.append(f"At {time_str}: {content}")
-        
-        if high_priority:
-            plan_parts.append(f"You have {len(high_priority)} high-priority tasks:")
-            for content, timestamp in high_priority:
-                plan_parts.append(f"• {content}")
-        
-        if medium_priority:
-            plan_parts.append(f"And {len(medium_priority)} medium-priority items to review.")
-        
-        plan_text = " ".join(plan_parts)
-        
-        # Store the briefing
-        self.store_voice_briefing("daily", plan_text, "today_plan")
-        
-        return plan_text
+        return self.get_briefing("today")[0]
     
     def store_voice_briefing(self, briefing_type: str, content: str, audio_file_path: str = None):
         """Store a voice briefing in the database."""
@@ -142,68 +316,34 @@ class ContextAssistant:
         """, (briefing_type, content, audio_file_path))
         self.conn.commit()
     
+    def resolve_command(self, command_text: str):
+        """Return (parsed, source, similarity): the intent table first, then the
+        semantic intent cache, and only then the reasoning model."""
+        parsed = parse_intent(command_text)
+        if parsed["action"] != "unknown" or self.command_parser is None:
+            return parsed, "rules", None
+        
+        if self.intent_embedder is None:
+            return self.command_parser.parse(command_text), "model", None
+        vector = embed_command(self.intent_embedder, command_text)
+        model = self.intent_embedder.model
+        cache = get_intent_cache(self.conn)
+        hit = cache.lookup(self.conn, command_text, vector, model, writer=self.writer)
+        if hit is not None:
+            return hit[0], "semantic_cache", hit[1]
+        parsed = self.command_parser.parse(command_text)
+        cache.store(self.conn, command_text, vector, model, parsed, writer=self.writer)
+        return parsed, "model", None
+    
     def parse_command(self, command_text: str):
-        """Parse a voice command using GPT-5 reasoning."""
-        # Placeholder for GPT-5 command parsing
-        # In real implementation, you'd call:
-        # response = self.openai_client.chat.completions.create(
-        #     model="gpt-5",
-        #     messages=[{"role": "user", "content": f"Parse this command: {command_text}"}]
-        # )
-        
-        # For demo, we'll do simple keyword matching
-        command_lower = command_text.lower()
-        
-        if "gmail" in command_lower or "email" in command_lower:
-            return {
-                "action": "open_app",
-                "app": "gmail",
-                "url": "https://gmail.com",
-                "description": "Opening Gmail"
-            }
-        elif "youtube" in command_lower and "search" in command_lower:
-            # Extract search term
-            search_term = command_lower.replace("search youtube for", "").replace("youtube", "").strip()
-            return {
-                "action": "search_youtube",
-                "query": search_term,
-                "url": f"https://youtube.com/results?search_query={search_term.replace(' ', '+')}",
-                "description": f"Searching YouTube for {search_term}"
-            }
-        elif "google" in command_lower and "search" in command_lower:
-            # Extract search term
-            search_term = command_lower.replace("google", "").replace("search", "").strip()
-            return {
-                "action": "search_google",
-                "query": search_term,
-                "url": f"https://google.com/search?q={search_term.replace(' ', '+')}",
-                "description": f"Searching Google for {search_term}"
-            }
-        elif "notion" in command_lower:
-            return {
-                "action": "open_app",
-                "app": "notion",
-                "url": "https://notion.so",
-                "description": "Opening Notion"
-            }
-        elif "slack" in command_lower:
-            return {
-                "action": "open_app",
-                "app": "slack",
-                "url": "https://slack.com",
-                "description": "Opening Slack"
-            }
-        else:
-            return {
-                "action": "unknown",
-                "description": f"Command not recognized: {command_text}"
-            }
+        """Parse a voice command (intent table, semantic cache, then model)."""
+        return self.resolve_command(command_text)[0]
     
     def execute_command(self, parsed_command: dict):
         """Execute a parsed command."""
         action = parsed_command.get("action")
         
-        if action == "open_app" or action == "search_youtube" or action == "search_google":
+        if action in ("open_app", "search_youtube", "search_google", "search_web", "navigate_to"):
             url = parsed_command.get("url")
             if url:
                 webbrowser.open(url)
@@ -216,35 +356,23 @@ class ContextAssistant:
     
     def process_voice_command(self, command_text: str):
         """Process a voice command from the user."""
-        # Store the command
-        cur = self.conn.cursor()
-        cur.execute("""
-            INSERT INTO user_commands (command_text, timestamp)
-            VALUES (?, ?)
-        """, (command_text, datetime.now()))
-        command_id = cur.lastrowid
-        
-        # Parse the command
-        parsed_command = self.parse_command(command_text)
-        
-        # Update the command with parsed intent
-        cur.execute("""
-            UPDATE user_commands 
-            SET parsed_intent = ?
-            WHERE id = ?
-        """, (json.dumps(parsed_command), command_id))
-        
-        # Execute the command
-        result = self.execute_command(parsed_command)
-        
-        # Update the command with result
-        cur.execute("""
-            UPDATE user_commands 
-            SET executed = TRUE, result = ?
-            WHERE id = ?
-        """, (result, command_id))
-        
-        self.conn.commit()
+        received_at = str(datetime.now())
+        
+        # Parse and execute the command
+        parsed_command, source, similarity = self.resolve_command(command_text)
+        try:
+            result = self.execute_command(parsed_command)
+            executed = True
+        except Exception as e:
+            result, executed = f"❌ {e}", False
+            raise
+        finally:
+            # One audit row per command, written off the request path by the background writer
+            command_id = str(uuid.uuid4())
+            self.writer.submit(INSERT_COMMAND_SQL, (
+                command_id, command_text, json.dumps(parsed_command), executed, result,
+                received_at, source, similarity,
+            ))
         
         return {
             "command_id": command_id,
@@ -252,88 +380,101 @@ class ContextAssistant:
             "result": result
         }
     
-    def generate_voice_audio(self, text: str, filename: str):
-        """Generate voice audio using ElevenLabs."""
-        # Placeholder for ElevenLabs TTS
-        # In real implementation, you'd call:
-        # audio = self.elevenlabs_client.generate(
-        #     text=text,
-        #     voice="Rachel",  # or your preferred voice
-        #     model="eleven_multilingual_v2"
-        # )
-        # with open(f"audio/{filename}.mp3", "wb") as f:
-        #     f.write(audio)
-        
-        print(f"🔊 [Voice Audio Generated]: {text[:100]}...")
-        return f"audio/{filename}.mp3"
+    def audio_path(self, text: str):
+        """Where the content-addressed audio cache keeps (or will keep) the text's audio."""
+        backend, cache = get_tts()
+        return cache.path(cache.key(text, backend))
+    
+    def generate_voice_audio(self, text: str):
+        """Generate voice audio, reusing the cached file for identical text/voice/model/speed."""
+        return cached_audio(text)
+    
+    def refresh_briefing(self, briefing_type: str):
+        """Return (text, changed) for a named briefing, or None for an unknown type."""
+        if briefing_type in BRIEFINGS:
+            return self.get_briefing(briefing_type)
+        if briefing_type == "weekly":
+            return self.get_period_briefing(*self.get_last_week(), "weekly")
+        return None
     
     def play_voice_briefing(self, briefing_type: str):
         """Play a voice briefing."""
-        if briefing_type == "yesterday":
-            text = self.generate_yesterday_recap()
-            filename = "yesterday_recap"
-        elif briefing_type == "today":
-            text = self.generate_today_plan()
-            filename = "today_plan"
-        else:
+        refreshed = self.refresh_briefing(briefing_type)
+        if refreshed is None:
             return "Invalid briefing type"
-        
-        # Generate and play audio
-        audio_file = self.generate_voice_audio(text, filename)
-        
-        # In a real implementation, you'd play the audio file
-        print(f"🎵 Playing: {text}")
-        
-        return {
-            "text": text,
-            "audio_file": audio_file,
-            "type": briefing_type
-        }
+        return deliver_briefing(briefing_type, *refreshed)
+    
+    def play_period_briefing(self, start_day: date, end_day: date):
+        """Play a recap of a custom date range."""
+        text, changed = self.get_period_briefing(start_day, end_day)
+        return deliver_briefing("custom", text, changed)
     
     def get_system_status(self):
         """Get the current status of the Context Catcher system."""
+        # Counters are maintained by triggers (see system_stats in backend/db.py)
         cur = self.conn.cursor()
-        
-        # Get event counts
-        cur.execute("SELECT COUNT(*) FROM events")
-        total_events = cur.fetchone()[0]
-        
-        cur.execute("SELECT COUNT(*) FROM events WHERE processed = FALSE")
-        unprocessed_events = cur.fetchone()[0]
-        
-        cur.execute("SELECT COUNT(*) FROM threads")
-        total_threads = cur.fetchone()[0]
-        
-        cur.execute("SELECT COUNT(*) FROM voice_briefings")
-        total_briefings = cur.fetchone()[0]
+        cur.execute("""
+            SELECT total_events, unprocessed_events, total_threads, total_briefings
+            FROM system_stats WHERE id = 1
+        """)
+        total_events, unprocessed_events, total_threads, total_briefings = cur.fetchone()
         
         return {
             "total_events": total_events,
             "unprocessed_events": unprocessed_events,
             "total_threads": total_threads,
             "total_briefings": total_briefings,
+            "embedding_cache": embedding_memory.stats(),
             "status": "running" if unprocessed_events < 10 else "needs_attention"
         }
 
-# Main functions for the API
-def get_yesterday_recap():
+def deliver_briefing(briefing_type: str, text: str, changed: bool):
+    """Synthesize (a cache hit unless the text changed) and play a briefing.
+    
+    Needs no database connection, so callers holding the writer can release it first.
+    """
+    audio_file = cached_audio(text)
+    
+    # In a real implementation, you'd play the audio file
+    print(f"🎵 Playing: {text}")
+    
+    return {
+        "text": text,
+        "audio_file": audio_file,
+        "audio_url": f"/audio/{os.path.splitext(os.path.basename(audio_file))[0]}",
+        "type": briefing_type,
+        "cached": not changed
+    }
+
+# Main functions for the API (pass a connection checked out from backend.db.get_manager())
+def get_yesterday_recap(conn=None):
     """Get yesterday's recap briefing."""
-    assistant = ContextAssistant()
+    assistant = ContextAssistant(conn)
     return assistant.play_voice_briefing("yesterday")
 
-def get_today_plan():
+def get_today_plan(conn=None):
     """Get today's plan briefing."""
-    assistant = ContextAssistant()
+    assistant = ContextAssistant(conn)
     return assistant.play_voice_briefing("today")
 
-def process_command(command_text: str):
+def get_weekly_recap(conn=None):
+    """Get the recap of the past seven days."""
+    assistant = ContextAssistant(conn)
+    return assistant.play_voice_briefing("weekly")
+
+def get_period_recap(start: str, end: str, conn=None):
+    """Get a recap of a custom date range (ISO dates, inclusive)."""
+    assistant = ContextAssistant(conn)
+    return assistant.play_period_briefing(date.fromisoformat(start), date.fromisoformat(end))
+
+def process_command(command_text: str, conn=None):
     """Process a voice command."""
-    assistant = ContextAssistant()
+    assistant = ContextAssistant(conn)
     return assistant.process_voice_command(command_text)
 
-def get_system_status():
+def get_system_status(conn=None):
     """Get system status."""
-    assistant = ContextAssistant()
+    assistant = ContextAssistant(conn)
     return assistant.get_system_status()
 
 if __name__ == "__main__":
@@ -0,0 +1,62 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from backend.db import get_manager
+
+# How many database calls may run at once; the executor and reader pool match it
+DB_MAX_CONCURRENCY = int(os.getenv("DB_MAX_CONCURRENCY", 4))
+
+class AsyncDatabase:
+    """Runs synchronous sqlite3 work on dedicated executor threads so request
+    handlers never block the event loop.
+
+    `fn` receives a connection checked out from the ConnectionManager: a pooled
+    read-only connection for `read`, the single writer connection for `write`.
+    """
+
+    def __init__(self, max_concurrency: int = DB_MAX_CONCURRENCY, manager=None):
+        self.max_concurrency = max_concurrency
+        self.manager = manager or get_manager()
+        self.manager.pool_size = max(self.manager.pool_size, max_concurrency)
+        self._executor = None
+        self._semaphore = None
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="db")
+        return self._executor
+
+    def _limit(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _read(self, fn, args, kwargs):
+        with self.manager.reader() as conn:
+            return fn(conn, *args, **kwargs)
+
+    def _write(self, fn, args, kwargs):
+        with self.manager.writer() as conn:
+            return fn(conn, *args, **kwargs)
+
+    async def read(self, fn, *args, **kwargs):
+        """Run fn(conn, *args, **kwargs) on a read-only connection off the event loop."""
+        async with self._limit():
+            return await asyncio.get_running_loop().run_in_executor(
+                self._pool(), self._read, fn, args, kwargs
+            )
+
+    async def write(self, fn, *args, **kwargs):
+        """Run fn(conn, *args, **kwargs) on the writer connection off the event loop."""
+        async with self._limit():
+            return await asyncio.get_running_loop().run_in_executor(
+                self._pool(), self._write, fn, args, kwargs
+            )
+
+    def close(self):
+        """Wait for in-flight calls and release the pooled connections."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._semaphore = None
+        self.manager.close()
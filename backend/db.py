@@ -1,18 +1,129 @@
 import sqlite3
 import json
-from datetime import datetime
+import os
+import re
+import sys
+import queue
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.embeddings import migrate_json_embeddings
 
 DB_NAME = "context.db"
 
-def get_connection():
-    """Return a connection to the SQLite database."""
-    return sqlite3.connect(DB_NAME)
+# Applied to every connection. WAL lets readers run alongside the single writer,
+# and synchronous=NORMAL is durable across application crashes in WAL mode.
+PRAGMAS = {
+    "synchronous": "NORMAL",
+    "cache_size": -65536,  # 64 MiB page cache (negative = KiB)
+    "mmap_size": 268435456,  # 256 MiB memory-mapped I/O
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,
+}
 
-def init_db():
-    """Initialize tables if they don't exist."""
-    conn = get_connection()
-    cur = conn.cursor()
-    
+def configure_connection(conn, read_only: bool = False):
+    """Apply the standard pragmas (and WAL mode for writable connections)."""
+    if not read_only:
+        conn.execute("PRAGMA journal_mode=WAL")
+    for name, value in PRAGMAS.items():
+        conn.execute(f"PRAGMA {name}={value}")
+    return conn
+
+def get_connection(check_same_thread: bool = True):
+    """Return a tuned connection to the SQLite database."""
+    return configure_connection(sqlite3.connect(DB_NAME, check_same_thread=check_same_thread))
+
+def get_read_connection():
+    """Return a tuned read-only connection that may be shared across threads."""
+    conn = sqlite3.connect(f"file:{DB_NAME}?mode=ro", uri=True, check_same_thread=False)
+    return configure_connection(conn, read_only=True)
+
+class ConnectionManager:
+    """One shared writer connection plus a pool of read-only connections."""
+
+    def __init__(self, pool_size: int = 4):
+        self.pool_size = pool_size
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self._readers = queue.Queue()
+        self._created = 0
+        self._created_lock = threading.Lock()
+
+    @contextmanager
+    def writer(self):
+        """Check out the writer connection; writes are serialized by a lock."""
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = get_connection(check_same_thread=False)
+            try:
+                yield self._writer
+            except Exception:
+                self._writer.rollback()
+                raise
+
+    @contextmanager
+    def reader(self):
+        """Check out a read-only connection, waiting if the pool is exhausted."""
+        conn = None
+        with self._created_lock:
+            if self._readers.empty() and self._created < self.pool_size:
+                conn = get_read_connection()
+                self._created += 1
+        if conn is None:
+            conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._readers.put(conn)
+
+    def close(self):
+        """Close every pooled connection."""
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        with self._created_lock:
+            while not self._readers.empty():
+                self._readers.get().close()
+            self._created = 0
+
+_manager = None
+_manager_lock = threading.Lock()
+
+def get_manager():
+    """Process-wide connection manager."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = ConnectionManager()
+        return _manager
+
+def database_file(conn):
+    """Path of the main database behind a connection (DB_NAME for in-memory ones)."""
+    return conn.execute("PRAGMA database_list").fetchone()[2] or DB_NAME
+
+def iter_rows(cur, size: int = 500):
+    """Yield rows from an executed cursor in fetchmany chunks instead of fetchall."""
+    while True:
+        rows = cur.fetchmany(size)
+        if not rows:
+            break
+        yield from rows
+
+def add_column_if_missing(cur, table: str, column: str, declaration: str):
+    """Add a column to an existing table unless it is already there."""
+    cur.execute(f"PRAGMA table_info({table})")
+    if column not in [row[1] for row in cur.fetchall()]:
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
+def migration_base_schema(cur):
+    """Create the core tables."""
     # Events table (enhanced from your original)
     cur.execute("""
     CREATE TABLE IF NOT EXISTS events (
@@ -30,7 +141,9 @@ def init_db():
     CREATE TABLE IF NOT EXISTS embeddings (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         event_id INTEGER,
-        embedding TEXT,  -- JSON array of embedding values
+        embedding BLOB,  -- packed float values (see backend/embeddings.py)
+        dim INTEGER,
+        dtype TEXT DEFAULT 'float32',  -- float32, float16
         model TEXT DEFAULT 'gpt-5',
         created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
         FOREIGN KEY (event_id) REFERENCES events (id)
@@ -45,7 +158,9 @@ def init_db():
         description TEXT,
         created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
         updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-        status TEXT DEFAULT 'active'  -- active, archived, completed
+        status TEXT DEFAULT 'active',  -- active, archived, completed
+        centroid BLOB,  -- running mean of member embeddings (float32)
+        member_count INTEGER DEFAULT 0
     )
     """)
     
@@ -84,10 +199,521 @@ def init_db():
         timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
     )
     """)
+
+def migration_binary_embeddings(cur):
+    """Older databases stored embeddings as JSON text without dim/dtype."""
+    add_column_if_missing(cur, "embeddings", "dim", "INTEGER")
+    add_column_if_missing(cur, "embeddings", "dtype", "TEXT DEFAULT 'float32'")
+    migrated = migrate_json_embeddings(cur.connection, commit=False)
+    if migrated:
+        print(f"Migrated {migrated} JSON embeddings to binary format")
+
+def migration_embedding_cache(cur):
+    """Embedding cache table."""
+    # Embedding cache keyed by normalized content hash + model + dimension
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS embedding_cache (
+        content_hash TEXT NOT NULL,
+        model TEXT NOT NULL,
+        embedding BLOB NOT NULL,
+        dim INTEGER NOT NULL,
+        dtype TEXT DEFAULT 'float32',
+        last_used_at REAL,  -- unix time, drives LRU eviction
+        hit_count INTEGER DEFAULT 0,
+        PRIMARY KEY (content_hash, model, dim)
+    )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_embedding_cache_last_used ON embedding_cache (last_used_at)")
+
+def migration_thread_centroids(cur):
+    """Running centroid per thread for O(threads) assignment."""
+    add_column_if_missing(cur, "threads", "centroid", "BLOB")
+    add_column_if_missing(cur, "threads", "member_count", "INTEGER DEFAULT 0")
+
+def migration_secondary_indexes(cur):
+    """Indexes for the organizer, briefing and /events hot paths."""
+    # fetch_unprocessed_events: WHERE processed = FALSE ORDER BY timestamp
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_events_processed_timestamp ON events (processed, timestamp)")
+    # briefing day windows and /events ordering
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events (timestamp)")
+    # /events?source=... ORDER BY timestamp DESC
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_events_source_timestamp ON events (source, timestamp)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_event_id ON embeddings (event_id)")
+    # thread_events' primary key leads with thread_id; lookups by event need their own index
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_thread_events_event_id ON thread_events (event_id)")
+
+def migration_thread_recency_index(cur):
+    """Keyset pagination of /threads on (updated_at, id)."""
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_threads_updated_at_id ON threads (updated_at, id)")
+
+def migration_thread_stats(cur):
+    """Denormalized per-thread stats columns."""
+    add_column_if_missing(cur, "threads", "event_count", "INTEGER DEFAULT 0")
+    add_column_if_missing(cur, "threads", "sources", "TEXT DEFAULT ''")  # comma-separated set
+    add_column_if_missing(cur, "threads", "first_event_at", "DATETIME")
+    add_column_if_missing(cur, "threads", "last_event_at", "DATETIME")
+    add_column_if_missing(cur, "threads", "last_activity_at", "DATETIME")
+    # The triggers that keep these current (and the backfill) come with
+    # migration_thread_event_epochs, once events carry ts_epoch
+
+def rebuild_thread_stats(cur):
+    """Recompute every thread's denormalized stats from thread_events."""
+    cur.execute("""
+        UPDATE threads SET
+            event_count = coalesce(s.event_count, 0),
+            sources = coalesce(s.sources, ''),
+            first_event_at = s.first_event_at,
+            last_event_at = s.last_event_at,
+            last_activity_at = coalesce(s.last_activity_at, threads.last_activity_at),
+            updated_at = max(threads.updated_at, coalesce(s.last_activity_at, threads.updated_at))
+        FROM (
+            SELECT te.thread_id, COUNT(*) AS event_count, group_concat(DISTINCT e.source) AS sources,
+                   datetime(MIN(e.ts_epoch), 'unixepoch') AS first_event_at,
+                   datetime(MAX(e.ts_epoch), 'unixepoch') AS last_event_at,
+                   MAX(te.added_at) AS last_activity_at
+            FROM thread_events te JOIN events e ON e.id = te.event_id
+            GROUP BY te.thread_id
+        ) AS s
+        WHERE s.thread_id = threads.id
+    """)
+
+# (counter column, query that recomputes it from scratch)
+SYSTEM_STATS = [
+    ("total_events", "SELECT COUNT(*) FROM events"),
+    ("unprocessed_events", "SELECT COUNT(*) FROM events WHERE processed = FALSE"),
+    ("total_threads", "SELECT COUNT(*) FROM threads"),
+    ("total_briefings", "SELECT COUNT(*) FROM voice_briefings"),
+]
+
+def migration_system_stats(cur):
+    """Single-row counters table kept current by triggers, so /status is O(1)."""
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS system_stats (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        total_events INTEGER DEFAULT 0,
+        unprocessed_events INTEGER DEFAULT 0,
+        total_threads INTEGER DEFAULT 0,
+        total_briefings INTEGER DEFAULT 0
+    )
+    """)
+    cur.execute("INSERT OR IGNORE INTO system_stats (id) VALUES (1)")
+    triggers = {
+        "trg_stats_events_insert": """AFTER INSERT ON events BEGIN
+            UPDATE system_stats SET total_events = total_events + 1,
+                unprocessed_events = unprocessed_events + coalesce(NEW.processed = FALSE, 0)
+            WHERE id = 1; END""",
+        "trg_stats_events_delete": """AFTER DELETE ON events BEGIN
+            UPDATE system_stats SET total_events = total_events - 1,
+                unprocessed_events = unprocessed_events - coalesce(OLD.processed = FALSE, 0)
+            WHERE id = 1; END""",
+        "trg_stats_events_processed": """AFTER UPDATE OF processed ON events BEGIN
+            UPDATE system_stats SET unprocessed_events = unprocessed_events
+                + coalesce(NEW.processed = FALSE, 0) - coalesce(OLD.processed = FALSE, 0)
+            WHERE id = 1; END""",
+        "trg_stats_threads_insert": """AFTER INSERT ON threads BEGIN
+            UPDATE system_stats SET total_threads = total_threads + 1 WHERE id = 1; END""",
+        "trg_stats_threads_delete": """AFTER DELETE ON threads BEGIN
+            UPDATE system_stats SET total_threads = total_threads - 1 WHERE id = 1; END""",
+        "trg_stats_briefings_insert": """AFTER INSERT ON voice_briefings BEGIN
+            UPDATE system_stats SET total_briefings = total_briefings + 1 WHERE id = 1; END""",
+        "trg_stats_briefings_delete": """AFTER DELETE ON voice_briefings BEGIN
+            UPDATE system_stats SET total_briefings = total_briefings - 1 WHERE id = 1; END""",
+    }
+    for name, body in triggers.items():
+        cur.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+    rebuild_system_stats(cur)
+
+def rebuild_system_stats(cur):
+    """Recompute every counter in system_stats with full COUNT(*) queries."""
+    counts = {column: cur.execute(query).fetchone()[0] for column, query in SYSTEM_STATS}
+    cur.execute(
+        "UPDATE system_stats SET {} WHERE id = 1".format(", ".join(f"{column} = ?" for column in counts)),
+        list(counts.values())
+    )
+    return counts
+
+def check_system_stats(cur):
+    """Compare maintained counters with fresh counts; returns {column: (stored, actual)} for drift."""
+    stored = cur.execute(
+        "SELECT {} FROM system_stats WHERE id = 1".format(", ".join(column for column, _ in SYSTEM_STATS))
+    ).fetchone()
+    drift = {}
+    for (column, query), value in zip(SYSTEM_STATS, stored):
+        actual = cur.execute(query).fetchone()[0]
+        if value != actual:
+            drift[column] = (value, actual)
+    return drift
+
+# Text timestamps in exactly this shape come from the CURRENT_TIMESTAMP column
+# default and are UTC; anything else (e.g. datetime.now() with microseconds, as
+# the listener used to write) is local time.
+UTC_TEXT_TIMESTAMP = re.compile(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}")
+UTC_TEXT_TIMESTAMP_GLOB = "[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9] [0-9][0-9]:[0-9][0-9]:[0-9][0-9]"
+
+def text_timestamp_epoch(timestamp):
+    """Epoch seconds for a stored text timestamp (None if it does not parse)."""
+    try:
+        parsed = datetime.fromisoformat(str(timestamp))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None and UTC_TEXT_TIMESTAMP.fullmatch(str(timestamp)):
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+def migration_epoch_timestamps(cur):
+    """Integer epoch timestamps (plus the writer's UTC offset) with indexed range queries."""
+    add_column_if_missing(cur, "events", "ts_epoch", "INTEGER")
+    add_column_if_missing(cur, "events", "tz_offset", "INTEGER")  # minutes east of UTC when logged
+    
+    cur.execute("SELECT id, timestamp FROM events WHERE ts_epoch IS NULL")
+    updates = []
+    for event_id, timestamp in cur.fetchall():
+        ts_epoch = text_timestamp_epoch(timestamp)
+        if ts_epoch is not None:
+            updates.append((ts_epoch, event_id))
+    cur.executemany("UPDATE events SET ts_epoch = ? WHERE id = ?", updates)
     
-    conn.commit()
+    # Rows inserted without an explicit epoch (same UTC/local rule as the backfill)
+    cur.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_events_ts_epoch AFTER INSERT ON events
+    WHEN NEW.ts_epoch IS NULL
+    BEGIN
+        UPDATE events SET ts_epoch = CAST(
+            CASE WHEN NEW.timestamp GLOB '{UTC_TEXT_TIMESTAMP_GLOB}'
+                THEN strftime('%s', NEW.timestamp)
+                ELSE strftime('%s', NEW.timestamp, 'utc')
+            END AS INTEGER)
+        WHERE id = NEW.id;
+    END
+    """)
+    
+    # The text-timestamp indexes are replaced by epoch ones
+    cur.execute("DROP INDEX IF EXISTS idx_events_processed_timestamp")
+    cur.execute("DROP INDEX IF EXISTS idx_events_timestamp")
+    cur.execute("DROP INDEX IF EXISTS idx_events_source_timestamp")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_events_processed_ts ON events (processed, ts_epoch)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_events_ts ON events (ts_epoch)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_events_source_ts ON events (source, ts_epoch)")
+
+def migration_events_fts(cur):
+    """FTS5 index over event content, kept in sync with events by triggers."""
+    cur.execute("""
+    CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(
+        content,
+        content = 'events',
+        content_rowid = 'id',
+        tokenize = 'porter unicode61'
+    )
+    """)
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_events_fts_insert AFTER INSERT ON events BEGIN
+        INSERT INTO events_fts (rowid, content) VALUES (NEW.id, NEW.content);
+    END
+    """)
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_events_fts_delete AFTER DELETE ON events BEGIN
+        INSERT INTO events_fts (events_fts, rowid, content) VALUES ('delete', OLD.id, OLD.content);
+    END
+    """)
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_events_fts_update AFTER UPDATE OF content ON events BEGIN
+        INSERT INTO events_fts (events_fts, rowid, content) VALUES ('delete', OLD.id, OLD.content);
+        INSERT INTO events_fts (rowid, content) VALUES (NEW.id, NEW.content);
+    END
+    """)
+    cur.execute("INSERT INTO events_fts (events_fts) VALUES ('rebuild')")
+
+def migration_briefing_cache(cur):
+    """Key briefings by (type, day) with the last event id they cover, so they can
+    be reused and refreshed incrementally instead of regenerated per request."""
+    add_column_if_missing(cur, "voice_briefings", "briefing_day", "TEXT")
+    add_column_if_missing(cur, "voice_briefings", "last_event_id", "INTEGER DEFAULT 0")
+    add_column_if_missing(cur, "voice_briefings", "state", "TEXT")  # JSON aggregates behind the text
+    add_column_if_missing(cur, "voice_briefings", "updated_at", "DATETIME")
+    cur.execute("""
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_voice_briefings_type_day
+    ON voice_briefings (briefing_type, briefing_day) WHERE briefing_day IS NOT NULL
+    """)
+
+# Local calendar day of an event and its metadata priority, as SQL over a row alias
+EVENT_DAY = "date({row}.ts_epoch, 'unixepoch', 'localtime')"
+EVENT_PRIORITY = "CASE WHEN json_valid({row}.metadata) THEN json_extract({row}.metadata, '$.priority') END"
+
+def _priority_counts(row: str):
+    """0/1 expressions for (high, medium, low) priority of the row."""
+    priority = EVENT_PRIORITY.format(row=row)
+    return [f"coalesce({priority} = '{level}', 0)" for level in ("high", "medium", "low")]
+
+def migration_daily_rollups(cur):
+    """Per-day rollups (events per source with priority counts, events per thread),
+    kept current by triggers so period briefings never scan raw events."""
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS daily_source_stats (
+        day TEXT NOT NULL,  -- local date, YYYY-MM-DD
+        source TEXT NOT NULL,
+        event_count INTEGER DEFAULT 0,
+        high_priority INTEGER DEFAULT 0,
+        medium_priority INTEGER DEFAULT 0,
+        low_priority INTEGER DEFAULT 0,
+        PRIMARY KEY (day, source)
+    ) WITHOUT ROWID
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS daily_thread_stats (
+        day TEXT NOT NULL,
+        thread_id INTEGER NOT NULL,
+        event_count INTEGER DEFAULT 0,
+        PRIMARY KEY (day, thread_id)
+    ) WITHOUT ROWID
+    """)
+    
+    add_new = f"""
+        INSERT INTO daily_source_stats (day, source, event_count, high_priority, medium_priority, low_priority)
+        SELECT {EVENT_DAY.format(row='NEW')}, NEW.source, 1, {', '.join(_priority_counts('NEW'))}
+        WHERE NEW.ts_epoch IS NOT NULL
+        ON CONFLICT (day, source) DO UPDATE SET
+            event_count = event_count + 1,
+            high_priority = high_priority + excluded.high_priority,
+            medium_priority = medium_priority + excluded.medium_priority,
+            low_priority = low_priority + excluded.low_priority;"""
+    high, medium, low = _priority_counts("OLD")
+    remove_old = f"""
+        UPDATE daily_source_stats SET
+            event_count = event_count - 1,
+            high_priority = high_priority - {high},
+            medium_priority = medium_priority - {medium},
+            low_priority = low_priority - {low}
+        WHERE day = {EVENT_DAY.format(row='OLD')} AND source = OLD.source;"""
+    thread_day = f"(SELECT {EVENT_DAY.format(row='e')} FROM events e WHERE e.id = {{row}}.event_id)"
+    triggers = {
+        # ts_epoch may still be NULL here; trg_events_ts_epoch then fills it via UPDATE
+        "trg_daily_events_insert": f"AFTER INSERT ON events BEGIN {add_new} END",
+        "trg_daily_events_update": f"AFTER UPDATE OF ts_epoch, source, metadata ON events BEGIN {remove_old} {add_new} END",
+        "trg_daily_events_delete": f"""AFTER DELETE ON events BEGIN {remove_old}
+            UPDATE daily_thread_stats SET event_count = event_count - 1
+            WHERE day = {EVENT_DAY.format(row='OLD')}
+              AND thread_id IN (SELECT thread_id FROM thread_events WHERE event_id = OLD.id); END""",
+        # Moving an event to another day moves its thread memberships with it
+        "trg_daily_thread_events_move": f"""AFTER UPDATE OF ts_epoch ON events
+            WHEN OLD.ts_epoch IS NOT NEW.ts_epoch BEGIN
+            UPDATE daily_thread_stats SET event_count = event_count - 1
+            WHERE day = {EVENT_DAY.format(row='OLD')}
+              AND thread_id IN (SELECT thread_id FROM thread_events WHERE event_id = OLD.id);
+            INSERT INTO daily_thread_stats (day, thread_id, event_count)
+            SELECT {EVENT_DAY.format(row='NEW')}, te.thread_id, 1 FROM thread_events te
+            WHERE te.event_id = NEW.id AND NEW.ts_epoch IS NOT NULL
+            ON CONFLICT (day, thread_id) DO UPDATE SET event_count = event_count + 1; END""",
+        "trg_daily_thread_events_insert": f"""AFTER INSERT ON thread_events BEGIN
+            INSERT INTO daily_thread_stats (day, thread_id, event_count)
+            SELECT {EVENT_DAY.format(row='e')}, NEW.thread_id, 1 FROM events e
+            WHERE e.id = NEW.event_id AND e.ts_epoch IS NOT NULL
+            ON CONFLICT (day, thread_id) DO UPDATE SET event_count = event_count + 1; END""",
+        "trg_daily_thread_events_delete": f"""AFTER DELETE ON thread_events BEGIN
+            UPDATE daily_thread_stats SET event_count = event_count - 1
+            WHERE thread_id = OLD.thread_id AND day = {thread_day.format(row='OLD')}; END""",
+    }
+    for name, body in triggers.items():
+        cur.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+    rebuild_daily_rollups(cur)
+
+def rebuild_daily_rollups(cur):
+    """Recompute both daily rollup tables from events and thread_events."""
+    cur.execute("DELETE FROM daily_source_stats")
+    cur.execute(f"""
+        INSERT INTO daily_source_stats (day, source, event_count, high_priority, medium_priority, low_priority)
+        SELECT {EVENT_DAY.format(row='e')}, e.source, COUNT(*),
+               {', '.join(f'SUM({count})' for count in _priority_counts('e'))}
+        FROM events e WHERE e.ts_epoch IS NOT NULL
+        GROUP BY 1, 2
+    """)
+    cur.execute("DELETE FROM daily_thread_stats")
+    cur.execute(f"""
+        INSERT INTO daily_thread_stats (day, thread_id, event_count)
+        SELECT {EVENT_DAY.format(row='e')}, te.thread_id, COUNT(*)
+        FROM thread_events te JOIN events e ON e.id = te.event_id
+        WHERE e.ts_epoch IS NOT NULL
+        GROUP BY 1, 2
+    """)
+
+def migration_intent_cache(cur):
+    """Semantic cache of model-parsed commands, plus how each command was parsed."""
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS intent_cache (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        command_key TEXT NOT NULL,  -- normalized command text (see normalize_command)
+        command_text TEXT NOT NULL,
+        model TEXT NOT NULL,  -- embedding model of `embedding`
+        embedding BLOB NOT NULL,
+        dim INTEGER,
+        dtype TEXT DEFAULT 'float32',
+        parsed_intent TEXT NOT NULL,  -- JSON of parsed command
+        created_at REAL,  -- unix time, drives TTL expiry
+        last_used_at REAL,  -- unix time, drives LRU eviction
+        hit_count INTEGER DEFAULT 0,
+        UNIQUE (command_key, model)
+    )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_intent_cache_last_used ON intent_cache (last_used_at)")
+    add_column_if_missing(cur, "user_commands", "parse_source", "TEXT")  # rules, semantic_cache or model
+    add_column_if_missing(cur, "user_commands", "parse_similarity", "REAL")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_user_commands_parse_source ON user_commands (parse_source)")
+
+def migration_command_request_ids(cur):
+    """Client-generated ids for command audit rows, which are written asynchronously
+    and so cannot hand their AUTOINCREMENT id back to the request."""
+    add_column_if_missing(cur, "user_commands", "request_id", "TEXT")
+    cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_user_commands_request_id ON user_commands (request_id)")
+
+def migration_thread_event_epochs(cur):
+    """Triggers on thread_events that maintain the thread stats columns.
+
+    first/last_event_at are derived from events.ts_epoch and stored as UTC text
+    in the CURRENT_TIMESTAMP shape, so they compare correctly whatever format
+    the events' own timestamps were written in.
+    """
+    event_utc = "datetime(e.ts_epoch, 'unixepoch')"
+    cur.execute("DROP TRIGGER IF EXISTS trg_thread_events_insert")
+    cur.execute("DROP TRIGGER IF EXISTS trg_thread_events_delete")
+    cur.execute(f"""
+    CREATE TRIGGER trg_thread_events_insert AFTER INSERT ON thread_events
+    BEGIN
+        UPDATE threads SET
+            event_count = event_count + 1,
+            sources = coalesce((
+                SELECT CASE
+                    WHEN threads.sources IS NULL OR threads.sources = '' THEN e.source
+                    WHEN instr(',' || threads.sources || ',', ',' || e.source || ',') > 0 THEN threads.sources
+                    ELSE threads.sources || ',' || e.source
+                END
+                FROM events e WHERE e.id = NEW.event_id
+            ), threads.sources),
+            first_event_at = coalesce((
+                SELECT min(coalesce(threads.first_event_at, {event_utc}), {event_utc})
+                FROM events e WHERE e.id = NEW.event_id
+            ), threads.first_event_at),
+            last_event_at = coalesce((
+                SELECT max(coalesce(threads.last_event_at, {event_utc}), {event_utc})
+                FROM events e WHERE e.id = NEW.event_id
+            ), threads.last_event_at),
+            last_activity_at = CURRENT_TIMESTAMP,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = NEW.thread_id;
+    END
+    """)
+    # Removals are rare, so just recompute that thread
+    cur.execute("""
+    CREATE TRIGGER trg_thread_events_delete AFTER DELETE ON thread_events
+    BEGIN
+        UPDATE threads SET
+            event_count = (SELECT COUNT(*) FROM thread_events WHERE thread_id = OLD.thread_id),
+            sources = coalesce((
+                SELECT group_concat(DISTINCT e.source) FROM thread_events te
+                JOIN events e ON e.id = te.event_id WHERE te.thread_id = OLD.thread_id
+            ), ''),
+            first_event_at = (
+                SELECT datetime(MIN(e.ts_epoch), 'unixepoch') FROM thread_events te
+                JOIN events e ON e.id = te.event_id WHERE te.thread_id = OLD.thread_id
+            ),
+            last_event_at = (
+                SELECT datetime(MAX(e.ts_epoch), 'unixepoch') FROM thread_events te
+                JOIN events e ON e.id = te.event_id WHERE te.thread_id = OLD.thread_id
+            ),
+            last_activity_at = CURRENT_TIMESTAMP,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = OLD.thread_id;
+    END
+    """)
+    rebuild_thread_stats(cur)
+
+# Ordered schema migrations: (version, description, function). Append new
+# entries at the end; never renumber or edit one that has shipped.
+MIGRATIONS = [
+    (1, "base schema", migration_base_schema),
+    (2, "binary embeddings", migration_binary_embeddings),
+    (3, "embedding cache", migration_embedding_cache),
+    (4, "thread centroids", migration_thread_centroids),
+    (5, "secondary indexes", migration_secondary_indexes),
+    (6, "thread recency index", migration_thread_recency_index),
+    (7, "materialized thread stats", migration_thread_stats),
+    (8, "system stats counters", migration_system_stats),
+    (9, "epoch timestamps", migration_epoch_timestamps),
+    (10, "event full-text index", migration_events_fts),
+    (11, "cached briefings", migration_briefing_cache),
+    (12, "daily rollups", migration_daily_rollups),
+    (13, "semantic intent cache", migration_intent_cache),
+    (14, "command request ids", migration_command_request_ids),
+    (15, "thread stats from epoch timestamps", migration_thread_event_epochs),
+]
+
+def get_schema_version(conn):
+    """Highest applied migration version (0 for a fresh database)."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        description TEXT,
+        applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    row = conn.execute("SELECT MAX(version) FROM schema_migrations").fetchone()
+    return row[0] or 0
+
+def migrate(conn, target: int = None):
+    """Apply pending migrations in order, each in its own transaction."""
+    current = get_schema_version(conn)
+    applied = []
+    for version, description, migration in MIGRATIONS:
+        if version <= current or (target is not None and version > target):
+            continue
+        with conn:
+            cur = conn.cursor()
+            cur.execute("BEGIN")
+            migration(cur)
+            cur.execute(
+                "INSERT INTO schema_migrations (version, description) VALUES (?, ?)",
+                (version, description)
+            )
+        applied.append(version)
+    return applied
+
+def init_db():
+    """Create or upgrade the database schema."""
+    conn = get_connection()
+    applied = migrate(conn)
     conn.close()
+    if applied:
+        print(f"Applied schema migrations {applied}")
     print("Database initialized with enhanced schema ✅")
 
+def verify_stats(rebuild: bool = False):
+    """Report (and optionally repair) drift between system_stats and the real counts."""
+    conn = get_connection()
+    migrate(conn)
+    with conn:
+        cur = conn.cursor()
+        drift = check_system_stats(cur)
+        for column, (stored, actual) in drift.items():
+            print(f"⚠️  {column}: stored {stored}, actual {actual}")
+        if drift and rebuild:
+            rebuild_system_stats(cur)
+            print("🔧 System stats rebuilt")
+        elif not drift:
+            print("✅ System stats are consistent")
+    conn.close()
+    return drift
+
 if __name__ == "__main__":
-    init_db()
+    # python backend/db.py [check-stats | rebuild-stats | rebuild-rollups]
+    command = sys.argv[1] if len(sys.argv) > 1 else "init"
+    if command == "check-stats":
+        verify_stats()
+    elif command == "rebuild-stats":
+        verify_stats(rebuild=True)
+    elif command == "rebuild-rollups":
+        conn = get_connection()
+        migrate(conn)
+        with conn:
+            rebuild_daily_rollups(conn.cursor())
+        conn.close()
+        print("🔧 Daily rollups rebuilt")
+    else:
+        init_db()
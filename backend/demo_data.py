@@ -39,6 +39,7 @@ def create_demo_data():
     listener.simulate_gmail_events()
     listener.simulate_notion_events()
     listener.simulate_zoom_events()
+    listener.stop_listening()
     
     conn.close()
     print("✅ Demo data created successfully!")
@@ -0,0 +1,193 @@
+import re
+import time
+import threading
+import hashlib
+import unicodedata
+from collections import OrderedDict
+from backend.embeddings import encode_embedding, decode_embedding, DEFAULT_DTYPE
+
+def normalize_content(text: str):
+    """Canonical form used for cache keys: NFC, collapsed whitespace, trimmed."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+def content_hash(text: str):
+    """SHA-256 of the normalized content."""
+    return hashlib.sha256(normalize_content(text).encode("utf-8")).hexdigest()
+
+class MemoryTier:
+    """Thread-safe in-memory LRU of (content hash, model, dim) -> vector, plus the
+    hit/miss counters of both embedding cache tiers."""
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+            return vector
+
+    def put(self, key, vector):
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record(self, disk_hits: int = 0, misses: int = 0):
+        with self._lock:
+            self.disk_hits += disk_hits
+            self.misses += misses
+
+    def stats(self):
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self),
+        }
+
+# Shared by every EmbeddingCache in the process; organizers are created per
+# request, so a per-instance memory tier would never be warm
+embedding_memory = MemoryTier()
+
+class EmbeddingCache:
+    """Two-tier embedding cache keyed by (content hash, model, dim): the process-wide
+    in-memory LRU in front of the size-bounded `embedding_cache` SQLite table.
+    The same model can be asked for shortened vectors, so dim is part of the key."""
+
+    def __init__(self, conn, max_entries: int = 100000, memory: MemoryTier = None):
+        self.conn = conn
+        self.max_entries = max_entries
+        self.memory = embedding_memory if memory is None else memory
+        self._disk_count = None
+
+    def get_many(self, texts: list, model: str, dim: int):
+        """Return {position: vector} for every text that is already cached."""
+        found = {}
+        pending = {}  # content hash -> positions not in memory
+        for i, text in enumerate(texts):
+            key = (content_hash(text), model, dim)
+            vector = self.memory.get(key)
+            if vector is not None:
+                found[i] = vector
+            else:
+                pending.setdefault(key[0], []).append(i)
+        if not pending:
+            return found
+
+        cur = self.conn.cursor()
+        hashes = list(pending)
+        disk_hits = []
+        hit_positions = 0
+        for start in range(0, len(hashes), 500):
+            chunk = hashes[start:start + 500]
+            cur.execute("""
+                SELECT content_hash, embedding, dtype FROM embedding_cache
+                WHERE model = ? AND dim = ? AND content_hash IN ({})
+            """.format(','.join('?' * len(chunk))), [model, dim] + chunk)
+            for digest, blob, dtype in cur.fetchall():
+                vector = decode_embedding(blob, dim, dtype or DEFAULT_DTYPE)
+                self.memory.put((digest, model, dim), vector)
+                for i in pending.pop(digest):
+                    found[i] = vector
+                    hit_positions += 1
+                disk_hits.append(digest)
+        if disk_hits:
+            now = time.time()
+            cur.executemany("""
+                UPDATE embedding_cache SET last_used_at = ?, hit_count = hit_count + 1
+                WHERE content_hash = ? AND model = ? AND dim = ?
+            """, [(now, digest, model, dim) for digest in disk_hits])
+            self.conn.commit()
+        self.memory.record(hit_positions, sum(len(positions) for positions in pending.values()))
+        return found
+
+    def put_many(self, texts: list, model: str, dim: int, vectors: list, dtype: str = DEFAULT_DTYPE):
+        """Store freshly computed embeddings and evict the least recently used rows."""
+        now = time.time()
+        rows = {}
+        for text, vector in zip(texts, vectors):
+            digest = content_hash(text)
+            self.memory.put((digest, model, dim), vector)
+            rows[digest] = (digest, model, encode_embedding(vector, dtype), dim, dtype, now)
+        cur = self.conn.cursor()
+        if self._disk_count is None:
+            cur.execute("SELECT COUNT(*) FROM embedding_cache")
+            self._disk_count = cur.fetchone()[0]
+        # Same content, model and dim means the same vector, so an existing row is kept;
+        # total_changes then counts only the rows actually added
+        changes = self.conn.total_changes
+        cur.executemany("""
+            INSERT INTO embedding_cache
+                (content_hash, model, embedding, dim, dtype, last_used_at, hit_count)
+            VALUES (?, ?, ?, ?, ?, ?, 0)
+            ON CONFLICT (content_hash, model, dim) DO NOTHING
+        """, list(rows.values()))
+        self._disk_count += self.conn.total_changes - changes
+        if self._disk_count > self.max_entries:
+            self.evict()
+        self.conn.commit()
+
+    def evict(self):
+        """Trim the SQLite tier back to max_entries, oldest use first."""
+        cur = self.conn.cursor()
+        cur.execute("""
+            DELETE FROM embedding_cache WHERE rowid IN (
+                SELECT rowid FROM embedding_cache
+                ORDER BY last_used_at ASC
+                LIMIT max(0, (SELECT COUNT(*) FROM embedding_cache) - ?)
+            )
+        """, (self.max_entries,))
+        cur.execute("SELECT COUNT(*) FROM embedding_cache")
+        self._disk_count = cur.fetchone()[0]
+
+    def stats(self):
+        """Hit/miss counters of the process-wide memory tier (and the SQLite tier behind it)."""
+        return self.memory.stats()
+
+class QueryEmbeddingCache:
+    """Process-wide in-memory LRU for query-text embeddings. Unlike EmbeddingCache
+    it never writes to SQLite, so it works on read-only request connections."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text: str, model: str, dim: int):
+        key = (content_hash(text), model, dim)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, text: str, model: str, dim: int, vector):
+        with self._lock:
+            self._entries[(content_hash(text), model, dim)] = vector
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0}
+
+query_embedding_cache = QueryEmbeddingCache()
@@ -0,0 +1,158 @@
+import re
+import time
+import random
+import hashlib
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import tiktoken
+except ImportError:  # token budgets fall back to a character estimate
+    tiktoken = None
+
+def estimate_tokens(text: str):
+    """Cheap, offline token estimate (~4 chars/token)."""
+    return len(text) // 4 + 1
+
+def count_tokens(text: str, encoding_name: str = "cl100k_base"):
+    """Count tokens with tiktoken when available, else estimate ~4 chars/token.
+
+    tiktoken downloads the encoding on first use, so only providers that call a
+    tokenizer-billed API should use this (see EmbeddingProvider.count_tokens).
+    """
+    if tiktoken is not None:
+        return len(tiktoken.get_encoding(encoding_name).encode(text))
+    return estimate_tokens(text)
+
+def is_rate_limit_error(error: Exception):
+    """True for HTTP 429 / provider rate-limit errors that are worth retrying."""
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429 or "RateLimit" in type(error).__name__
+
+class EmbeddingProvider:
+    """Base class: turns a batch of texts into a list of vectors.
+
+    max_batch_items / max_batch_tokens bound a single request; BatchEmbedder
+    packs texts to fit them, measuring each text with count_tokens.
+    """
+    model = None
+    dim = None
+    max_batch_items = 256
+    max_batch_tokens = 8000
+
+    def count_tokens(self, text: str):
+        """Tokens the text costs against max_batch_tokens (an offline estimate by default)."""
+        return estimate_tokens(text)
+
+    def embed_batch(self, texts: list):
+        raise NotImplementedError
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """Local, deterministic stand-in: feature-hashes words and word bigrams."""
+    model = "local-hashing-v1"
+
+    def __init__(self, dim: int = 1536, max_batch_items: int = EmbeddingProvider.max_batch_items,
+                 max_batch_tokens: int = EmbeddingProvider.max_batch_tokens):
+        self.dim = dim
+        self.max_batch_items = max_batch_items
+        self.max_batch_tokens = max_batch_tokens
+
+    def embed_text(self, text: str):
+        vec = np.zeros(self.dim, dtype=np.float32)
+        words = re.findall(r"\w+", text.lower())
+        for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            vec[value % self.dim] += 1.0 if value & (1 << 63) else -1.0
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def embed_batch(self, texts: list):
+        return [self.embed_text(text) for text in texts]
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """OpenAI embeddings API; one request per batch.
+
+    `dimensions` (shortened text-embedding-3 vectors) needs openai>=1.10.
+    """
+
+    def __init__(self, client=None, model: str = "text-embedding-3-large", dim: int = 1536,
+                 max_batch_items: int = 2048, max_batch_tokens: int = EmbeddingProvider.max_batch_tokens):
+        if client is None:
+            from openai import OpenAI
+            from config import settings
+            client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.client = client
+        self.model = model
+        self.dim = dim
+        self.max_batch_items = max_batch_items
+        self.max_batch_tokens = max_batch_tokens
+
+    def count_tokens(self, text: str):
+        """Exact cl100k_base count, which is what the API budgets against."""
+        return count_tokens(text)
+
+    def embed_batch(self, texts: list):
+        response = self.client.embeddings.create(model=self.model, input=texts, dimensions=self.dim)
+        ordered = sorted(response.data, key=lambda item: item.index)
+        return [np.asarray(item.embedding, dtype=np.float32) for item in ordered]
+
+class BatchEmbedder:
+    """Packs texts into provider-sized batches and embeds them concurrently,
+    backing off and retrying when the provider rate-limits us."""
+
+    def __init__(self, provider: EmbeddingProvider = None, max_workers: int = 4,
+                 max_retries: int = 5, base_delay: float = 0.5):
+        self.provider = provider or HashingEmbeddingProvider()
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+
+    @property
+    def model(self):
+        return self.provider.model
+
+    @property
+    def dim(self):
+        return self.provider.dim
+
+    def make_batches(self, texts: list):
+        """Split texts into (start, texts) batches within the item/token budget."""
+        batches, current, current_tokens, start = [], [], 0, 0
+        for i, text in enumerate(texts):
+            tokens = self.provider.count_tokens(text)
+            if current and (len(current) >= self.provider.max_batch_items
+                            or current_tokens + tokens > self.provider.max_batch_tokens):
+                batches.append((start, current))
+                current, current_tokens, start = [], 0, i
+            current.append(text)
+            current_tokens += tokens
+        if current:
+            batches.append((start, current))
+        return batches
+
+    def _embed_with_backoff(self, texts: list):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.provider.embed_batch(texts)
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == self.max_retries:
+                    raise
+                retry_after = getattr(getattr(e, "response", None), "headers", {}).get("retry-after")
+                delay = float(retry_after) if retry_after else self.base_delay * (2 ** attempt)
+                time.sleep(delay + random.uniform(0, delay / 2))
+
+    def embed(self, texts: list):
+        """Embed texts, preserving input order."""
+        if not texts:
+            return []
+        batches = self.make_batches(texts)
+        if len(batches) == 1:
+            return self._embed_with_backoff(batches[0][1])
+        results = [None] * len(texts)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [(start, pool.submit(self._embed_with_backoff, batch)) for start, batch in batches]
+            for start, future in futures:
+                for offset, vector in enumerate(future.result()):
+                    results[start + offset] = vector
+        return results
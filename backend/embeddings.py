@@ -0,0 +1,59 @@
+import json
+import numpy as np
+
+# Vectors are stored as raw little-endian float BLOBs; the dimension and dtype
+# live in their own columns so rows can be decoded without parsing JSON.
+DEFAULT_DTYPE = "float32"
+SUPPORTED_DTYPES = {
+    "float32": np.dtype("<f4"),
+    "float16": np.dtype("<f2"),
+}
+
+def encode_embedding(embedding, dtype: str = DEFAULT_DTYPE):
+    """Pack an embedding into a compact binary BLOB."""
+    if dtype not in SUPPORTED_DTYPES:
+        raise ValueError(f"Unsupported embedding dtype: {dtype}")
+    vec = np.asarray(embedding, dtype=SUPPORTED_DTYPES[dtype])
+    return vec.tobytes()
+
+def decode_embedding(blob, dim: int = None, dtype: str = DEFAULT_DTYPE):
+    """Load an embedding BLOB as a read-only NumPy view (no copy)."""
+    if isinstance(blob, str):
+        # Legacy row that has not been migrated yet
+        return np.array(json.loads(blob), dtype=np.float32)
+    if dtype not in SUPPORTED_DTYPES:
+        raise ValueError(f"Unsupported embedding dtype: {dtype}")
+    vec = np.frombuffer(blob, dtype=SUPPORTED_DTYPES[dtype])
+    if dim is not None and vec.shape[0] != dim:
+        raise ValueError(f"Embedding has {vec.shape[0]} values, expected {dim}")
+    return vec
+
+def migrate_json_embeddings(conn, dtype: str = DEFAULT_DTYPE, batch_size: int = 500, commit: bool = True):
+    """Rewrite legacy JSON-text embedding rows as binary BLOBs.
+
+    Commits after each batch unless `commit` is False, in which case the caller's
+    transaction (e.g. a schema migration) decides whether the rewrite sticks.
+    """
+    cur = conn.cursor()
+    migrated = 0
+    while True:
+        cur.execute("""
+            SELECT id, embedding FROM embeddings
+            WHERE typeof(embedding) = 'text'
+            LIMIT ?
+        """, (batch_size,))
+        rows = cur.fetchall()
+        if not rows:
+            break
+        updates = []
+        for row_id, embedding_json in rows:
+            values = json.loads(embedding_json)
+            updates.append((encode_embedding(values, dtype), len(values), dtype, row_id))
+        cur.executemany("""
+            UPDATE embeddings SET embedding = ?, dim = ?, dtype = ?
+            WHERE id = ?
+        """, updates)
+        if commit:
+            conn.commit()
+        migrated += len(updates)
+    return migrated
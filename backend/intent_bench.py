@@ -0,0 +1,68 @@
+import argparse
+import os
+import sys
+import time
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.intents import Intent, IntentEngine, INTENTS, normalize_command
+
+SAMPLE_COMMANDS = [
+    "Open Gmail",
+    "Search YouTube for lo-fi music",
+    "Google vendor pricing",
+    "Open Notion Q3 doc",
+    "create a task to send the Q3 report",
+    "schedule a meeting with Sarah at 3pm",
+    "go to github.com",
+    "what is the weather like",
+]
+
+def synthetic_intents(count: int):
+    """`count` extra intents shaped like the built-ins (one keyword, two patterns each)."""
+    def build(name):
+        return lambda slots: {"action": name, **slots}
+    return [
+        Intent(f"tool_{i}", [f"tool{i}"], [rf"^(?:open|launch) tool{i}(?: (?P<arg>.+))?$", rf"\btool{i} (?P<arg>.+)"], build(f"tool_{i}"))
+        for i in range(count)
+    ]
+
+def linear_match(intents, text: str):
+    """Baseline: try every intent's patterns in priority order, as an if-chain would."""
+    for intent in sorted(intents, key=lambda intent: -intent.priority):
+        parsed = intent.match(text)
+        if parsed is not None:
+            return parsed
+    return None
+
+def time_per_call(fn, commands, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for command in commands:
+            fn(command)
+    return (time.perf_counter() - start) * 1e6 / (repeat * len(commands))
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-command parse latency of the intent engine")
+    parser.add_argument("--intents", type=int, default=500, help="synthetic intents registered on top of the built-ins")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    intents = INTENTS + synthetic_intents(args.intents)
+    engine = IntentEngine(intents)
+    commands = SAMPLE_COMMANDS + [f"launch tool{i} dashboard" for i in range(0, args.intents, max(1, args.intents // 8))]
+    normalized = [normalize_command(command) for command in commands]
+
+    print(f"🧭 {len(engine)} intents, {len(commands)} distinct commands, {args.repeat} rounds")
+    rows = [
+        ("linear scan", time_per_call(lambda text: linear_match(intents, text), normalized, max(1, args.repeat // 20))),
+        ("keyword index", time_per_call(engine.match, normalized, args.repeat)),
+        ("index + LRU cache", time_per_call(engine.parse, commands, args.repeat)),
+    ]
+    for label, micros in rows:
+        print(f"   {label:<18} {micros:8.2f} µs/command")
+    print(f"   cache: {engine.stats()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import os
+import json
+import time
+import threading
+from backend.db import database_file
+from backend.embedding_cache import query_embedding_cache
+from backend.embeddings import encode_embedding, decode_embedding, DEFAULT_DTYPE
+from backend.intents import normalize_command, SLOT_KEYS
+from backend.vector_index import EmbeddingMatrix
+from backend.writer import get_writer
+
+INTENT_CACHE_THRESHOLD = float(os.getenv("INTENT_CACHE_THRESHOLD", 0.9))
+INTENT_CACHE_TTL_DAYS = float(os.getenv("INTENT_CACHE_TTL_DAYS", 7))
+INTENT_CACHE_MAX_ENTRIES = int(os.getenv("INTENT_CACHE_MAX_ENTRIES", 5000))
+# Embedding provider for command lookups: "openai", or "none" to leave the cache
+# off. The local hashing vectors only match near-verbatim repeats (paraphrases
+# like "open my gmail" / "open gmail please" score around 0.4), so they are
+# never used here.
+INTENT_CACHE_EMBEDDINGS = os.getenv("INTENT_CACHE_EMBEDDINGS", "none")
+
+def slots_present(parsed: dict, command_text: str):
+    """True when every slot value of a cached parse also occurs in the new command,
+    so reusing it cannot carry over another command's arguments."""
+    normalized = normalize_command(command_text)
+    for key in SLOT_KEYS:
+        value = parsed.get(key)
+        if isinstance(value, str) and value and normalize_command(value) not in normalized:
+            return False
+    return True
+
+STORE_SQL = """
+    INSERT INTO intent_cache
+        (command_key, command_text, model, embedding, dim, dtype, parsed_intent, created_at, last_used_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (command_key, model) DO UPDATE SET
+        command_text = excluded.command_text,
+        embedding = excluded.embedding,
+        dim = excluded.dim,
+        dtype = excluded.dtype,
+        parsed_intent = excluded.parsed_intent,
+        created_at = excluded.created_at,
+        last_used_at = excluded.last_used_at
+"""
+HIT_SQL = "UPDATE intent_cache SET last_used_at = ?, hit_count = hit_count + 1 WHERE command_key = ? AND model = ?"
+FORGET_SQL = "DELETE FROM intent_cache WHERE command_key = ? AND model = ?"
+EXPIRE_SQL = "DELETE FROM intent_cache WHERE created_at < ?"
+
+class SemanticIntentCache:
+    """Model-parsed commands indexed by command embedding, so paraphrases of a
+    command seen before ("open my gmail" / "open gmail please") skip the model.
+
+    Rows live in `intent_cache`, keyed by normalized command text and model; the
+    vectors are mirrored in an in-memory matrix, which is what lookups read.
+    Entries expire after ttl_seconds and the least recently used are evicted
+    beyond max_entries. Row writes go through the background writer, so
+    request threads never commit.
+    """
+
+    def __init__(self, threshold: float = INTENT_CACHE_THRESHOLD,
+                 ttl_seconds: float = INTENT_CACHE_TTL_DAYS * 86400,
+                 max_entries: int = INTENT_CACHE_MAX_ENTRIES):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._matrix = None
+        self._model = None
+        self._entries = {}  # matrix handle -> [command_key, parsed, created_at, last_used_at]
+        self._handles = {}  # command_key -> matrix handle
+        self._next_handle = 0
+        self._lock = threading.Lock()
+
+    def _load(self, conn, model: str):
+        """Mirror the unexpired rows for this embedding model (once per model)."""
+        if self._matrix is not None and self._model == model:
+            return
+        self._matrix, self._model, self._entries, self._handles = EmbeddingMatrix(), model, {}, {}
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT command_key, embedding, dim, dtype, parsed_intent, created_at, last_used_at FROM intent_cache
+            WHERE model = ? AND created_at >= ?
+        """, (model, time.time() - self.ttl_seconds))
+        for command_key, blob, dim, dtype, parsed, created_at, last_used_at in cur.fetchall():
+            self._remember(command_key, decode_embedding(blob, dim, dtype or DEFAULT_DTYPE),
+                           json.loads(parsed), created_at, last_used_at or created_at)
+
+    def _remember(self, command_key: str, vector, parsed: dict, created_at: float, last_used_at: float):
+        handle = self._handles.get(command_key)
+        if handle is None:
+            handle = self._handles[command_key] = self._next_handle
+            self._next_handle += 1
+        self._matrix.add(handle, vector)
+        self._entries[handle] = [command_key, parsed, created_at, last_used_at]
+
+    def lookup(self, conn, command_text: str, vector, model: str, writer=None):
+        """Return (parsed, similarity) for the closest reusable entry, or None."""
+        writer = writer or get_writer()
+        with self._lock:
+            self._load(conn, model)
+            now = time.time()
+            for handle, similarity in self._matrix.search(vector, k=5, threshold=self.threshold):
+                entry = self._entries[handle]
+                command_key, parsed, created_at, _ = entry
+                if now - created_at > self.ttl_seconds:
+                    self._forget(writer, [handle])
+                    continue
+                if not slots_present(parsed, command_text):
+                    continue
+                entry[3] = now
+                writer.submit(HIT_SQL, (now, command_key, model))
+                self.hits += 1
+                return dict(parsed), similarity
+            self.misses += 1
+            return None
+
+    def store(self, conn, command_text: str, vector, model: str, parsed: dict, dtype: str = DEFAULT_DTYPE,
+              writer=None):
+        """Remember a model parse for future paraphrases."""
+        if parsed.get("action", "unknown") == "unknown":
+            return
+        writer = writer or get_writer()
+        with self._lock:
+            self._load(conn, model)
+            now = time.time()
+            command_key = normalize_command(command_text)
+            writer.submit(STORE_SQL, (command_key, command_text, model, encode_embedding(vector, dtype),
+                                      len(vector), dtype, json.dumps(parsed), now, now))
+            self._remember(command_key, vector, dict(parsed), now, now)
+            if len(self._entries) > self.max_entries:
+                self.evict(writer)
+
+    def evict(self, writer=None):
+        """Drop expired rows, then the least recently used beyond max_entries."""
+        writer = writer or get_writer()
+        cutoff = time.time() - self.ttl_seconds
+        writer.submit(EXPIRE_SQL, (cutoff,))  # covers rows of other models too
+        expired = [handle for handle, entry in self._entries.items() if entry[2] < cutoff]
+        self._forget(writer, expired, delete=False)
+        excess = len(self._entries) - self.max_entries
+        if excess > 0:
+            oldest = sorted(self._entries, key=lambda handle: self._entries[handle][3])[:excess]
+            self._forget(writer, oldest)
+
+    def _forget(self, writer, handles, delete: bool = True):
+        for handle in handles:
+            command_key = self._entries.pop(handle)[0]
+            del self._handles[command_key]
+            self._matrix.remove(handle)
+            if delete:
+                writer.submit(FORGET_SQL, (command_key, self._model))
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_intent_cache(conn):
+    """Process-wide semantic intent cache for the connection's database."""
+    with _caches_lock:
+        return _caches.setdefault(database_file(conn), SemanticIntentCache())
+
+_embedder = None
+_embedder_lock = threading.Lock()
+
+def get_intent_embedder():
+    """The process-wide provider for command embeddings, or None when the
+    semantic cache is off (see INTENT_CACHE_EMBEDDINGS)."""
+    global _embedder
+    if INTENT_CACHE_EMBEDDINGS != "openai":
+        return None
+    with _embedder_lock:
+        if _embedder is None:
+            from backend.embedding_providers import OpenAIEmbeddingProvider
+            _embedder = OpenAIEmbeddingProvider(model="text-embedding-3-small", dim=512)
+        return _embedder
+
+def embed_command(provider, command_text: str):
+    """Embed a command with the provider, memoized in the process-wide query LRU."""
+    model, dim = provider.model, provider.dim
+    vector = query_embedding_cache.get(command_text, model, dim)
+    if vector is None:
+        vector = provider.embed_batch([command_text])[0]
+        query_embedding_cache.put(command_text, model, dim, vector)
+    return vector
+
+def command_parse_stats(conn):
+    """How recorded commands were parsed, and the semantic cache's hit rate against the model."""
+    cur = conn.cursor()
+    cur.execute("SELECT parse_source, COUNT(*) FROM user_commands GROUP BY parse_source")
+    counts = {source or "unrecorded": count for source, count in cur.fetchall()}
+    cached, model = counts.get("semantic_cache", 0), counts.get("model", 0)
+    return {
+        "by_source": counts,
+        "semantic_hit_rate": cached / (cached + model) if cached + model else 0.0,
+    }
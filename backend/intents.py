@@ -0,0 +1,291 @@
+import os
+import re
+import json
+import threading
+import unicodedata
+from collections import OrderedDict
+from urllib.parse import quote_plus
+
+def clean_command(text: str):
+    """Command text for slot extraction: NFC, collapsed whitespace, no trailing
+    punctuation, original case kept."""
+    text = unicodedata.normalize("NFC", text)
+    return re.sub(r"\s+", " ", text).strip().rstrip(".!?").strip()
+
+def normalize_command(text: str):
+    """Canonical command text for keyword lookup and caching: clean_command, lowercased."""
+    return clean_command(text).lower()
+
+def tokenize(text: str):
+    return set(re.findall(r"\w+", text))
+
+class Intent:
+    """One command shape: trigger keywords, compiled patterns with named slots,
+    and a builder that turns the matched slots into the parsed command.
+
+    Only intents sharing a keyword with the command are tried, highest priority
+    first, so adding intents does not slow down unrelated commands. Patterns match
+    case-insensitively so slots keep the command's original case.
+    """
+
+    def __init__(self, name: str, keywords, patterns, build, priority: int = 0):
+        self.name = name
+        self.keywords = frozenset(keywords)
+        self.patterns = [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+        self.build = build
+        self.priority = priority
+
+    def match(self, text: str):
+        """Parsed command for cleaned text (see clean_command), or None."""
+        for pattern in self.patterns:
+            found = pattern.search(text)
+            if found:
+                slots = {name: value.strip() for name, value in found.groupdict().items() if value}
+                return self.build(slots)
+        return None
+
+class IntentEngine:
+    """Keyword-indexed intent matcher with an LRU cache of normalized command -> intent.
+
+    The cache remembers which intent (or none) a command resolves to; its slots
+    are re-extracted from each call's own text, so cached parses keep its case.
+    """
+
+    def __init__(self, intents=(), cache_size: int = 1024):
+        self.cache_size = cache_size
+        self._intents = []
+        self._index = {}  # keyword -> [(sort key, intent)]
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        for intent in intents:
+            self.register(intent)
+
+    def __len__(self):
+        return len(self._intents)
+
+    def register(self, intent: Intent):
+        """Add an intent; earlier registrations win ties in priority.
+
+        The index is replaced rather than mutated, so concurrent lookups see
+        either the old or the new one.
+        """
+        with self._lock:
+            entry = ((-intent.priority, len(self._intents)), intent)
+            index = dict(self._index)
+            for keyword in intent.keywords:
+                index[keyword] = index.get(keyword, []) + [entry]
+            self._intents = self._intents + [intent]
+            self._index = index
+            self._cache.clear()
+
+    def candidates(self, text: str):
+        """Intents sharing a keyword with the text, in the order they are tried."""
+        found = {}
+        index = self._index
+        for token in tokenize(text.lower()):
+            for order, intent in index.get(token, ()):
+                found[order] = intent
+        return [found[order] for order in sorted(found)]
+
+    def match(self, text: str):
+        """Parsed command for already-cleaned text, or None (uncached)."""
+        return self._match(text)[1]
+
+    def _match(self, text: str):
+        for intent in self.candidates(text):
+            parsed = intent.match(text)
+            if parsed is not None:
+                return intent, parsed
+        return None, None
+
+    def parse(self, command_text: str):
+        """Parse a command into an action dict; unrecognized commands give action "unknown"."""
+        text = clean_command(command_text)
+        key = text.lower()
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                intent = self._cache[key]
+            else:
+                intent = False
+        if intent is False:
+            intent, parsed = self._match(text)
+            with self._lock:
+                self.misses += 1
+                self._cache[key] = intent
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        else:
+            parsed = intent.match(text) if intent is not None else None
+        if parsed is None:
+            return {"action": "unknown", "description": f"Command not recognized: {command_text}"}
+        return dict(parsed)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "intents": len(self._intents),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+# Apps that "open ..." and navigation targets resolve to: name -> (url, label, keywords)
+APPS = {
+    "gmail": ("https://gmail.com", "Gmail", ["gmail", "email", "inbox"]),
+    "notion": ("https://notion.so", "Notion", ["notion"]),
+    "slack": ("https://slack.com", "Slack", ["slack"]),
+}
+
+def google_url(query: str):
+    return f"https://google.com/search?q={quote_plus(query)}"
+
+def open_app(app: str):
+    url, label, _ = APPS[app]
+    return lambda slots: {"action": "open_app", "app": app, "url": url, "description": f"Opening {label}"}
+
+def search_youtube(slots: dict):
+    query = slots["query"]
+    return {
+        "action": "search_youtube",
+        "query": query,
+        "url": f"https://youtube.com/results?search_query={quote_plus(query)}",
+        "description": f"Searching YouTube for {query}",
+    }
+
+def search_google(slots: dict):
+    query = slots["query"]
+    return {"action": "search_google", "query": query, "url": google_url(query), "description": f"Searching Google for {query}"}
+
+def search_web(slots: dict):
+    query = slots["query"]
+    return {"action": "search_web", "query": query, "url": google_url(query), "description": f"Searching the web for {query}"}
+
+def create_task(slots: dict):
+    title = slots["title"]
+    return {"action": "create_task", "title": title, "description": f"Creating task: {title}"}
+
+def schedule_meeting(slots: dict):
+    attendee = slots.get("attendee")
+    time = re.sub(r"^(?:at|on|for) ", "", slots["time"], flags=re.IGNORECASE) if slots.get("time") else None
+    description = "Scheduling a meeting"
+    if attendee:
+        description += f" with {attendee}"
+    if time:
+        description += f" {'at' if time[0].isdigit() else 'for'} {time}"
+    return {"action": "schedule_meeting", "attendee": attendee, "time": time, "description": description}
+
+def navigate_to(slots: dict):
+    target = slots["target"]
+    if target.lower() in APPS:
+        url = APPS[target.lower()][0]
+    elif re.match(r"https?://", target, re.IGNORECASE):
+        url = target
+    elif re.fullmatch(r"[\w-]+(?:\.[\w-]+)+(?:/\S*)?", target):
+        url = f"https://{target}"
+    else:
+        url = google_url(target)
+    return {"action": "navigate_to", "target": target, "url": url, "description": f"Navigating to {target}"}
+
+SEARCH = r"(?:search|find|look up)"
+
+# The built-in command table (see command_parsing.supported_actions in coral/agent_assistant.yaml)
+INTENTS = [
+    Intent("create_task", ["task", "todo", "remind"], [
+        r"^(?:create|add|make|new)(?: a| an)?(?: new)? (?:task|todo)(?: to| for|:)? (?P<title>.+)$",
+        r"^remind me to (?P<title>.+)$",
+    ], create_task, priority=30),
+    Intent("schedule_meeting", ["meeting", "schedule", "book"], [
+        r"^(?:schedule|book|set up|arrange)(?: a| an)?(?: [\w-]+)? meeting"
+        r"(?: with (?P<attendee>.+?))?"
+        r"(?: (?P<time>(?:at|on|for) .+|today.*|tomorrow.*|tonight.*|next .+))?$",
+    ], schedule_meeting, priority=30),
+    Intent("search_youtube", ["youtube"], [
+        rf"{SEARCH}(?: on)? youtube(?: for)? (?P<query>.+)",
+        r"youtube (?:search )?(?:for )?(?P<query>.+)",
+        rf"{SEARCH}(?: for)? (?P<query>.+?) on youtube$",
+    ], search_youtube, priority=20),
+    Intent("search_google", ["google"], [
+        rf"{SEARCH}(?: on)? google(?: for)? (?P<query>.+)",
+        r"google (?:search )?(?:for )?(?P<query>.+)",
+        rf"{SEARCH}(?: for)? (?P<query>.+?) on google$",
+    ], search_google, priority=20),
+] + [
+    Intent(f"open_{app}", keywords, [rf"\b(?:{'|'.join(keywords)})\b"], open_app(app), priority=15)
+    for app, (_, _, keywords) in APPS.items()
+] + [
+    Intent("navigate_to", ["go", "navigate", "take", "visit", "open"], [
+        r"^(?:go|navigate|take me) to (?P<target>.+)$",
+        r"^(?:open|visit) (?P<target>https?://\S+|[\w-]+(?:\.[\w-]+)+(?:/\S*)?)$",
+    ], navigate_to, priority=10),
+    Intent("search_web", ["search", "find", "look"], [
+        rf"^{SEARCH}(?: the web| online)?(?: for)? (?P<query>.+)$",
+    ], search_web, priority=5),
+]
+
+# Parsed-command fields that carry arguments taken from the command text
+SLOT_KEYS = ("query", "title", "attendee", "time", "target")
+
+MODEL_PROMPT = """You turn a voice command into JSON for a desktop assistant.
+Reply with one object with an "action" key, one of: open_app, search_youtube,
+search_google, search_web, navigate_to, create_task, schedule_meeting, unknown.
+Use slots where they apply: app, url, query, target, title, attendee, time.
+Always include a short "description" of what will happen."""
+
+class ModelCommandParser:
+    """Reasoning-model fallback for commands the intent table does not cover."""
+
+    def __init__(self, client=None, model: str = "gpt-5"):
+        if client is None:
+            from openai import OpenAI
+            from config import settings
+            client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.client = client
+        self.model = model
+
+    def parse(self, command_text: str):
+        """Parsed command; API failures and malformed replies give action "unknown"."""
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "system", "content": MODEL_PROMPT}, {"role": "user", "content": command_text}],
+                response_format={"type": "json_object"},
+            )
+            parsed = json.loads(response.choices[0].message.content)
+        except Exception as e:
+            print(f"❌ Model command parsing failed: {e}")
+            parsed = None
+        if not isinstance(parsed, dict) or not parsed.get("action"):
+            return {"action": "unknown", "description": f"Command not recognized: {command_text}"}
+        return parsed
+
+_model_parser = None
+_model_parser_lock = threading.Lock()
+
+def get_model_parser():
+    """The process-wide model fallback when COMMAND_PARSER=model, else None (table only)."""
+    global _model_parser
+    if os.getenv("COMMAND_PARSER", "table") != "model":
+        return None
+    with _model_parser_lock:
+        if _model_parser is None:
+            _model_parser = ModelCommandParser()
+        return _model_parser
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_engine():
+    """Process-wide engine loaded with the built-in intents."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = IntentEngine(INTENTS)
+        return _engine
+
+def parse_command(command_text: str):
+    """Parse a command with the shared engine."""
+    return get_engine().parse(command_text)
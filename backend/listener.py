@@ -4,23 +4,26 @@ import json
 import asyncio
 from datetime import datetime
 from backend.db import get_connection
+from backend.writer import get_writer
+from utils.helpers import now_with_offset
+
+INSERT_EVENT_SQL = """
+    INSERT INTO events (source, content, metadata, timestamp, ts_epoch, tz_offset)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
 
 class ContextListener:
     def __init__(self):
         self.conn = get_connection()
         self.running = False
+        # Events are group-committed by the shared background writer
+        self.writer = get_writer().start()
         
     def log_event(self, source: str, content: str, metadata: dict = None):
-        """Log an event to the database."""
-        cursor = self.conn.cursor()
+        """Queue an event for the background writer (blocks while its queue is full)."""
         metadata_json = json.dumps(metadata) if metadata else None
-        
-        cursor.execute("""
-            INSERT INTO events (source, content, metadata, timestamp)
-            VALUES (?, ?, ?, ?)
-        """, (source, content, metadata_json, datetime.now()))
-        
-        self.conn.commit()
+        timestamp, ts_epoch, tz_offset = now_with_offset()
+        self.writer.submit(INSERT_EVENT_SQL, (source, content, metadata_json, timestamp, ts_epoch, tz_offset))
         print(f"📝 Logged {source} event: {content[:50]}...")
     
     def simulate_slack_events(self):
@@ -189,16 +192,21 @@ class ContextListener:
                 self.running = False
                 break
     
+    def flush(self):
+        """Wait until every queued event has been committed."""
+        self.writer.flush()
+    
     def stop_listening(self):
-        """Stop the context listening service."""
+        """Stop the context listening service, flushing buffered events first."""
         self.running = False
+        self.flush()
         self.conn.close()
 
 # Legacy function for backward compatibility
 def log_event(event: str):
     listener = ContextListener()
     listener.log_event("Test", event)
-    listener.conn.close()
+    listener.stop_listening()
 
 def main():
     listener = ContextListener()
@@ -1,17 +1,40 @@
 import sqlite3
 import json
+import threading
 import numpy as np
 from datetime import datetime, timedelta
-from backend.db import get_connection
+from backend.db import get_connection, database_file
+from backend.embeddings import encode_embedding, DEFAULT_DTYPE
+from backend.vector_index import load_index, index_path, ThreadCentroidIndex
+from backend.embedding_providers import BatchEmbedder
+from backend.embedding_cache import EmbeddingCache, query_embedding_cache
+from backend.pagination import encode_cursor, decode_cursor
 
 # Note: You'll need to install openai and numpy
 # pip install openai numpy
 
-class ContextOrganizer:
+# Read-side similarity indexes shared by every organizer in the process (one per
+# database and index type), caught up incrementally from the embeddings table
+_shared_indexes = {}
+_shared_indexes_lock = threading.Lock()  # guards the dict only; each index has its own lock
+
+class SharedIndex:
+    """A shared similarity index and the lock serializing its refreshes and searches."""
+
     def __init__(self):
-        self.conn = get_connection()
-        # You'll set your OpenAI API key in config/settings.py
-        # self.openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.index = None  # loaded on first search
+        self.lock = threading.Lock()
+
+class ContextOrganizer:
+    def __init__(self, index_type: str = "exact", provider=None, conn=None):
+        self.conn = conn or get_connection()
+        self.index_type = index_type  # "exact" or "ivf" (see backend/vector_index.py)
+        self._index = None  # loaded lazily from the embeddings table
+        self._thread_index = None  # centroids of active threads, loaded lazily
+        # Defaults to the local hashing provider; pass OpenAIEmbeddingProvider()
+        # once your OpenAI API key is set in config/settings.py
+        self.embedder = BatchEmbedder(provider)
+        self.embedding_cache = EmbeddingCache(self.conn)
     
     def fetch_unprocessed_events(self, limit: int = 50):
         """Fetch unprocessed events from the database."""
@@ -20,144 +43,252 @@ class ContextOrganizer:
             SELECT id, source, content, metadata, timestamp 
             FROM events 
             WHERE processed = FALSE 
-            ORDER BY timestamp ASC 
+            ORDER BY ts_epoch ASC, id ASC 
             LIMIT ?
         """, (limit,))
         return cur.fetchall()
     
     def create_embedding(self, text: str):
-        """Create GPT-5 embedding for text content."""
-        # Placeholder for OpenAI embedding call
-        # In real implementation, you'd call:
-        # response = self.openai_client.embeddings.create(
-        #     model="text-embedding-3-large",
-        #     input=text
-        # )
-        # return response.data[0].embedding
-        
-        # For now, return a mock embedding (you'll replace this)
-        return [0.1] * 1536  # Mock embedding vector
+        """Create an embedding for text content."""
+        return self.create_embeddings([text])[0]
+    
+    def create_embeddings(self, texts: list):
+        """Create embeddings for many texts, only calling the provider for cache misses."""
+        model, dim = self.embedder.model, self.embedder.dim
+        embeddings = self.embedding_cache.get_many(texts, model, dim)
+        missing = {}  # distinct text -> positions still needing an embedding
+        for i, text in enumerate(texts):
+            if i not in embeddings:
+                missing.setdefault(text, []).append(i)
+        if missing:
+            unique_texts = list(missing)
+            vectors = self.embedder.embed(unique_texts)
+            self.embedding_cache.put_many(unique_texts, model, dim, vectors)
+            for text, vector in zip(unique_texts, vectors):
+                for i in missing[text]:
+                    embeddings[i] = vector
+        return [embeddings[i] for i in range(len(texts))]
+    
+    @property
+    def index(self):
+        """In-memory similarity index over all stored embeddings."""
+        if self._index is None:
+            self._index = load_index(self.conn, self.index_type, self.index_path())
+        return self._index
+    
+    def index_path(self):
+        """Where this organizer's database keeps its persisted index."""
+        return index_path(database_file(self.conn), self.index_type)
     
-    def store_embedding(self, event_id: int, embedding: list):
-        """Store embedding in the database."""
+    def save_index(self):
+        """Persist the similarity index next to the database (approximate indexes only)."""
+        if self._index is not None and hasattr(self._index, "save"):
+            self._index.save(self.index_path())
+    
+    def store_embedding(self, event_id: int, embedding: list, dtype: str = DEFAULT_DTYPE):
+        """Store embedding in the database as a binary BLOB."""
         cur = self.conn.cursor()
         cur.execute("""
-            INSERT INTO embeddings (event_id, embedding, model)
-            VALUES (?, ?, ?)
-        """, (event_id, json.dumps(embedding), 'gpt-5'))
+            INSERT INTO embeddings (event_id, embedding, dim, dtype, model)
+            VALUES (?, ?, ?, ?, ?)
+        """, (event_id, encode_embedding(embedding, dtype), len(embedding), dtype, self.embedder.model))
         self.conn.commit()
+        if self._index is not None:
+            self._index.add(event_id, embedding)
+            self._index.watermark = cur.lastrowid
     
-    def find_similar_events(self, event_id: int, threshold: float = 0.8):
-        """Find events similar to the given event using embeddings."""
-        cur = self.conn.cursor()
-        
-        # Get the embedding for the current event
-        cur.execute("SELECT embedding FROM embeddings WHERE event_id = ?", (event_id,))
-        current_embedding = cur.fetchone()
-        
-        if not current_embedding:
+    def embed_query(self, text: str):
+        """Embed query text via the provider, memoized in a process-wide LRU."""
+        model, dim = self.embedder.model, self.embedder.dim
+        vector = query_embedding_cache.get(text, model, dim)
+        if vector is None:
+            vector = self.embedder.embed([text])[0]
+            query_embedding_cache.put(text, model, dim, vector)
+        return vector
+    
+    def search_similar_text(self, text: str, k: int = 10, threshold: float = None):
+        """Events whose embeddings are closest to the text, best first."""
+        vector = self.embed_query(text)
+        key = (database_file(self.conn), self.index_type)
+        with _shared_indexes_lock:
+            shared = _shared_indexes.get(key)
+            if shared is None:
+                shared = _shared_indexes[key] = SharedIndex()
+        with shared.lock:
+            if shared.index is None:
+                shared.index = load_index(self.conn, self.index_type, index_path(*key))
+            else:
+                shared.index.refresh(self.conn)
+            return shared.index.search(vector, k, threshold)
+    
+    def find_similar_events(self, event_id: int, threshold: float = 0.8, k: int = 10):
+        """Find the k events most similar to the given event using embeddings."""
+        vector = self.index.get(event_id)
+        if vector is None:
             return []
-        
-        current_vec = np.array(json.loads(current_embedding[0]))
-        
-        # Get all other embeddings
-        cur.execute("SELECT event_id, embedding FROM embeddings WHERE event_id != ?", (event_id,))
-        all_embeddings = cur.fetchall()
-        
-        similar_events = []
-        for other_event_id, other_embedding in all_embeddings:
-            other_vec = np.array(json.loads(other_embedding))
-            
-            # Calculate cosine similarity
-            similarity = np.dot(current_vec, other_vec) / (np.linalg.norm(current_vec) * np.linalg.norm(other_vec))
-            
-            if similarity > threshold:
-                similar_events.append((other_event_id, similarity))
-        
-        return sorted(similar_events, key=lambda x: x[1], reverse=True)
+        return self.index.search(vector, k, threshold, exclude={event_id})
     
-    def create_thread(self, title: str, description: str = ""):
+    def create_thread(self, title: str, description: str = "", commit: bool = True):
         """Create a new thread for organizing related events."""
         cur = self.conn.cursor()
         cur.execute("""
             INSERT INTO threads (title, description)
             VALUES (?, ?)
         """, (title, description))
-        self.conn.commit()
+        if commit:
+            self.conn.commit()
         return cur.lastrowid
     
+    @property
+    def thread_index(self):
+        """In-memory centroid index over active threads."""
+        if self._thread_index is None:
+            self.rebuild_thread_centroids(only_missing=True)
+            self._thread_index = ThreadCentroidIndex.from_connection(self.conn)
+        return self._thread_index
+    
+    def rebuild_thread_centroids(self, only_missing: bool = False):
+        """Recompute thread centroids from their members' stored embeddings."""
+        cur = self.conn.cursor()
+        cur.execute("SELECT id FROM threads{}".format(" WHERE centroid IS NULL" if only_missing else ""))
+        thread_ids = [row[0] for row in cur.fetchall()]
+        updates = []
+        for thread_id in thread_ids:
+            cur.execute("SELECT event_id FROM thread_events WHERE thread_id = ?", (thread_id,))
+            vectors = [self.index.get(row[0]) for row in cur.fetchall()]
+            vectors = [vector for vector in vectors if vector is not None]
+            if vectors:
+                mean = np.mean(vectors, axis=0)
+                updates.append((encode_embedding(mean), len(vectors), thread_id))
+        cur.executemany("UPDATE threads SET centroid = ?, member_count = ? WHERE id = ?", updates)
+        self.conn.commit()
+        self._thread_index = None
+        return len(updates)
+    
     def add_event_to_thread(self, thread_id: int, event_id: int):
-        """Add an event to a thread."""
+        """Add an event to a thread and fold its embedding into the thread centroid."""
         cur = self.conn.cursor()
         try:
             cur.execute("""
                 INSERT INTO thread_events (thread_id, event_id)
                 VALUES (?, ?)
             """, (thread_id, event_id))
-            self.conn.commit()
-            return True
         except sqlite3.IntegrityError:
             # Event already in thread
             return False
-    
-    def organize_events_into_threads(self):
-        """Main function to organize events into intelligent threads."""
-        print("🧠 Starting intelligent event organization...")
         
-        # Get unprocessed events
-        events = self.fetch_unprocessed_events()
-        print(f"📥 Found {len(events)} unprocessed events")
+        vector = self.index.get(event_id)
+        if vector is not None and self.is_thread_active(thread_id):
+            mean, count = self.thread_index.add_member(thread_id, vector)
+            cur.execute("""
+                UPDATE threads SET centroid = ?, member_count = ?
+                WHERE id = ?
+            """, (encode_embedding(mean), count, thread_id))
+        self.conn.commit()
+        return True
+    
+    def set_thread_status(self, thread_id: int, status: str):
+        """Change a thread's status; only active threads take new events."""
+        cur = self.conn.cursor()
+        cur.execute("UPDATE threads SET status = ? WHERE id = ?", (status, thread_id))
+        self.conn.commit()
+        if status == 'active':
+            self._thread_index = None  # reload so the thread's centroid is back in play
+        elif self._thread_index is not None:
+            self._thread_index.remove(thread_id)
+    
+    def is_thread_active(self, thread_id: int):
+        """True if the thread can still take new events."""
+        if thread_id in self.thread_index:
+            return True
+        cur = self.conn.cursor()
+        cur.execute("SELECT status FROM threads WHERE id = ?", (thread_id,))
+        row = cur.fetchone()
+        return bool(row) and row[0] == 'active'
+    
+    def organize_batch(self, events: list, threshold: float = 0.8):
+        """Embed, thread and mark one batch of events inside a single transaction.
         
-        for event in events:
-            event_id, source, content, metadata, timestamp = event
-            
-            # Create embedding for this event
-            embedding = self.create_embedding(content)
-            self.store_embedding(event_id, embedding)
-            
-            # Find similar events
-            similar_events = self.find_similar_events(event_id)
-            
-            if similar_events:
-                # Check if any similar events are already in threads
+        Nothing is committed unless the whole batch succeeds, so a failed batch
+        leaves its events unprocessed and the next run simply picks them up again.
+        """
+        if not events:
+            return 0
+        event_ids = [event[0] for event in events]
+        # Provider calls (and their cache writes) happen before the transaction opens
+        embeddings = self.create_embeddings([event[2] for event in events])
+        model = self.embedder.model
+        # Loading the centroids may backfill missing ones and commit, so do it
+        # before the batch transaction opens
+        self.thread_index
+
+        try:
+            with self.conn:
                 cur = self.conn.cursor()
-                cur.execute("""
-                    SELECT DISTINCT thread_id FROM thread_events 
-                    WHERE event_id IN ({})
-                """.format(','.join('?' * len(similar_events))), 
-                [event[0] for event in similar_events])
+                placeholders = ','.join('?' * len(event_ids))
+                # Drop embeddings left behind by an interrupted pre-batching run
+                cur.execute(f"DELETE FROM embeddings WHERE event_id IN ({placeholders})", event_ids)
+                cur.executemany("""
+                    INSERT INTO embeddings (event_id, embedding, dim, dtype, model)
+                    VALUES (?, ?, ?, ?, ?)
+                """, [(event_id, encode_embedding(embedding), len(embedding), DEFAULT_DTYPE, model)
+                      for event_id, embedding in zip(event_ids, embeddings)])
+                self.index.add_many(event_ids, embeddings)
+                cur.execute("SELECT MAX(id) FROM embeddings")
+                self.index.watermark = cur.fetchone()[0]
                 
-                existing_threads = [row[0] for row in cur.fetchall()]
-                
-                if existing_threads:
-                    # Add to existing thread
-                    thread_id = existing_threads[0]
-                    self.add_event_to_thread(thread_id, event_id)
-                    print(f"📎 Added event {event_id} to existing thread {thread_id}")
-                else:
-                    # Create new thread
-                    thread_title = f"Thread: {source} - {content[:50]}..."
-                    thread_id = self.create_thread(thread_title, f"Auto-generated thread for {source} events")
-                    
-                    # Add current event and similar events to thread
-                    self.add_event_to_thread(thread_id, event_id)
-                    for similar_event_id, _ in similar_events[:3]:  # Limit to top 3 similar
-                        self.add_event_to_thread(thread_id, similar_event_id)
+                memberships = []
+                centroids = {}  # thread_id -> (mean, count) after this batch
+                for event, embedding in zip(events, embeddings):
+                    event_id, source, content, metadata, timestamp = event
                     
-                    print(f"🆕 Created new thread {thread_id}: {thread_title}")
-            else:
-                # Create individual thread for unique event
-                thread_title = f"Individual: {source} - {content[:50]}..."
-                thread_id = self.create_thread(thread_title, f"Individual event from {source}")
-                self.add_event_to_thread(thread_id, event_id)
-                print(f"🔹 Created individual thread {thread_id} for event {event_id}")
-            
-            # Mark event as processed
-            cur = self.conn.cursor()
-            cur.execute("UPDATE events SET processed = TRUE WHERE id = ?", (event_id,))
-            self.conn.commit()
+                    # One comparison against the active thread centroids
+                    match = self.thread_index.assign(embedding, threshold)
+                    if match:
+                        thread_id = match[0]
+                        print(f"📎 Added event {event_id} to existing thread {thread_id}")
+                    else:
+                        thread_title = f"Thread: {source} - {content[:50]}..."
+                        thread_id = self.create_thread(
+                            thread_title, f"Auto-generated thread for {source} events", commit=False
+                        )
+                        print(f"🆕 Created new thread {thread_id}: {thread_title}")
+                    memberships.append((thread_id, event_id))
+                    centroids[thread_id] = self.thread_index.add_member(thread_id, embedding)
+                
+                cur.executemany("""
+                    INSERT OR IGNORE INTO thread_events (thread_id, event_id)
+                    VALUES (?, ?)
+                """, memberships)
+                cur.executemany("""
+                    UPDATE threads SET centroid = ?, member_count = ?
+                    WHERE id = ?
+                """, [(encode_embedding(mean), count, thread_id)
+                      for thread_id, (mean, count) in centroids.items()])
+                cur.executemany("UPDATE events SET processed = TRUE WHERE id = ?",
+                                [(event_id,) for event_id in event_ids])
+        except Exception:
+            # The transaction rolled back; reload in-memory state from the database
+            self._index = None
+            self._thread_index = None
+            raise
+        return len(events)
+    
+    def organize_events_into_threads(self, threshold: float = 0.8, batch_size: int = 50):
+        """Main function to organize events into intelligent threads, one transaction per batch."""
+        print("🧠 Starting intelligent event organization...")
+        
+        total = 0
+        while True:
+            events = self.fetch_unprocessed_events(batch_size)
+            if not events:
+                break
+            print(f"📥 Processing batch of {len(events)} unprocessed events")
+            total += self.organize_batch(events, threshold)
         
-        print("✅ Event organization complete!")
+        self.save_index()
+        print(f"✅ Event organization complete! ({total} events)")
+        return total
     
     def get_thread_summary(self, thread_id: int):
         """Get a summary of events in a thread."""
@@ -167,7 +298,7 @@ class ContextOrganizer:
             FROM events e
             JOIN thread_events te ON e.id = te.event_id
             WHERE te.thread_id = ?
-            ORDER BY e.timestamp
+            ORDER BY e.ts_epoch, e.id
         """, (thread_id,))
         
         events = cur.fetchall()
@@ -178,22 +309,96 @@ class ContextOrganizer:
             'events': events
         }
     
+    def get_thread(self, thread_id: int):
+        """Get one thread with its full, time-ordered event list (or None)."""
+        cur = self.conn.cursor()
+        cur.execute("""
+            SELECT id, title, description, created_at, updated_at, status
+            FROM threads WHERE id = ?
+        """, (thread_id,))
+        row = cur.fetchone()
+        if not row:
+            return None
+        thread_id, title, description, created_at, updated_at, status = row
+        return {
+            'id': thread_id,
+            'title': title,
+            'description': description,
+            'created_at': created_at,
+            'updated_at': updated_at,
+            'status': status,
+            'summary': self.get_thread_summary(thread_id)
+        }
+    
+    def list_threads(self, limit: int = 20, cursor: str = None):
+        """One page of threads, most recently updated first, with their stats.
+        
+        Pages are keyed on (updated_at, id) and the stats are kept up to date by
+        triggers on thread_events, so a page is one index range scan no matter
+        how deep the client has paged. Event lists are not included; fetch them
+        per thread with get_thread().
+        """
+        where, params = "", [limit]
+        if cursor:
+            where, params = "WHERE (updated_at, id) < (?, ?)", decode_cursor(cursor, 2) + params
+        cur = self.conn.cursor()
+        cur.execute(f"""
+            SELECT id, title, description, created_at, updated_at, status,
+                   event_count, sources, first_event_at, last_event_at
+            FROM threads
+            {where}
+            ORDER BY updated_at DESC, id DESC
+            LIMIT ?
+        """, params)
+        
+        threads = []
+        for row in cur.fetchall():
+            thread_id, title, description, created_at, updated_at, status, count, sources, first, last = row
+            threads.append({
+                'id': thread_id,
+                'title': title,
+                'description': description,
+                'created_at': created_at,
+                'updated_at': updated_at,
+                'status': status,
+                'event_count': count,
+                'sources': sources.split(',') if sources else [],
+                'first_event_at': first,
+                'last_event_at': last
+            })
+        next_cursor = None
+        if len(threads) == limit:
+            next_cursor = encode_cursor([threads[-1]['updated_at'], threads[-1]['id']])
+        return {'threads': threads, 'next_cursor': next_cursor}
+    
     def get_all_threads(self):
-        """Get all threads with their summaries."""
+        """Get all threads with their summaries (two queries in total)."""
         cur = self.conn.cursor()
-        cur.execute("SELECT id, title, description, created_at FROM threads ORDER BY updated_at DESC")
-        threads = cur.fetchall()
+        cur.execute("""
+            SELECT te.thread_id, e.source, e.content, e.timestamp
+            FROM thread_events te
+            JOIN events e ON e.id = te.event_id
+            ORDER BY te.thread_id, e.ts_epoch, e.id
+        """)
+        events_by_thread = {}
+        for thread_id, source, content, timestamp in cur.fetchall():
+            events_by_thread.setdefault(thread_id, []).append((source, content, timestamp))
         
+        cur.execute("SELECT id, title, description, created_at FROM threads ORDER BY updated_at DESC")
         thread_summaries = []
-        for thread in threads:
-            thread_id, title, description, created_at = thread
-            summary = self.get_thread_summary(thread_id)
+        for thread_id, title, description, created_at in cur.fetchall():
+            events = events_by_thread.get(thread_id, [])
             thread_summaries.append({
                 'id': thread_id,
                 'title': title,
                 'description': description,
                 'created_at': created_at,
-                'summary': summary
+                'summary': {
+                    'thread_id': thread_id,
+                    'event_count': len(events),
+                    'sources': list(set([event[0] for event in events])),
+                    'events': events
+                }
             })
         
         return thread_summaries
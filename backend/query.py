@@ -1,14 +1,20 @@
-import sqlite3
+import os
+import sys
 
-DB_NAME = "context.db"
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.db import get_connection, iter_rows
 
 def get_all_events():
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
-    cur.execute("SELECT id, source, content, timestamp FROM events ORDER BY timestamp DESC")
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+    """Stream every event, newest first, without materializing the table."""
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT id, source, content, timestamp FROM events ORDER BY ts_epoch DESC, id DESC")
+        yield from iter_rows(cur)
+    finally:
+        conn.close()
 
 if __name__ == "__main__":
     events = get_all_events()
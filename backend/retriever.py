@@ -1,14 +1,71 @@
-import sqlite3
+import os
+import sys
 
-def get_events():
-    conn = sqlite3.connect("context.db")
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.db import get_connection, iter_rows
+from backend.pagination import encode_cursor, decode_cursor
+from utils.helpers import to_epoch
+
+EVENT_FIELDS = ("id", "source", "content", "metadata", "timestamp", "ts_epoch", "processed")
+
+def fetch_event_page(conn, limit: int = 10, cursor: str = None, source: str = None,
+                     since: str = None, until: str = None, processed: bool = None, fields: list = None):
+    """One page of events, newest first, keyed on (ts_epoch, id).
+    
+    `since`/`until` are ISO-8601 strings (naive values are local time). `fields`
+    projects the columns returned (id and ts_epoch are always included because
+    the cursor is built from them), so clients can skip content/metadata.
+    """
+    fields = list(fields or EVENT_FIELDS)
+    unknown = set(fields) - set(EVENT_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown event fields: {', '.join(sorted(unknown))}")
+    columns = [f for f in EVENT_FIELDS if f in fields or f in ("id", "ts_epoch")]
+    
+    conditions, params = [], []
+    if source:
+        conditions.append("source = ?")
+        params.append(source)
+    if processed is not None:
+        conditions.append("processed = ?")
+        params.append(bool(processed))
+    if since:
+        conditions.append("ts_epoch >= ?")
+        params.append(to_epoch(since))
+    if until:
+        conditions.append("ts_epoch < ?")
+        params.append(to_epoch(until))
+    if cursor:
+        conditions.append("(ts_epoch, id) < (?, ?)")
+        params.extend(decode_cursor(cursor, 2))
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    
     cur = conn.cursor()
-    cur.execute("SELECT source, content, timestamp FROM events ORDER BY timestamp DESC")
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+    cur.execute(f"""
+        SELECT {', '.join(columns)} FROM events
+        {where}
+        ORDER BY ts_epoch DESC, id DESC
+        LIMIT ?
+    """, params + [limit])
+    events = [dict(zip(columns, row)) for row in cur.fetchall()]
+    next_cursor = None
+    if len(events) == limit:
+        next_cursor = encode_cursor([events[-1]["ts_epoch"], events[-1]["id"]])
+    return {"events": events, "next_cursor": next_cursor}
+
+def get_events():
+    """Stream (source, content, timestamp) rows, newest first."""
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT source, content, timestamp FROM events ORDER BY ts_epoch DESC, id DESC")
+        yield from iter_rows(cur)
+    finally:
+        conn.close()
 
 if __name__ == "__main__":
     events = get_events()
     for e in events:
-        print(e)
\ No newline at end of file
+        print(e)
@@ -0,0 +1,160 @@
+import os
+import threading
+from datetime import datetime, timedelta
+from backend import db
+from backend.assistant import ContextAssistant
+import yaml
+from backend.tts import cached_audio
+
+AGENT_CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "coral", "agent_assistant.yaml")
+
+# briefing_types names in the agent config -> briefing kinds in backend/assistant.py
+BRIEFING_NAMES = {"yesterday_recap": "yesterday", "today_plan": "today"}
+DEFAULT_SCHEDULE = {"yesterday": "09:00", "today": "09:05"}
+
+# How far ahead of its configured time a briefing is prepared, and how long
+# ingestion must be idle before briefings are refreshed
+BRIEFING_LEAD_MINUTES = float(os.getenv("BRIEFING_LEAD_MINUTES", 5))
+BRIEFING_QUIET_SECONDS = float(os.getenv("BRIEFING_QUIET_SECONDS", 120))
+
+def load_schedule(path: str = AGENT_CONFIG):
+    """{kind: "HH:MM"} from the agent config's briefing_types."""
+    if not os.path.exists(path):
+        return dict(DEFAULT_SCHEDULE)
+    with open(path) as f:
+        config = yaml.safe_load(f) or {}
+    schedule = {}
+    for entry in config.get("agent", {}).get("briefing_types", []):
+        kind = BRIEFING_NAMES.get(entry.get("name"))
+        at = entry.get("time")
+        if isinstance(at, int):  # YAML 1.1 reads an unquoted 17:45 as base-60 minutes
+            at = f"{at // 60:02d}:{at % 60:02d}"
+        if kind and at:
+            schedule[kind] = str(at)
+    return schedule or dict(DEFAULT_SCHEDULE)
+
+def next_run(now: datetime, at: str, lead: timedelta):
+    """Next moment `lead` before the daily HH:MM time `at`, strictly after now."""
+    hour, minute = (int(part) for part in at.split(":"))
+    run = now.replace(hour=hour, minute=minute, second=0, microsecond=0) - lead
+    while run <= now:
+        run += timedelta(days=1)
+    return run
+
+class BriefingScheduler:
+    """Pre-generates briefings and their audio so /briefing/* serves cached artifacts.
+
+    Each briefing is prepared `lead_minutes` before its configured time, and all of
+    them once ingestion has been quiet for `quiet_seconds` after new events arrived.
+    Preparing an unchanged briefing is just the watermark check in get_briefing
+    plus an audio cache lookup. Connections come from the ConnectionManager: the
+    shared writer only while briefings are refreshed, never during synthesis.
+    """
+
+    def __init__(self, schedule: dict = None, lead_minutes: float = BRIEFING_LEAD_MINUTES,
+                 quiet_seconds: float = BRIEFING_QUIET_SECONDS, poll_interval: float = 30, manager=None):
+        self.schedule = schedule or load_schedule()
+        self.manager = manager
+        self.lead = timedelta(minutes=lead_minutes)
+        self.quiet = timedelta(seconds=quiet_seconds)
+        self.poll_interval = poll_interval
+        self.prepared = 0
+        self.last_error = None
+        self._due = {}
+        self._last_event_id = None
+        self._changed_at = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the scheduler thread (idempotent)."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="briefing-scheduler", daemon=True)
+                self._thread.start()
+        return self
+
+    def close(self):
+        """Stop the scheduler thread."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def prepare(self, conn, kinds):
+        """Bring the given briefings up to date and make sure their audio is cached."""
+        self.synthesize(self.refresh(conn, kinds))
+
+    def refresh(self, conn, kinds):
+        """Bring the given briefings up to date; returns their texts."""
+        assistant = ContextAssistant(conn)
+        texts = []
+        for kind in kinds:
+            text, changed = assistant.get_briefing(kind)
+            texts.append(text)
+            self.prepared += changed
+        return texts
+
+    def synthesize(self, texts):
+        """Cache each text's audio (a cache hit unless the text changed or was evicted)."""
+        for text in texts:
+            cached_audio(text)
+
+    def run_pending(self, conn, now: datetime = None):
+        """Prepare whatever is due at `now`; returns the kinds that were run."""
+        due = self.due(conn, now)
+        if due:
+            self.prepare(conn, due)
+        return due
+
+    def due(self, conn, now: datetime = None):
+        """Kinds due at `now`: scheduled ones, or all of them once ingestion went quiet."""
+        now = now or datetime.now()
+        due = []
+        for kind, at in self.schedule.items():
+            if kind not in self._due:
+                self._due[kind] = next_run(now, at, self.lead)
+            elif now >= self._due[kind]:
+                due.append(kind)
+                self._due[kind] = next_run(now, at, self.lead)
+
+        latest = conn.execute("SELECT MAX(id) FROM events").fetchone()[0] or 0
+        if self._last_event_id is not None and latest != self._last_event_id:
+            self._changed_at = now
+        self._last_event_id = latest
+        if self._changed_at is not None and now - self._changed_at >= self.quiet:
+            due = list(self.schedule)
+            self._changed_at = None
+        return due
+
+    def _tick(self, kinds: list = None):
+        manager = self.manager or db.get_manager()
+        if kinds is None:
+            with manager.reader() as conn:
+                kinds = self.due(conn)
+        if kinds:
+            with manager.writer() as conn:
+                texts = self.refresh(conn, kinds)
+            self.synthesize(texts)
+
+    def _run(self):
+        # Warm the cache at startup, then follow the schedule
+        self._guarded(self._tick, list(self.schedule))
+        while not self._stop.wait(self._timeout()):
+            self._guarded(self._tick)
+
+    def _timeout(self):
+        if not self._due:
+            return self.poll_interval
+        until_due = (min(self._due.values()) - datetime.now()).total_seconds()
+        return max(0.0, min(self.poll_interval, until_due))
+
+    def _guarded(self, fn, *args):
+        try:
+            fn(*args)
+        except Exception as e:
+            self.last_error = e
+            print(f"❌ Briefing pre-generation failed: {e}")
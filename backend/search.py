@@ -0,0 +1,119 @@
+import re
+from utils.helpers import to_epoch
+from backend.organizer import ContextOrganizer
+
+# Reciprocal rank fusion damping constant (Cormack et al.); 60 is the usual choice
+RRF_K = 60
+
+def to_fts_query(text: str, match_any: bool = False):
+    """Turn free text into a safe FTS5 query: every word quoted, all required
+    (or any of them with match_any)."""
+    words = re.findall(r"\w+", text.lower())
+    return (" OR " if match_any else " ").join(f'"{word}"' for word in words)
+
+def _time_filters(conditions: list, params: list, source: str, since: str, until: str):
+    if source:
+        conditions.append("e.source = ?")
+        params.append(source)
+    if since:
+        conditions.append("e.ts_epoch >= ?")
+        params.append(to_epoch(since))
+    if until:
+        conditions.append("e.ts_epoch < ?")
+        params.append(to_epoch(until))
+
+def search_events(conn, query: str, source: str = None, since: str = None, until: str = None,
+                  limit: int = 20, match_any: bool = False):
+    """BM25-ranked full-text search over event content, best match first."""
+    fts_query = to_fts_query(query, match_any)
+    if not fts_query:
+        return []
+    conditions, params = ["events_fts MATCH ?"], [fts_query]
+    _time_filters(conditions, params, source, since, until)
+    
+    cur = conn.cursor()
+    cur.execute(f"""
+        SELECT e.id, e.source, e.ts_epoch,
+               snippet(events_fts, 0, '[', ']', '…', 12),
+               bm25(events_fts) AS score
+        FROM events_fts
+        JOIN events e ON e.id = events_fts.rowid
+        WHERE {' AND '.join(conditions)}
+        ORDER BY score
+        LIMIT ?
+    """, params + [limit])
+    return [
+        {"id": event_id, "source": source, "ts_epoch": ts_epoch, "snippet": snippet, "score": -score}
+        for event_id, source, ts_epoch, snippet, score in cur.fetchall()
+    ]
+
+def _filtered_semantic_hits(conn, organizer, query: str, candidates: int, source: str = None,
+                            since: str = None, until: str = None):
+    """Top `candidates` embedding hits that pass the source/time filters.
+
+    The similarity index is unfiltered, so with filters it over-fetches (4x per
+    round) until enough hits pass or the index has nothing more to return.
+    """
+    if not (source or since or until):
+        return organizer.search_similar_text(query, k=candidates)
+    fetch = candidates
+    while True:
+        hits = organizer.search_similar_text(query, k=fetch)
+        if not hits:
+            return []
+        ids = [event_id for event_id, _ in hits]
+        conditions, params = [f"e.id IN ({','.join('?' * len(ids))})"], list(ids)
+        _time_filters(conditions, params, source, since, until)
+        cur = conn.cursor()
+        cur.execute(f"SELECT e.id FROM events e WHERE {' AND '.join(conditions)}", params)
+        allowed = {row[0] for row in cur.fetchall()}
+        kept = [(event_id, score) for event_id, score in hits if event_id in allowed]
+        if len(kept) >= candidates or len(hits) < fetch:
+            return kept[:candidates]
+        fetch *= 4
+
+def hybrid_search(conn, query: str, k: int = 10, candidates: int = 50, source: str = None,
+                  since: str = None, until: str = None, organizer=None):
+    """Fuse BM25 and embedding-similarity rankings with reciprocal rank fusion.
+
+    Each side contributes its top `candidates` events that pass the filters; an
+    event scores sum(1 / (RRF_K + rank)) over the rankings it appears in, so
+    events both retrievers agree on rise to the top without calibrating BM25
+    against cosine.
+    """
+    if not query.strip():
+        return []
+    organizer = organizer or ContextOrganizer(conn=conn)
+
+    lexical = search_events(conn, query, source, since, until, candidates, match_any=True)
+    semantic = _filtered_semantic_hits(conn, organizer, query, candidates, source, since, until)
+
+    fused = {}
+    for rank, hit in enumerate(lexical, 1):
+        fused[hit["id"]] = fused.get(hit["id"], 0.0) + 1.0 / (RRF_K + rank)
+    similarity = dict(semantic)
+    for rank, (event_id, _) in enumerate(semantic, 1):
+        fused[event_id] = fused.get(event_id, 0.0) + 1.0 / (RRF_K + rank)
+    if not fused:
+        return []
+    snippets = {hit["id"]: hit["snippet"] for hit in lexical}
+
+    ids = list(fused)
+    cur = conn.cursor()
+    cur.execute(f"""
+        SELECT e.id, e.source, e.content, e.ts_epoch FROM events e
+        WHERE e.id IN ({','.join('?' * len(ids))})
+    """, ids)
+    results = [
+        {
+            "id": event_id,
+            "source": event_source,
+            "ts_epoch": ts_epoch,
+            "snippet": snippets.get(event_id) or content[:120],
+            "score": fused[event_id],
+            "similarity": similarity.get(event_id),
+        }
+        for event_id, event_source, content, ts_epoch in cur.fetchall()
+    ]
+    results.sort(key=lambda hit: (-hit["score"], hit["id"]))
+    return results[:k]
@@ -1,18 +1,50 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from pydantic import BaseModel
 import uvicorn
+from contextlib import asynccontextmanager
+from datetime import date
+import asyncio
 import os
+import re
 import sys
 
 # Add the project root to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from backend.assistant import get_yesterday_recap, get_today_plan, process_command, get_system_status
+from backend.assistant import ContextAssistant, BRIEFINGS, deliver_briefing, process_command, get_system_status
+from backend.tts import get_tts
+from backend.intent_cache import command_parse_stats, get_intent_cache
+from backend.organizer import ContextOrganizer
+from backend.async_db import AsyncDatabase
+from backend.pagination import InvalidCursor
+from backend.retriever import fetch_event_page
+from backend.search import search_events, hybrid_search
+from backend.scheduler import BriefingScheduler
+from backend.writer import get_writer, close_writer
 
-app = FastAPI(title="Context Catcher API", version="1.0.0")
+# All database work goes through here so it runs off the event loop
+database = AsyncDatabase()
+
+# Pre-generates briefings ahead of their configured times (BRIEFING_SCHEDULER=0 disables)
+scheduler = BriefingScheduler()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the background writer and briefing scheduler; on shutdown stop the
+    scheduler, commit queued writes (command audit rows, intent cache bookkeeping)
+    and release pooled connections."""
+    get_writer().start()
+    if os.getenv("BRIEFING_SCHEDULER", "1") != "0":
+        scheduler.start()
+    yield
+    scheduler.close()
+    close_writer()
+    database.close()
+
+app = FastAPI(title="Context Catcher API", version="1.0.0", lifespan=lifespan)
 
 # Enable CORS for frontend
 app.add_middleware(
@@ -43,15 +75,29 @@ async def health_check():
 async def get_status():
     """Get system status."""
     try:
-        return get_system_status()
+        return await database.read(get_system_status)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def refresh_briefing(conn, briefing_type: str):
+    """(text, changed) of a named briefing, brought up to date under the writer."""
+    return ContextAssistant(conn).refresh_briefing(briefing_type)
+
+def refresh_period(conn, start: str, end: str):
+    """(text, changed) of a custom date range recap (ISO dates, inclusive)."""
+    return ContextAssistant(conn).get_period_briefing(date.fromisoformat(start), date.fromisoformat(end))
+
+async def deliver(briefing_type: str, refreshed):
+    """Synthesize after the writer is released, as BriefingScheduler does, so a
+    TTS call never holds up other writes."""
+    text, changed = refreshed
+    return await asyncio.to_thread(deliver_briefing, briefing_type, text, changed)
+
 @app.get("/briefing/yesterday")
 async def yesterday_briefing():
     """Get yesterday's recap briefing."""
     try:
-        return get_yesterday_recap()
+        return await deliver("yesterday", await database.write(refresh_briefing, "yesterday"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -59,47 +105,182 @@ async def yesterday_briefing():
 async def today_briefing():
     """Get today's plan briefing."""
     try:
-        return get_today_plan()
+        return await deliver("today", await database.write(refresh_briefing, "today"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/briefing/weekly")
+async def weekly_briefing():
+    """Get the recap of the past seven days, built from the daily rollups."""
+    try:
+        return await deliver("weekly", await database.write(refresh_briefing, "weekly"))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/briefing/range")
+async def range_briefing(start: str, end: str):
+    """Get a recap of a custom date range (YYYY-MM-DD, inclusive)."""
+    try:
+        return await deliver("custom", await database.write(refresh_period, start, end))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/briefing/{briefing_type}/stream")
+async def stream_briefing(briefing_type: str):
+    """Stream a briefing's audio, synthesized sentence by sentence on a cache miss."""
+    if briefing_type not in BRIEFINGS and briefing_type != "weekly":
+        raise HTTPException(status_code=404, detail=f"Unknown briefing type: {briefing_type}")
+    try:
+        text, _ = await database.write(refresh_briefing, briefing_type)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    backend, cache = get_tts()
+    return StreamingResponse(cache.stream(text, backend), media_type=backend.media_type)
+
+AUDIO_KEY = re.compile(r"[0-9a-f]{64}")
+
+def parse_range(header: str, size: int):
+    """Inclusive (start, end) for a single `bytes=` range, or None if unsatisfiable."""
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if not first:  # suffix range: the last N bytes
+        length = int(last)
+        return (max(0, size - length), size - 1) if length and size else None
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    return (start, end) if start <= end else None
+
+@app.get("/audio/{key}")
+async def get_audio(key: str, range_header: str = Header(None, alias="Range")):
+    """Serve cached briefing audio by content key, honouring HTTP Range requests."""
+    backend, cache = get_tts()
+    path = cache.get(key) if AUDIO_KEY.fullmatch(key) else None
+    if path is None:
+        raise HTTPException(status_code=404, detail="Audio not found")
+    headers = {"Accept-Ranges": "bytes"}
+    if range_header is None:
+        return FileResponse(path, media_type=backend.media_type, headers=headers)
+    
+    size = os.path.getsize(path)
+    bounds = parse_range(range_header, size)
+    if bounds is None:
+        return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+    start, end = bounds
+    
+    def body(chunk_size: int = 64 * 1024):
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                data = f.read(min(chunk_size, remaining))
+                if not data:
+                    break
+                remaining -= len(data)
+                yield data
+    
+    headers.update({"Content-Range": f"bytes {start}-{end}/{size}", "Content-Length": str(end - start + 1)})
+    return StreamingResponse(body(), status_code=206, media_type=backend.media_type, headers=headers)
+
 @app.post("/command")
 async def execute_command(request: CommandRequest):
-    """Process and execute a voice command."""
+    """Process and execute a voice command.
+    
+    Runs on a read-only connection: parsing, the model call and the browser
+    never hold the writer, and the audit row and intent cache writes are queued
+    on the background writer.
+    """
     try:
-        return process_command(request.command)
+        return await database.read(lambda conn: process_command(request.command, conn))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/commands/stats")
+async def get_command_stats():
+    """How commands were parsed (intent table, semantic cache, model) and cache hit rates."""
+    try:
+        return await database.read(
+            lambda conn: {**command_parse_stats(conn), "semantic_cache": get_intent_cache(conn).stats()}
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/events")
-async def get_events(limit: int = 10, source: str = None):
-    """Get recent events."""
+async def get_events(limit: int = 10, source: str = None, cursor: str = None, since: str = None,
+                     until: str = None, processed: bool = None, fields: str = None):
+    """Get recent events, newest first, one keyset page at a time.
+    
+    `fields` is a comma-separated projection, e.g. `fields=id,source,ts_epoch`.
+    """
     try:
-        from backend.organizer import ContextOrganizer
-        organizer = ContextOrganizer()
-        
-        # Get events from database
-        cur = organizer.conn.cursor()
-        if source:
-            cur.execute("SELECT * FROM events WHERE source = ? ORDER BY timestamp DESC LIMIT ?", (source, limit))
-        else:
-            cur.execute("SELECT * FROM events ORDER BY timestamp DESC LIMIT ?", (limit,))
-        
-        events = cur.fetchall()
-        return {"events": events, "count": len(events)}
+        page = await database.read(
+            fetch_event_page,
+            limit=min(max(limit, 1), 500),
+            cursor=cursor,
+            source=source,
+            since=since,
+            until=until,
+            processed=processed,
+            fields=fields.split(",") if fields else None,
+        )
+        return {"events": page["events"], "count": len(page["events"]), "next_cursor": page["next_cursor"]}
+    except ValueError as e:  # includes InvalidCursor and bad timestamps/fields
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/search")
+async def search(q: str, source: str = None, since: str = None, until: str = None, limit: int = 20):
+    """Ranked full-text search over event content with highlighted snippets."""
+    try:
+        results = await database.read(
+            search_events, q, source=source, since=since, until=until, limit=min(max(limit, 1), 100)
+        )
+        return {"results": results, "count": len(results)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/context")
+async def get_context(q: str, k: int = 10, source: str = None, since: str = None, until: str = None):
+    """Hybrid lexical + semantic lookup: BM25 and embedding rankings fused."""
+    try:
+        results = await database.read(
+            hybrid_search, q, k=min(max(k, 1), 50), source=source, since=since, until=until
+        )
+        return {"results": results, "count": len(results)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/threads")
-async def get_threads():
-    """Get organized threads."""
+async def get_threads(limit: int = 20, cursor: str = None):
+    """Get one page of organized threads, most recently updated first."""
+    try:
+        page = await database.read(
+            lambda conn: ContextOrganizer(conn=conn).list_threads(min(max(limit, 1), 100), cursor)
+        )
+        return {"threads": page["threads"], "count": len(page["threads"]), "next_cursor": page["next_cursor"]}
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/threads/{thread_id}")
+async def get_thread(thread_id: int):
+    """Get a single thread with its full event list."""
     try:
-        from backend.organizer import ContextOrganizer
-        organizer = ContextOrganizer()
-        threads = organizer.get_all_threads()
-        return {"threads": threads, "count": len(threads)}
+        thread = await database.read(lambda conn: ContextOrganizer(conn=conn).get_thread(thread_id))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if thread is None:
+        raise HTTPException(status_code=404, detail=f"Thread {thread_id} not found")
+    return thread
 
 if __name__ == "__main__":
     # Initialize database
@@ -0,0 +1,201 @@
+import os
+import re
+import hashlib
+import tempfile
+import threading
+from backend.embedding_cache import normalize_content
+
+AUDIO_CACHE_DIR = os.getenv("AUDIO_CACHE_DIR", os.path.join("audio", "cache"))
+AUDIO_CACHE_MAX_MB = float(os.getenv("AUDIO_CACHE_MAX_MB", 500))
+
+def split_sentences(text: str, max_chars: int = 240):
+    """Split text into sentence-aligned chunks of at most ~max_chars for streaming synthesis."""
+    chunks, current = [], ""
+    for sentence in re.split(r"(?<=[.!?])\s+", text.strip()):
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
+
+class TTSBackend:
+    """Base class: turns text into encoded audio bytes.
+
+    `speed` is None for backends that have no speaking-rate setting, so it does
+    not split their cache keys.
+    """
+    model = None
+    voice = None
+    speed = 1.0
+    media_type = "audio/mpeg"
+
+    def synthesize(self, text: str):
+        raise NotImplementedError
+
+    def synthesize_chunks(self, text: str):
+        """Yield audio for each sentence chunk so playback can start early."""
+        for chunk in split_sentences(text):
+            yield self.synthesize(chunk)
+
+class FakeTTSBackend(TTSBackend):
+    """Local, deterministic stand-in: 'audio' is a tagged copy of the text."""
+    model = "fake-tts-v1"
+
+    def __init__(self, voice: str = "Rachel", speed: float = 1.0):
+        self.voice = voice
+        self.speed = speed
+        self.calls = 0
+
+    def synthesize(self, text: str):
+        self.calls += 1
+        return f"[{self.voice}@{self.speed}] {text}\n".encode("utf-8")
+
+class ElevenLabsTTSBackend(TTSBackend):
+    """ElevenLabs text-to-speech; one request per call. generate() takes no speed."""
+    speed = None
+
+    def __init__(self, voice: str = "Rachel", model: str = "eleven_multilingual_v2"):
+        from elevenlabs import generate
+        from config import settings
+        self._generate = generate
+        self.api_key = settings.ELEVENLABS_API_KEY
+        self.voice = voice
+        self.model = model
+
+    def synthesize(self, text: str):
+        audio = self._generate(text=text, voice=self.voice, model=self.model, api_key=self.api_key)
+        return audio if isinstance(audio, bytes) else b"".join(audio)
+
+def get_tts_backend():
+    """TTS backend selected by TTS_BACKEND ("fake" by default, or "elevenlabs")."""
+    if os.getenv("TTS_BACKEND", "fake") == "elevenlabs":
+        return ElevenLabsTTSBackend()
+    return FakeTTSBackend()
+
+class AudioCache:
+    """Content-addressed on-disk audio cache with size-bounded LRU eviction.
+
+    Files are named by sha256(voice, model, speed, normalized text), so identical
+    briefings are synthesized once and never overwrite each other. Audio is always
+    synthesized sentence chunk by chunk (see TTSBackend.synthesize_chunks), so a
+    streamed and a whole-file synthesis store the same bytes under a key. Reads
+    bump the file's mtime, and eviction removes the least recently used files first.
+    """
+
+    def __init__(self, directory: str = AUDIO_CACHE_DIR, max_bytes: int = int(AUDIO_CACHE_MAX_MB * 1024 * 1024)):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._size = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(text: str, backend: TTSBackend):
+        """Cache key for text spoken by the backend's voice/model/speed."""
+        parts = [backend.voice or "", backend.model or ""]
+        if backend.speed is not None:
+            parts.append(f"{backend.speed:g}")
+        material = "\0".join(parts + [normalize_content(text)])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def path(self, key: str):
+        return os.path.join(self.directory, f"{key}.mp3")
+
+    def get(self, key: str):
+        """Path of the cached audio (marked as recently used), or None."""
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def put(self, key: str, data: bytes):
+        """Store audio atomically and evict down to max_bytes."""
+        for _ in self.put_chunks(key, [data]):
+            pass
+        return self.path(key)
+
+    def put_chunks(self, key: str, chunks):
+        """Write audio chunks to a temp file as they arrive (yielding each one), then
+        publish it under its key. Nothing is cached if the iteration is abandoned."""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        written = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    written += len(chunk)
+                    yield chunk
+            path = self.path(key)
+            with self._lock:
+                # Overwriting a key (e.g. a concurrent miss) only adds the difference
+                replaced = os.path.getsize(path) if os.path.exists(path) else 0
+                os.replace(tmp_path, path)
+                if self._size is not None:
+                    self._size += written - replaced
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used files until the cache fits in max_bytes."""
+        with self._lock:
+            if self._size is not None and self._size <= self.max_bytes:
+                return
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".mp3"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            self._size = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if self._size <= self.max_bytes:
+                    break
+                os.remove(path)
+                self._size -= size
+
+    def stream(self, text: str, backend: TTSBackend, chunk_size: int = 64 * 1024):
+        """Yield the text's audio: from disk on a hit, else chunk by chunk as it is
+        synthesized (and cached once complete)."""
+        key = self.key(text, backend)
+        path = self.get(key)
+        if path is None:
+            yield from self.put_chunks(key, backend.synthesize_chunks(text))
+            return
+        with open(path, "rb") as f:
+            while True:
+                data = f.read(chunk_size)
+                if not data:
+                    break
+                yield data
+
+_tts = None
+_audio_cache = None
+
+def get_tts():
+    """Process-wide (backend, audio cache) pair."""
+    global _tts, _audio_cache
+    if _tts is None:
+        _tts, _audio_cache = get_tts_backend(), AudioCache()
+    return _tts, _audio_cache
+
+def cached_audio(text: str):
+    """Path of the text's audio, synthesized only if it is not cached yet."""
+    backend, cache = get_tts()
+    key = cache.key(text, backend)
+    path = cache.get(key)
+    if path is None:
+        for _ in cache.put_chunks(key, backend.synthesize_chunks(text)):
+            pass
+        path = cache.path(key)
+        print(f"🔊 [Voice Audio Generated]: {text[:100]}...")
+    return path
@@ -0,0 +1,400 @@
+import os
+import numpy as np
+from backend.embeddings import decode_embedding, DEFAULT_DTYPE
+
+def normalize(vectors):
+    """Return L2-normalized float32 copies of one or more vectors."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def top_k(scores, k: int, threshold: float = None):
+    """Pick the k best (position, score) pairs from a score vector."""
+    if threshold is not None:
+        candidates = np.flatnonzero(scores > threshold)
+    else:
+        candidates = np.arange(scores.shape[0])
+    if k is not None and candidates.shape[0] > k:
+        best = np.argpartition(scores[candidates], -k)[-k:]
+        candidates = candidates[best]
+    order = np.argsort(scores[candidates])[::-1]
+    return [(int(pos), float(scores[pos])) for pos in candidates[order]]
+
+def load_new_embeddings(index, conn):
+    """Add embedding rows with id > index.watermark to the index; returns how many."""
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT id, event_id, embedding, dim, dtype FROM embeddings
+        WHERE id > ? ORDER BY id
+    """, (index.watermark,))
+    ids, vectors = [], []
+    for row_id, event_id, blob, dim, dtype in cur:
+        ids.append(event_id)
+        vectors.append(decode_embedding(blob, dim, dtype or DEFAULT_DTYPE))
+        index.watermark = row_id
+    if ids:
+        index.add_many(ids, np.vstack(vectors))
+    return len(ids)
+
+class EmbeddingMatrix:
+    """Exact cosine-similarity index over a contiguous, pre-normalized matrix."""
+
+    def __init__(self, dim: int = None, capacity: int = 1024):
+        self.dim = dim
+        self._capacity = capacity
+        self._vectors = None
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._rows = {}  # event_id -> row in self._vectors
+        self._size = 0
+        self.watermark = 0  # highest embeddings.id already indexed
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, event_id):
+        return event_id in self._rows
+
+    @property
+    def ids(self):
+        return self._ids[:self._size]
+
+    @property
+    def vectors(self):
+        if self._vectors is None:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        return self._vectors[:self._size]
+
+    def _reserve(self, extra: int):
+        """Grow the backing arrays (amortized doubling) to fit extra rows."""
+        needed = self._size + extra
+        if self._vectors is None:
+            self._capacity = max(self._capacity, needed)
+            self._vectors = np.zeros((self._capacity, self.dim), dtype=np.float32)
+            self._ids = np.zeros(self._capacity, dtype=np.int64)
+            return
+        if needed <= self._capacity:
+            return
+        while self._capacity < needed:
+            self._capacity *= 2
+        vectors = np.zeros((self._capacity, self.dim), dtype=np.float32)
+        vectors[:self._size] = self._vectors[:self._size]
+        ids = np.zeros(self._capacity, dtype=np.int64)
+        ids[:self._size] = self._ids[:self._size]
+        self._vectors, self._ids = vectors, ids
+
+    def add(self, event_id: int, vector):
+        """Add or replace the vector for an event."""
+        self.add_many([event_id], [vector])
+
+    def add_many(self, event_ids, vectors):
+        """Add or replace vectors for several events at once."""
+        if len(event_ids) == 0:
+            return
+        vectors = normalize(np.atleast_2d(vectors))
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dim vectors, got {vectors.shape[1]}")
+        self._reserve(len(event_ids))
+        for event_id, vector in zip(event_ids, vectors):
+            row = self._rows.get(event_id)
+            if row is None:
+                row = self._size
+                self._rows[event_id] = row
+                self._ids[row] = event_id
+                self._size += 1
+            self._vectors[row] = vector
+
+    def remove(self, event_id: int):
+        """Remove an event, moving the last row into its slot."""
+        row = self._rows.pop(event_id, None)
+        if row is None:
+            return False
+        last = self._size - 1
+        if row != last:
+            self._vectors[row] = self._vectors[last]
+            self._ids[row] = self._ids[last]
+            self._rows[int(self._ids[row])] = row
+        self._size -= 1
+        return True
+
+    def get(self, event_id: int):
+        """Return the normalized vector for an event, or None."""
+        row = self._rows.get(event_id)
+        return None if row is None else self._vectors[row]
+
+    def search(self, vector, k: int = 10, threshold: float = None, exclude=()):
+        """Return up to k (event_id, similarity) pairs, best first."""
+        return self.search_batch([vector], k, threshold, [exclude])[0]
+
+    def search_batch(self, vectors, k: int = 10, threshold: float = None, exclude=None):
+        """Score many query vectors against the corpus with a single matmul."""
+        if self._size == 0:
+            return [[] for _ in range(len(vectors))]
+        queries = normalize(np.atleast_2d(vectors))
+        scores = queries @ self.vectors.T
+        results = []
+        for i in range(scores.shape[0]):
+            excluded = exclude[i] if exclude is not None else ()
+            extra = len(excluded)
+            hits = top_k(scores[i], None if k is None else k + extra, threshold)
+            matches = []
+            for pos, score in hits:
+                event_id = int(self._ids[pos])
+                if event_id in excluded:
+                    continue
+                matches.append((event_id, score))
+            results.append(matches[:k] if k is not None else matches)
+        return results
+
+    def refresh(self, conn):
+        """Add embeddings stored since the last load (rows with id > watermark)."""
+        return load_new_embeddings(self, conn)
+
+    @classmethod
+    def from_connection(cls, conn):
+        """Build the matrix from every stored embedding."""
+        index = cls()
+        index.refresh(conn)
+        return index
+
+def kmeans(vectors, n_clusters: int, iterations: int = 10, seed: int = 0):
+    """Spherical k-means over normalized vectors; returns unit centroids."""
+    rng = np.random.default_rng(seed)
+    n_clusters = min(n_clusters, vectors.shape[0])
+    centroids = vectors[rng.choice(vectors.shape[0], n_clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        empty = ~np.any(sums, axis=1)
+        # Re-seed empty clusters from random points so every list stays usable
+        sums[empty] = vectors[rng.choice(vectors.shape[0], int(empty.sum()))]
+        centroids = normalize(sums)
+    return centroids
+
+class IVFIndex:
+    """Approximate index: vectors are bucketed by nearest k-means centroid and a
+    query only scans the `nprobe` closest buckets (inverted file)."""
+
+    def __init__(self, n_lists: int = None, nprobe: int = 8, min_train_size: int = 1024,
+                 sample_size: int = 20000, seed: int = 0):
+        self.n_lists = n_lists
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.sample_size = sample_size
+        self.seed = seed
+        self.dim = None
+        self.centroids = None  # None until trained; everything lives in list 0
+        self.watermark = 0  # highest embeddings.id already indexed
+        self._lists = {0: EmbeddingMatrix()}
+        self._assignment = {}  # event_id -> list id
+        self._trained_size = 0
+
+    def __len__(self):
+        return len(self._assignment)
+
+    def __contains__(self, event_id):
+        return event_id in self._assignment
+
+    def _all_vectors(self):
+        ids, vectors = [], []
+        for matrix in self._lists.values():
+            if len(matrix):
+                ids.append(matrix.ids.copy())
+                vectors.append(matrix.vectors.copy())
+        if not ids:
+            return np.zeros(0, dtype=np.int64), np.zeros((0, self.dim or 0), dtype=np.float32)
+        return np.concatenate(ids), np.vstack(vectors)
+
+    def train(self):
+        """(Re)build the coarse quantizer and redistribute every vector."""
+        ids, vectors = self._all_vectors()
+        if len(ids) == 0:
+            return
+        n_lists = self.n_lists or max(1, int(np.sqrt(len(ids))))
+        rng = np.random.default_rng(self.seed)
+        sample = vectors
+        if len(ids) > self.sample_size:
+            sample = vectors[rng.choice(len(ids), self.sample_size, replace=False)]
+        self.centroids = kmeans(sample, n_lists, seed=self.seed)
+        self._lists = {i: EmbeddingMatrix(self.dim) for i in range(self.centroids.shape[0])}
+        self._assignment = {}
+        self._trained_size = len(ids)
+        self._insert(ids, vectors)
+
+    def _insert(self, event_ids, vectors):
+        if self.centroids is None:
+            lists = np.zeros(len(event_ids), dtype=np.int64)
+        else:
+            lists = np.argmax(vectors @ self.centroids.T, axis=1)
+        for list_id in np.unique(lists):
+            members = np.flatnonzero(lists == list_id)
+            self._lists[int(list_id)].add_many([int(event_ids[i]) for i in members], vectors[members])
+            for i in members:
+                self._assignment[int(event_ids[i])] = int(list_id)
+
+    def add(self, event_id: int, vector):
+        """Add or replace the vector for an event."""
+        self.add_many([event_id], [vector])
+
+    def add_many(self, event_ids, vectors):
+        """Add vectors, retraining once the index has grown enough."""
+        if len(event_ids) == 0:
+            return
+        vectors = normalize(np.atleast_2d(vectors))
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        for event_id in event_ids:
+            self.remove(event_id)
+        self._insert(list(event_ids), vectors)
+        size = len(self)
+        if size >= self.min_train_size and size >= 4 * max(self._trained_size, 1):
+            self.train()
+
+    def remove(self, event_id: int):
+        """Remove an event from whichever list holds it."""
+        list_id = self._assignment.pop(event_id, None)
+        if list_id is None:
+            return False
+        return self._lists[list_id].remove(event_id)
+
+    def get(self, event_id: int):
+        """Return the normalized vector for an event, or None."""
+        list_id = self._assignment.get(event_id)
+        return None if list_id is None else self._lists[list_id].get(event_id)
+
+    def search(self, vector, k: int = 10, threshold: float = None, exclude=()):
+        """Return up to k approximate (event_id, similarity) pairs, best first."""
+        return self.search_batch([vector], k, threshold, [exclude])[0]
+
+    def search_batch(self, vectors, k: int = 10, threshold: float = None, exclude=None):
+        """Search several queries, probing the nprobe closest lists for each."""
+        queries = normalize(np.atleast_2d(vectors))
+        if self.centroids is None:
+            return self._lists[0].search_batch(queries, k, threshold, exclude)
+        nprobe = min(self.nprobe, self.centroids.shape[0])
+        probes = np.argpartition(queries @ self.centroids.T, -nprobe, axis=1)[:, -nprobe:]
+        results = []
+        for i, query in enumerate(queries):
+            excluded = exclude[i] if exclude is not None else ()
+            matches = []
+            for list_id in probes[i]:
+                matrix = self._lists[int(list_id)]
+                if len(matrix):
+                    matches.extend(matrix.search(query, k, threshold, excluded))
+            matches.sort(key=lambda match: match[1], reverse=True)
+            results.append(matches[:k] if k is not None else matches)
+        return results
+
+    def save(self, path: str):
+        """Persist the index next to the database."""
+        ids, vectors = self._all_vectors()
+        np.savez(
+            path,
+            ids=ids,
+            vectors=vectors,
+            centroids=self.centroids if self.centroids is not None else np.zeros((0, 0)),
+            params=np.array([self.nprobe, self.watermark, self._trained_size], dtype=np.int64),
+        )
+
+    @classmethod
+    def load(cls, path: str, **kwargs):
+        """Load a saved index without retraining."""
+        index = cls(**kwargs)
+        with np.load(path) as data:
+            index.nprobe, index.watermark, index._trained_size = (int(v) for v in data["params"])
+            vectors = data["vectors"]
+            if vectors.shape[0]:
+                index.dim = vectors.shape[1]
+            if data["centroids"].size:
+                index.centroids = data["centroids"]
+                index._lists = {i: EmbeddingMatrix(index.dim) for i in range(index.centroids.shape[0])}
+            index._insert([int(i) for i in data["ids"]], vectors)
+        return index
+
+    def refresh(self, conn):
+        """Add embeddings stored since the last load (rows with id > watermark)."""
+        return load_new_embeddings(self, conn)
+
+    @classmethod
+    def from_connection(cls, conn, path: str = None, **kwargs):
+        """Load the persisted index (if any) and add embeddings stored since."""
+        if path and os.path.exists(path):
+            index = cls.load(path, **kwargs)
+        else:
+            index = cls(**kwargs)
+        index.refresh(conn)
+        return index
+
+INDEX_TYPES = {
+    "exact": EmbeddingMatrix,
+    "ivf": IVFIndex,
+}
+
+def index_path(db_name: str, index_type: str):
+    """Where a persisted index for the given database lives."""
+    return f"{db_name}.{index_type}.npz"
+
+def load_index(conn, index_type: str = "exact", path: str = None):
+    """Build (or load and catch up) the similarity index of the given type."""
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type: {index_type}")
+    if index_type == "exact":
+        return EmbeddingMatrix.from_connection(conn)
+    return INDEX_TYPES[index_type].from_connection(conn, path)
+
+class ThreadCentroidIndex:
+    """Running mean embedding per active thread, searchable in one matmul."""
+
+    def __init__(self):
+        self._matrix = EmbeddingMatrix()
+        self._means = {}  # thread_id -> (mean vector, member count)
+
+    def __len__(self):
+        return len(self._means)
+
+    def __contains__(self, thread_id):
+        return thread_id in self._means
+
+    def get(self, thread_id: int):
+        """Return (mean vector, member count) for a thread, or None."""
+        return self._means.get(thread_id)
+
+    def set(self, thread_id: int, mean, count: int):
+        """Load a stored centroid."""
+        mean = np.asarray(mean, dtype=np.float32)
+        self._means[thread_id] = (mean, count)
+        self._matrix.add(thread_id, mean)
+
+    def add_member(self, thread_id: int, vector):
+        """Fold one member embedding into the thread's running mean."""
+        vector = normalize(vector)
+        mean, count = self._means.get(thread_id, (np.zeros_like(vector), 0))
+        mean = mean + (vector - mean) / (count + 1)
+        self.set(thread_id, mean, count + 1)
+        return mean, count + 1
+
+    def remove(self, thread_id: int):
+        """Drop a thread (e.g. archived or completed) from the index."""
+        self._means.pop(thread_id, None)
+        return self._matrix.remove(thread_id)
+
+    def assign(self, vector, threshold: float = 0.8):
+        """Return (thread_id, similarity) of the closest centroid above threshold, or None."""
+        matches = self._matrix.search(vector, 1, threshold)
+        return matches[0] if matches else None
+
+    @classmethod
+    def from_connection(cls, conn):
+        """Load centroids of all active threads."""
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT id, centroid, member_count FROM threads
+            WHERE status = 'active' AND centroid IS NOT NULL
+        """)
+        index = cls()
+        for thread_id, blob, count in cur:
+            index.set(thread_id, decode_embedding(blob), count)
+        return index
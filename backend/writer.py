@@ -0,0 +1,221 @@
+import atexit
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+from backend import db
+
+class BackgroundWriter:
+    """Group-commit writer: callers enqueue (sql, params) and a background thread
+    applies them with executemany, one transaction per flush.
+
+    A flush happens every `max_batch` statements or `flush_interval` seconds,
+    whichever comes first. `submit` blocks (backpressure) while the queue is full.
+    If a batch fails, its statements are retried one by one so a single bad row
+    cannot take other callers' writes down with it; rows that still fail are
+    kept in `dead_letters` and reported by `flush`/`close`.
+
+    Each batch runs on the ConnectionManager's shared writer connection, so it
+    serializes with request-path writes instead of contending for the file lock.
+    Never flush while holding that connection: the batch would wait on it.
+    """
+
+    def __init__(self, max_batch: int = 200, flush_interval: float = 0.05, max_queue: int = 10000,
+                 max_dead_letters: int = 1000, manager=None):
+        self.max_batch = max_batch
+        self.manager = manager
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.last_error = None
+        self.written = 0
+        self.failed = 0
+        self.dead_letters = deque(maxlen=max_dead_letters)  # (sql, params, error)
+        self._thread = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the writer thread (idempotent)."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Background writer is closed")
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="background-writer", daemon=True)
+                self._thread.start()
+        return self
+
+    def submit(self, sql: str, params: tuple = (), timeout: float = None):
+        """Queue a write; blocks while the queue is full (raises queue.Full after
+        timeout) and raises RuntimeError once the writer is closed."""
+        self.start()
+        self.queue.put((sql, params), timeout=timeout)
+
+    def flush(self, timeout: float = None):
+        """Block until everything queued so far has been applied.
+
+        Returns False if any of it was dead-lettered or the wait timed out, and
+        raises RuntimeError if the writer thread died with writes still queued.
+        """
+        thread = self._thread
+        if thread is None:
+            return True
+        failed = self.failed
+        done = threading.Event()
+        self._put((None, done), thread, timeout)
+        return self._wait(done, thread, timeout) and self.failed == failed
+
+    def close(self, timeout: float = None):
+        """Flush pending writes and stop the writer thread for good; returns like
+        flush. Later submits raise; closing again is a no-op."""
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+        if thread is None:
+            return True
+        failed = self.failed
+        self._put((None, None), thread, timeout)
+        thread.join(timeout)
+        if thread.is_alive():
+            return False
+        with self._lock:
+            if self._thread is thread:
+                self._thread = None
+        # Writes submitted while the stop marker was being queued
+        leftovers = []
+        while not self.queue.empty():
+            item = self.queue.get_nowait()
+            if item[0] is not None:
+                leftovers.append(item)
+        if leftovers:
+            with (self.manager or db.get_manager()).writer() as conn:
+                self._write(conn, leftovers)
+        return self.failed == failed
+
+    def _put(self, item, thread, timeout: float = None):
+        """Queue a control item without blocking forever on a dead writer."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            self._check_alive(thread)
+            try:
+                self.queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise
+
+    def _wait(self, done: threading.Event, thread, timeout: float = None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not done.wait(0.1 if deadline is None else max(0.0, min(0.1, deadline - time.monotonic()))):
+            self._check_alive(thread)
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+        return True
+
+    def _check_alive(self, thread):
+        if not thread.is_alive():
+            raise RuntimeError(f"Background writer thread died: {self.last_error!r}")
+
+    def _run(self):
+        manager = self.manager or db.get_manager()
+        try:
+            running = True
+            while running:
+                batch, waiters = [], []
+                item = self.queue.get()
+                deadline = time.monotonic() + self.flush_interval
+                while True:
+                    sql, params = item
+                    if sql is None:
+                        if params is None:
+                            running = False
+                        else:
+                            waiters.append(params)
+                        break
+                    batch.append(item)
+                    if len(batch) >= self.max_batch:
+                        break
+                    try:
+                        item = self.queue.get(timeout=max(0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                if batch:
+                    with manager.writer() as conn:
+                        self._write(conn, batch)
+                for waiter in waiters:
+                    waiter.set()
+        except BaseException as e:
+            self.last_error = e
+            print(f"❌ Background writer stopped: {e}")
+
+    def _write(self, conn, batch: list):
+        """Apply a batch in one transaction, grouping runs of the same statement."""
+        try:
+            with conn:
+                start = 0
+                while start < len(batch):
+                    sql = batch[start][0]
+                    end = start
+                    while end < len(batch) and batch[end][0] == sql:
+                        end += 1
+                    conn.executemany(sql, [params for _, params in batch[start:end]])
+                    start = end
+            self.written += len(batch)
+        except sqlite3.Error as e:
+            self.last_error = e
+            print(f"⚠️  Background write of {len(batch)} statements failed ({e}); retrying one by one")
+            try:
+                self._write_each(conn, batch)
+            except sqlite3.Error as e:
+                # The retry transaction itself failed (e.g. still locked): nothing committed
+                self._dead_letter([(sql, params, e) for sql, params in batch])
+
+    def _write_each(self, conn, batch: list):
+        """Apply a failed batch statement by statement (one savepoint each, one
+        commit), dead-lettering only the statements that fail on their own."""
+        failed = []
+        with conn:
+            conn.execute("BEGIN")
+            for sql, params in batch:
+                conn.execute("SAVEPOINT background_write")
+                try:
+                    conn.execute(sql, params)
+                except sqlite3.Error as e:
+                    conn.execute("ROLLBACK TO background_write")
+                    failed.append((sql, params, e))
+                conn.execute("RELEASE background_write")
+        self.written += len(batch) - len(failed)
+        if failed:
+            self._dead_letter(failed)
+
+    def _dead_letter(self, failed: list):
+        self.failed += len(failed)
+        self.last_error = failed[-1][2]
+        for sql, params, error in failed:
+            self.dead_letters.append((sql, params, error))
+            print(f"❌ Dropped background write ({error}): {sql.split()[0]} {params!r:.120}")
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_writer():
+    """Process-wide background writer (see close_writer)."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = BackgroundWriter()
+        return _writer
+
+def close_writer(timeout: float = None):
+    """Flush and stop the process-wide writer; the next get_writer() makes a new one.
+
+    Called on server shutdown and at interpreter exit (a no-op if already closed).
+    """
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is None:
+        return True
+    return writer.close(timeout)
+
+atexit.register(close_writer)
@@ -1,3 +1,8 @@
 # config/settings.py
+import os
 
-DB_PATH = "context.db"
\ No newline at end of file
+DB_PATH = "context.db"
+
+# API keys come from the environment (see config/env_example.py)
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
@@ -0,0 +1,40 @@
+import os
+import sys
+import pytest
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import db
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """Point the backend at a fresh, migrated database in a temp directory."""
+    path = str(tmp_path / "context.db")
+    # The shared manager opens connections lazily against DB_NAME, so drop any
+    # left over from the previous test's database
+    db.get_manager().close()
+    monkeypatch.setattr(db, "DB_NAME", path)
+    db.init_db()
+    yield path
+    db.get_manager().close()
+
+@pytest.fixture
+def conn(db_path):
+    connection = db.get_connection()
+    yield connection
+    connection.close()
+
+def query_plan(conn, sql: str, params=()):
+    """EXPLAIN QUERY PLAN details for a statement, joined into one string."""
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    return " | ".join(row[-1] for row in rows)
+
+@pytest.fixture(autouse=True)
+def audio_cache(tmp_path, monkeypatch):
+    """Synthesize with the fake TTS backend into a per-test audio cache."""
+    from backend import tts
+    cache = tts.AudioCache(str(tmp_path / "audio"))
+    monkeypatch.setattr(tts, "_tts", tts.FakeTTSBackend())
+    monkeypatch.setattr(tts, "_audio_cache", cache)
+    return cache
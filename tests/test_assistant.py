@@ -0,0 +1,264 @@
+from conftest import query_plan
+
+def test_events_by_source_uses_index(conn):
+    plan = query_plan(conn, "SELECT * FROM events WHERE source = ? ORDER BY ts_epoch DESC LIMIT 10", ("Slack",))
+    assert "idx_events_source_ts" in plan
+    assert "TEMP B-TREE" not in plan
+
+def test_day_window_query_uses_epoch_index(conn):
+    plan = query_plan(conn, """
+        SELECT source, content, metadata, ts_epoch FROM events
+        WHERE ts_epoch >= ? AND ts_epoch < ? ORDER BY ts_epoch ASC, id ASC
+    """, (1705190400, 1705276800))
+    assert "SEARCH events USING INDEX idx_events_ts (ts_epoch>? AND ts_epoch<?)" in plan
+    assert "TEMP B-TREE" not in plan
+
+def test_yesterday_events_use_epoch_window(conn):
+    from datetime import datetime, timedelta
+    from backend.assistant import ContextAssistant
+    from utils.helpers import to_epoch
+    yesterday = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0) - timedelta(days=1)
+    conn.executemany("INSERT INTO events (source, content, timestamp, ts_epoch) VALUES (?, ?, ?, ?)", [
+        ("Slack", "noon yesterday", yesterday.isoformat(), to_epoch(yesterday)),
+        ("Slack", "two days ago", None, to_epoch(yesterday - timedelta(days=1))),
+        ("Gmail", "legacy text timestamp", str(yesterday + timedelta(hours=1, microseconds=5)), None),
+    ])
+    events = ContextAssistant(conn).get_yesterday_events()
+    assert [e[1] for e in events] == ["noon yesterday", "legacy text timestamp"]
+    assert events[0][3] == yesterday
+
+def test_event_pages_follow_cursor_with_filters_and_projection(conn):
+    from backend.retriever import fetch_event_page
+    conn.executemany(
+        "INSERT INTO events (source, content, timestamp) VALUES (?, ?, ?)",
+        [("Slack" if i % 2 else "Gmail", f"event {i}", f"2024-01-14 10:00:0{i}") for i in range(6)],  # epoch set by trigger
+    )
+    first = fetch_event_page(conn, limit=2, source="Slack", fields=["source"])
+    second = fetch_event_page(conn, limit=2, source="Slack", cursor=first["next_cursor"], fields=["source"])
+    assert [e["id"] for e in first["events"] + second["events"]] == [6, 4, 2]
+    assert set(first["events"][0]) == {"id", "source", "ts_epoch"}
+    window = fetch_event_page(conn, since="2024-01-14T10:00:02", until="2024-01-14T10:00:04")
+    assert [e["content"] for e in window["events"]] == ["event 3", "event 2"]
+
+def test_event_page_after_cursor_seeks_index(conn):
+    plan = query_plan(conn, """
+        SELECT id, ts_epoch FROM events WHERE source = ? AND (ts_epoch, id) < (?, ?)
+        ORDER BY ts_epoch DESC, id DESC LIMIT 10
+    """, ("Slack", 1705226400, 5))
+    assert "SEARCH events USING" in plan
+    assert "idx_events_source_ts (source=? AND ts_epoch<?)" in plan
+    assert "TEMP B-TREE" not in plan
+
+def test_system_status_counters_track_writes(conn):
+    from backend import db
+    from backend.assistant import ContextAssistant
+    cur = conn.cursor()
+    cur.executemany("INSERT INTO events (source, content) VALUES (?, ?)", [("Slack", "a"), ("Gmail", "b"), ("Zoom", "c")])
+    cur.execute("UPDATE events SET processed = TRUE WHERE id = 1")
+    cur.execute("DELETE FROM events WHERE id = 3")
+    cur.execute("INSERT INTO threads (title) VALUES ('t')")
+    cur.execute("INSERT INTO voice_briefings (briefing_type, content) VALUES ('daily', 'hi')")
+    conn.commit()
+
+    status = ContextAssistant(conn).get_system_status()
+    assert (status["total_events"], status["unprocessed_events"]) == (2, 1)
+    assert (status["total_threads"], status["total_briefings"]) == (1, 1)
+    assert db.check_system_stats(cur) == {}
+
+    cur.execute("UPDATE system_stats SET total_events = 99")
+    assert db.check_system_stats(cur) == {"total_events": (99, 2)}
+    db.rebuild_system_stats(cur)
+    assert db.check_system_stats(cur) == {}
+
+def test_full_text_search_ranks_and_stays_in_sync(conn):
+    from backend.search import search_events
+    cur = conn.cursor()
+    cur.executemany("INSERT INTO events (source, content) VALUES (?, ?)", [
+        ("Gmail", "Client feedback on the product demo"),
+        ("Zoom", "Meeting: Client Demo - Duration: 45 minutes"),
+        ("Slack", "Lunch plans?"),
+    ])
+    assert {r["id"] for r in search_events(conn, "client demo")} == {1, 2}
+    assert [r["id"] for r in search_events(conn, "demo", source="Zoom")] == [2]
+    assert "[Demo]" in search_events(conn, "demo", source="Zoom")[0]["snippet"]
+
+    cur.execute("UPDATE events SET content = 'Rescheduled lunch' WHERE id = 2")
+    cur.execute("DELETE FROM events WHERE id = 1")
+    assert search_events(conn, "demo") == []
+    assert [r["id"] for r in search_events(conn, "lunch")] != []
+
+def test_today_tasks_use_full_text_index(conn):
+    from backend.assistant import ContextAssistant
+    conn.executemany("INSERT INTO events (source, content) VALUES (?, ?)", [
+        ("Slack", "Two tasks left for the release"),
+        ("Slack", "Lunch plans?"),
+        ("Gmail", "URGENT: contract renewal"),
+        ("Notion", "Q3 goals page updated"),
+    ])
+    conn.execute("UPDATE events SET ts_epoch = strftime('%s', 'now')")
+    tasks = ContextAssistant(conn).get_today_tasks()
+    assert [t[1] for t in tasks] == ["Two tasks left for the release", "URGENT: contract renewal", "Q3 goals page updated"]
+
+def test_hybrid_search_fuses_lexical_and_semantic_rankings(conn):
+    from backend.organizer import ContextOrganizer
+    from backend.search import hybrid_search
+    from backend.embedding_cache import query_embedding_cache
+    organizer = ContextOrganizer(conn=conn)
+    contents = [
+        ("Gmail", "Client feedback on the product demo was very positive"),
+        ("Zoom", "Recorded the client demo walkthrough call"),
+        ("Slack", "Lunch order for the team"),
+    ]
+    conn.executemany("INSERT INTO events (source, content) VALUES (?, ?)", contents)
+    for event_id, vector in enumerate(organizer.create_embeddings([c for _, c in contents]), 1):
+        organizer.store_embedding(event_id, vector)
+    conn.commit()
+
+    results = hybrid_search(conn, "what did the client say about the demo", k=3, organizer=organizer)
+    assert {r["id"] for r in results[:2]} == {1, 2}
+    assert results[-1]["id"] == 3 and results[0]["score"] > results[-1]["score"]
+    assert [r["id"] for r in hybrid_search(conn, "client demo", source="Zoom", organizer=organizer)] == [2]
+
+    hits = query_embedding_cache.hits
+    hybrid_search(conn, "client demo", organizer=organizer)
+    assert query_embedding_cache.hits == hits + 1
+
+def test_hybrid_search_filters_semantic_hits_before_fusion(conn):
+    from backend.organizer import ContextOrganizer
+    from backend.search import hybrid_search
+    organizer = ContextOrganizer(conn=conn)
+    contents = [("Slack", f"quarterly budget review thread {i}") for i in range(6)]
+    contents += [("Zoom", f"recording {i} uploaded") for i in range(3)]  # no words in common with the query
+    conn.executemany("INSERT INTO events (source, content) VALUES (?, ?)", contents)
+    for event_id, vector in enumerate(organizer.create_embeddings([c for _, c in contents]), 1):
+        organizer.store_embedding(event_id, vector)
+    conn.commit()
+
+    # The top 3 unfiltered semantic candidates are all Slack events
+    results = hybrid_search(conn, "quarterly budget review", k=3, candidates=3, source="Zoom", organizer=organizer)
+    assert sorted(r["id"] for r in results) == [7, 8, 9]
+    assert all(r["source"] == "Zoom" and r["similarity"] is not None for r in results)
+
+def test_briefings_are_cached_per_day_and_refreshed_incrementally(conn):
+    from datetime import datetime, timedelta
+    from backend.assistant import ContextAssistant
+    from utils.helpers import to_epoch
+    morning = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0) - timedelta(days=1)
+    insert = "INSERT INTO events (source, content, ts_epoch) VALUES (?, ?, ?)"
+    conn.execute(insert, ("Slack", "standup notes", to_epoch(morning)))
+    assistant = ContextAssistant(conn)
+
+    text, changed = assistant.get_briefing("yesterday")
+    assert changed and "In Slack, you had 1 activities" in text
+    assert assistant.get_briefing("yesterday") == (text, False)
+
+    conn.execute(insert, ("Gmail", "invoice sent", to_epoch(morning + timedelta(hours=2))))
+    conn.execute(insert, ("Slack", "earlier backfilled message", to_epoch(morning - timedelta(hours=1))))
+    conn.execute(insert, ("Slack", "today, not yesterday", to_epoch(datetime.now())))
+    text, changed = assistant.get_briefing("yesterday")
+    assert changed
+    assert text.index("In Slack, you had 2 activities") < text.index("In Gmail, you had 1 activities")
+    assert text.index("earlier backfilled") < text.index("standup notes")
+    rows = conn.execute("SELECT briefing_day, last_event_id FROM voice_briefings WHERE briefing_type = 'recap'").fetchall()
+    assert rows == [(morning.date().isoformat(), 3)]  # event 4 is outside the window
+    assert assistant.play_voice_briefing("yesterday")["cached"]
+
+def test_briefing_is_unchanged_by_events_its_filter_skips(conn):
+    from datetime import datetime
+    from backend.assistant import ContextAssistant
+    from utils.helpers import to_epoch
+    insert = "INSERT INTO events (source, content, ts_epoch) VALUES (?, ?, ?)"
+    conn.execute(insert, ("Notion", "Q3 goals page updated", to_epoch(datetime.now())))
+    assistant = ContextAssistant(conn)
+    text, changed = assistant.get_briefing("today")
+    assert changed
+    conn.execute("UPDATE voice_briefings SET played = TRUE")
+
+    conn.execute(insert, ("Slack", "lunch plans", to_epoch(datetime.now())))  # not a task
+    assert assistant.get_briefing("today") == (text, False)
+    row = conn.execute("SELECT last_event_id, played FROM voice_briefings WHERE briefing_type = 'plan'").fetchone()
+    assert row == (2, 1)  # watermark advanced, still marked played
+
+def test_daily_rollups_track_ingest_and_organize(conn):
+    from backend.db import rebuild_daily_rollups
+    insert = "INSERT INTO events (source, content, metadata, timestamp) VALUES (?, ?, ?, ?)"
+    conn.executemany(insert, [  # epoch filled in by trigger after the insert
+        ("Slack", "a", '{"priority": "high"}', "2024-01-14 10:00:00"),
+        ("Slack", "b", "not json", "2024-01-14 11:00:00"),
+        ("Gmail", "c", '{"priority": "low"}', "2024-01-15 09:00:00"),
+    ])
+    conn.execute("INSERT INTO threads (title) VALUES ('Launch')")
+    conn.executemany("INSERT INTO thread_events (thread_id, event_id) VALUES (1, ?)", [(1,), (3,)])
+    conn.execute("UPDATE events SET metadata = '{\"priority\": \"medium\"}' WHERE id = 3")
+    conn.execute("DELETE FROM events WHERE id = 2")
+    conn.execute("DELETE FROM thread_events WHERE event_id = 1")
+    # An event moved to another day, and one deleted while still in a thread
+    conn.execute("INSERT INTO events (source, content, timestamp) VALUES ('Slack', 'd', '2024-01-15 10:00:00')")
+    conn.execute("INSERT INTO events (source, content, timestamp) VALUES ('Slack', 'e', '2024-01-15 11:00:00')")
+    conn.executemany("INSERT INTO thread_events (thread_id, event_id) VALUES (1, ?)", [(4,), (5,)])
+    conn.execute("UPDATE events SET ts_epoch = ts_epoch + 86400 WHERE id = 4")
+    conn.execute("DELETE FROM events WHERE id = 5")
+
+    def snapshot():
+        return (
+            conn.execute("SELECT * FROM daily_source_stats WHERE event_count > 0 ORDER BY day, source").fetchall(),
+            conn.execute("SELECT * FROM daily_thread_stats WHERE event_count > 0 ORDER BY day").fetchall(),
+        )
+    incremental = snapshot()
+    assert incremental == (
+        [("2024-01-14", "Slack", 1, 1, 0, 0), ("2024-01-15", "Gmail", 1, 0, 1, 0), ("2024-01-16", "Slack", 1, 0, 0, 0)],
+        [("2024-01-15", 1, 1), ("2024-01-16", 1, 1)],
+    )
+    assert conn.execute("SELECT COUNT(*) FROM daily_thread_stats WHERE event_count < 0").fetchone() == (0,)
+    rebuild_daily_rollups(conn.cursor())
+    assert snapshot() == incremental
+
+def test_period_briefing_reads_rollups(conn):
+    from datetime import date
+    from backend.assistant import ContextAssistant
+    conn.executemany("INSERT INTO events (source, content, metadata, timestamp) VALUES (?, ?, ?, ?)", [
+        ("Slack", "a", '{"priority": "high"}', "2024-01-14 10:00:00"),
+        ("Slack", "b", None, "2024-01-15 10:00:00"),
+        ("Slack", "c", None, "2024-01-15 11:00:00"),
+        ("Zoom", "d", None, "2024-01-15 12:00:00"),
+        ("Zoom", "outside", None, "2024-01-20 12:00:00"),
+    ])
+    conn.execute("INSERT INTO threads (title) VALUES ('Demo prep')")
+    conn.executemany("INSERT INTO thread_events (thread_id, event_id) VALUES (1, ?)", [(2,), (4,)])
+    assistant = ContextAssistant(conn)
+
+    summary = assistant.get_period_summary(date(2024, 1, 14), date(2024, 1, 16))
+    assert summary["total"] == 4
+    assert summary["sources"][0] == {"source": "Slack", "events": 3, "high_priority": 1, "medium_priority": 0, "low_priority": 0}
+    assert summary["busiest_day"] == {"day": "2024-01-15", "events": 3}
+    assert summary["threads"] == [{"id": 1, "title": "Demo prep", "events": 2}]
+
+    text, changed = assistant.get_period_briefing(date(2024, 1, 14), date(2024, 1, 16))
+    assert changed and "4 activities across 2 sources" in text and "Demo prep (2 events)" in text
+    assert assistant.get_period_briefing(date(2024, 1, 14), date(2024, 1, 16)) == (text, False)
+
+def test_command_audit_is_one_queued_write(conn):
+    import json
+    from backend.assistant import ContextAssistant
+    from backend.writer import BackgroundWriter
+    conn.execute("INSERT INTO user_commands (command_text) VALUES ('older command')")
+    conn.commit()
+    writer = BackgroundWriter(flush_interval=10)  # nothing commits until flush/close
+    assistant = ContextAssistant(conn, writer=writer)
+    assistant.execute_command = lambda parsed: f"✅ {parsed['description']}"
+
+    responses = [assistant.process_voice_command(text) for text in ("Open Slack", "Sing me a song")]
+    command_ids = [r["command_id"] for r in responses]
+    assert len(set(command_ids)) == 2
+    assert conn.execute("SELECT COUNT(*) FROM user_commands").fetchone() == (1,)
+
+    writer.close()  # what shutdown does: queued audit rows are committed
+    rows = conn.execute("""
+        SELECT request_id, command_text, parsed_intent, executed, result, parse_source
+        FROM user_commands WHERE id > 1 ORDER BY id
+    """).fetchall()
+    assert [(r[0], r[1], json.loads(r[2])["action"], r[3], r[5]) for r in rows] == [
+        (command_ids[0], "Open Slack", "open_app", 1, "rules"),
+        (command_ids[1], "Sing me a song", "unknown", 1, "rules"),
+    ]
+    assert rows[0][4] == "✅ Opening Slack"
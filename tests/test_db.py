@@ -0,0 +1,110 @@
+import os
+import sqlite3
+import threading
+import time
+import pytest
+from backend import db
+
+def test_connections_use_wal_and_tuned_pragmas(conn):
+    assert conn.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    assert conn.execute("PRAGMA busy_timeout").fetchone() == (5000,)
+    assert conn.execute("PRAGMA synchronous").fetchone() == (1,)  # NORMAL
+
+def test_writer_is_shared_and_rolls_back_on_error(db_path):
+    manager = db.ConnectionManager()
+    with manager.writer() as first:
+        first.execute("INSERT INTO events (source, content) VALUES ('Slack', 'kept')")
+        first.commit()
+    with pytest.raises(RuntimeError):
+        with manager.writer() as second:
+            assert second is first
+            second.execute("INSERT INTO events (source, content) VALUES ('Slack', 'discarded')")
+            raise RuntimeError("request failed")
+    with manager.reader() as reader:
+        assert reader.execute("SELECT content FROM events").fetchall() == [("kept",)]
+    manager.close()
+
+def test_writer_checkouts_are_serialized(db_path):
+    manager = db.ConnectionManager()
+    inside, overlapped = [], []
+
+    def write(n):
+        with manager.writer() as conn:
+            overlapped.append(bool(inside))
+            inside.append(n)
+            conn.execute("INSERT INTO events (source, content) VALUES ('Slack', ?)", (str(n),))
+            conn.commit()
+            inside.remove(n)
+
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert overlapped == [False] * 8
+    with manager.reader() as reader:
+        assert reader.execute("SELECT COUNT(*) FROM events").fetchone() == (8,)
+    manager.close()
+
+def test_reader_pool_is_bounded_reused_and_read_only(db_path):
+    manager = db.ConnectionManager(pool_size=2)
+    with manager.reader() as first, manager.reader() as second:
+        assert first is not second
+        with pytest.raises(sqlite3.OperationalError, match="readonly"):
+            first.execute("INSERT INTO events (source, content) VALUES ('Slack', 'nope')")
+
+        # A third checkout waits for one of the two connections to come back
+        got = []
+        waiter = threading.Thread(target=lambda: got.append(manager.reader().__enter__()))
+        waiter.start()
+        waiter.join(0.2)
+        assert waiter.is_alive() and got == []
+    waiter.join(5)
+    assert got[0] in (first, second) and manager._created == 2
+    manager._readers.put(got[0])
+
+    with manager.reader() as again:
+        assert again in (first, second)
+    manager.close()
+    assert manager._created == 0 and manager._readers.empty()
+
+@pytest.fixture
+def eastern_time():
+    """Run with a non-UTC local timezone (UTC-5, no DST)."""
+    original = os.environ.get("TZ")
+    os.environ["TZ"] = "EST+5"
+    time.tzset()
+    yield
+    if original is None:
+        del os.environ["TZ"]
+    else:
+        os.environ["TZ"] = original
+    time.tzset()
+
+def test_epoch_timestamps_read_default_timestamps_as_utc(tmp_path, eastern_time):
+    noon_utc = 1705320000  # 2024-01-15 12:00:00 UTC
+    rows = [
+        ("column default", "2024-01-15 12:00:00"),  # CURRENT_TIMESTAMP is UTC
+        ("legacy listener", "2024-01-15 07:00:00.250000"),  # datetime.now() is local
+    ]
+    conn = sqlite3.connect(str(tmp_path / "legacy.db"))
+    db.migrate(conn, target=8)
+    conn.executemany("INSERT INTO events (source, content, timestamp) VALUES ('Slack', ?, ?)", rows)
+    conn.commit()
+    db.migrate(conn)  # backfill
+    conn.executemany("INSERT INTO events (source, content, timestamp) VALUES ('Slack', ?, ?)", rows)  # trigger
+    conn.execute("INSERT INTO events (source, content) VALUES ('Slack', 'now')")
+    epochs = [row[0] for row in conn.execute("SELECT ts_epoch FROM events ORDER BY id")]
+    assert epochs[:4] == [noon_utc] * 4
+    assert abs(epochs[4] - time.time()) < 60
+    conn.close()
+
+def test_streaming_helpers_use_the_configured_database(db_path):
+    from backend.query import get_all_events
+    from backend.retriever import get_events
+    conn = db.get_connection()
+    conn.execute("INSERT INTO events (source, content) VALUES ('Slack', 'configured db')")
+    conn.commit()
+    conn.close()
+    assert [row[1:3] for row in get_all_events()] == [("Slack", "configured db")]
+    assert [row[:2] for row in get_events()] == [("Slack", "configured db")]
@@ -0,0 +1,63 @@
+import numpy as np
+from backend.embedding_cache import EmbeddingCache, MemoryTier, content_hash
+
+def vectors(count: int, dim: int = 4):
+    return [np.full(dim, i, dtype=np.float32) for i in range(count)]
+
+def test_content_hash_ignores_whitespace_differences():
+    assert content_hash("Q3  roadmap\n sync ") == content_hash("Q3 roadmap sync")
+    assert content_hash("Q3 roadmap") != content_hash("q3 roadmap")
+
+def test_memory_tier_is_shared_between_caches(conn, tmp_path):
+    memory = MemoryTier()
+    texts = ["alpha", "beta", "gamma"]
+    first = EmbeddingCache(conn, memory=memory)
+    assert first.get_many(texts, "m", 4) == {}
+    first.put_many(texts, "m", 4, vectors(3))
+
+    # A new cache (as a per-request organizer would build) starts warm
+    second = EmbeddingCache(conn, memory=memory)
+    found = second.get_many(["gamma", "alpha", "delta"], "m", 4)
+    assert sorted(found) == [0, 1] and found[0][0] == 2
+    assert memory.stats() == {
+        "memory_hits": 2, "disk_hits": 0, "misses": 4, "hit_rate": 2 / 6, "memory_entries": 3,
+    }
+
+    # A cold memory tier falls back to SQLite
+    cold = EmbeddingCache(conn, memory=MemoryTier())
+    assert sorted(cold.get_many(texts, "m", 4)) == [0, 1, 2]
+    assert cold.stats()["disk_hits"] == 3
+    assert conn.execute("SELECT SUM(hit_count) FROM embedding_cache").fetchone() == (3,)
+
+def test_dimension_is_part_of_the_key(conn):
+    memory = MemoryTier()
+    cache = EmbeddingCache(conn, memory=memory)
+    cache.put_many(["alpha"], "m", 4, vectors(1, dim=4))
+    cache.put_many(["alpha"], "m", 2, vectors(1, dim=2))
+    assert len(cache.get_many(["alpha"], "m", 2)[0]) == 2
+    assert len(cache.get_many(["alpha"], "m", 4)[0]) == 4
+    assert cache.get_many(["alpha"], "m", 8) == {}
+
+    # Both rows survive on disk and are told apart there too
+    cold = EmbeddingCache(conn, memory=MemoryTier())
+    assert len(cold.get_many(["alpha"], "m", 2)[0]) == 2
+    assert conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone() == (2,)
+
+def test_rewriting_existing_keys_does_not_trigger_early_eviction(conn):
+    cache = EmbeddingCache(conn, max_entries=3, memory=MemoryTier())
+    texts = ["a", "b", "c"]
+    for _ in range(3):
+        cache.put_many(texts, "m", 4, vectors(3))
+    assert cache._disk_count == 3
+    assert conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone() == (3,)
+
+def test_eviction_drops_least_recently_used_rows(conn):
+    memory = MemoryTier(max_entries=1)
+    cache = EmbeddingCache(conn, max_entries=2, memory=memory)
+    cache.put_many(["a"], "m", 4, vectors(1))
+    cache.put_many(["b"], "m", 4, vectors(1))
+    conn.execute("UPDATE embedding_cache SET last_used_at = 0 WHERE content_hash = ?", (content_hash("a"),))
+    cache.put_many(["c"], "m", 4, vectors(1))
+    kept = {row[0] for row in conn.execute("SELECT content_hash FROM embedding_cache")}
+    assert kept == {content_hash("b"), content_hash("c")}
+    assert len(memory) == 1
@@ -0,0 +1,104 @@
+import threading
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from backend import embedding_providers
+from backend.embedding_providers import (
+    BatchEmbedder, EmbeddingProvider, HashingEmbeddingProvider, OpenAIEmbeddingProvider, estimate_tokens
+)
+
+class RecordingProvider(EmbeddingProvider):
+    """Echoes each text's length as a 1-dim vector and records request sizes."""
+    model = "recording"
+
+    def __init__(self, max_batch_items: int, max_batch_tokens: int, failures: list = ()):
+        self.max_batch_items = max_batch_items
+        self.max_batch_tokens = max_batch_tokens
+        self.failures = list(failures)
+        self.batches = []
+        self._lock = threading.Lock()
+
+    def embed_batch(self, texts: list):
+        with self._lock:
+            if self.failures:
+                raise self.failures.pop(0)
+            self.batches.append(list(texts))
+        return [np.array([len(text)], dtype=np.float32) for text in texts]
+
+class RateLimited(Exception):
+    status_code = 429
+
+def test_batches_respect_item_and_token_budgets():
+    provider = RecordingProvider(max_batch_items=3, max_batch_tokens=3 * estimate_tokens("x" * 40))
+    texts = ["x" * 40] * 7 + ["y" * 400]  # the long text does not fit with anything else
+    batches = BatchEmbedder(provider).make_batches(texts)
+    assert [(start, len(batch)) for start, batch in batches] == [(0, 3), (3, 3), (6, 1), (7, 1)]
+
+def test_embed_preserves_order_across_concurrent_batches():
+    provider = RecordingProvider(max_batch_items=2, max_batch_tokens=10**6)
+    texts = ["a" * n for n in range(1, 12)]
+    vectors = BatchEmbedder(provider, max_workers=4).embed(texts)
+    assert [int(v[0]) for v in vectors] == list(range(1, 12))
+    assert sorted(len(batch) for batch in provider.batches) == [1, 2, 2, 2, 2, 2]
+    assert BatchEmbedder(provider).embed([]) == []
+
+def test_rate_limits_back_off_and_retry(monkeypatch):
+    delays = []
+    monkeypatch.setattr(embedding_providers.time, "sleep", delays.append)
+    monkeypatch.setattr(embedding_providers.random, "uniform", lambda low, high: 0.0)
+    provider = RecordingProvider(10, 10**6, failures=[RateLimited(), RateLimited()])
+    vectors = BatchEmbedder(provider, base_delay=0.5).embed(["hi"])
+    assert int(vectors[0][0]) == 2 and delays == [0.5, 1.0]
+
+    retry_after = RateLimited()
+    retry_after.response = SimpleNamespace(status_code=429, headers={"retry-after": "3"})
+    provider.failures = [retry_after]
+    BatchEmbedder(provider).embed(["hi"])
+    assert delays[-1] == 3.0
+
+    provider.failures = [RateLimited()] * 3
+    with pytest.raises(RateLimited):
+        BatchEmbedder(provider, max_retries=2).embed(["hi"])
+
+def test_other_errors_are_not_retried(monkeypatch):
+    monkeypatch.setattr(embedding_providers.time, "sleep", lambda delay: pytest.fail("should not back off"))
+    provider = RecordingProvider(10, 10**6, failures=[ValueError("bad input")])
+    with pytest.raises(ValueError):
+        BatchEmbedder(provider).embed(["hi"])
+
+def test_openai_provider_sends_dimensions_and_reorders_by_index():
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        data = [SimpleNamespace(index=i, embedding=[float(i)] * 2) for i in range(len(kwargs["input"]))]
+        return SimpleNamespace(data=data[::-1])
+
+    client = SimpleNamespace(embeddings=SimpleNamespace(create=create))
+    provider = OpenAIEmbeddingProvider(client=client, dim=2, max_batch_items=16, max_batch_tokens=500)
+    assert (provider.max_batch_items, provider.max_batch_tokens) == (16, 500)
+    vectors = provider.embed_batch(["a", "b", "c"])
+    assert [v[0] for v in vectors] == [0.0, 1.0, 2.0]
+    assert calls == [{"model": "text-embedding-3-large", "input": ["a", "b", "c"], "dimensions": 2}]
+
+def test_hashing_provider_is_deterministic_and_normalized():
+    provider = HashingEmbeddingProvider(dim=64, max_batch_items=8)
+    first, second = provider.embed_batch(["Q3 roadmap", "Q3 roadmap"])
+    assert provider.max_batch_items == 8
+    assert np.array_equal(first, second) and np.isclose(np.linalg.norm(first), 1.0)
+
+def test_only_the_openai_provider_uses_tiktoken(monkeypatch):
+    calls = []
+
+    class Tokenizer:
+        def get_encoding(self, name):
+            calls.append(name)
+            return SimpleNamespace(encode=lambda text: text.split())
+
+    monkeypatch.setattr(embedding_providers, "tiktoken", Tokenizer())
+    BatchEmbedder(HashingEmbeddingProvider(dim=8)).make_batches(["offline text"] * 3)
+    assert calls == []  # local embedding never loads (or downloads) an encoding
+
+    client = SimpleNamespace(embeddings=None)
+    assert OpenAIEmbeddingProvider(client=client).count_tokens("three word text") == 3
+    assert calls == ["cl100k_base"]
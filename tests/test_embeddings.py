@@ -0,0 +1,59 @@
+import json
+import sqlite3
+import numpy as np
+import pytest
+from backend.embeddings import encode_embedding, decode_embedding, migrate_json_embeddings
+
+def test_embeddings_round_trip_through_binary_blobs():
+    values = [0.5, -0.25, 1.0]
+    blob = encode_embedding(values)
+    assert isinstance(blob, bytes) and len(blob) == 3 * 4
+    assert decode_embedding(blob, 3).tolist() == values
+    assert len(encode_embedding(values, "float16")) == 3 * 2
+    assert decode_embedding(encode_embedding(values, "float16"), 3, "float16").tolist() == values
+    # Legacy JSON text still decodes
+    assert decode_embedding(json.dumps(values)).tolist() == values
+
+def test_decode_rejects_bad_dim_and_dtype():
+    blob = encode_embedding([1.0, 2.0])
+    with pytest.raises(ValueError):
+        decode_embedding(blob, 3)
+    with pytest.raises(ValueError):
+        decode_embedding(blob, 2, "float64")
+    with pytest.raises(ValueError):
+        encode_embedding([1.0], "int8")
+
+def test_decode_is_a_read_only_view():
+    vector = decode_embedding(encode_embedding(np.ones(4)))
+    assert not vector.flags.writeable
+
+def test_migrate_json_embeddings_rewrites_text_rows_in_batches():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE embeddings (id INTEGER PRIMARY KEY, embedding BLOB, dim INTEGER, dtype TEXT)")
+    conn.executemany("INSERT INTO embeddings (embedding) VALUES (?)", [(json.dumps([float(i), 1.0]),) for i in range(5)])
+    conn.execute("INSERT INTO embeddings (embedding, dim, dtype) VALUES (?, 2, 'float32')", (encode_embedding([9.0, 9.0]),))
+
+    assert migrate_json_embeddings(conn, batch_size=2) == 5
+    rows = conn.execute("SELECT typeof(embedding), embedding, dim, dtype FROM embeddings ORDER BY id").fetchall()
+    assert {row[0] for row in rows} == {"blob"}
+    assert [decode_embedding(blob, dim, dtype)[0] for _, blob, dim, dtype in rows] == [0.0, 1.0, 2.0, 3.0, 4.0, 9.0]
+    assert migrate_json_embeddings(conn) == 0
+
+def test_failed_embedding_migration_leaves_legacy_rows_untouched(tmp_path, monkeypatch):
+    from functools import partial
+    from backend import db
+    conn = sqlite3.connect(str(tmp_path / "legacy.db"))
+    db.migrate(conn, target=1)
+    conn.executemany("INSERT INTO embeddings (event_id, embedding) VALUES (?, ?)", [
+        (1, json.dumps([1.0, 2.0])), (2, json.dumps([3.0, 4.0])), (3, "not json"),
+    ])
+    conn.commit()
+
+    # Small batches would each have been committed before the bad row was reached
+    monkeypatch.setattr(db, "migrate_json_embeddings", partial(migrate_json_embeddings, batch_size=1))
+    with pytest.raises(json.JSONDecodeError):
+        db.migrate(conn)
+    assert db.get_schema_version(conn) == 1
+    rows = conn.execute("SELECT typeof(embedding) FROM embeddings ORDER BY id").fetchall()
+    assert rows == [("text",), ("text",), ("text",)]
+    conn.close()
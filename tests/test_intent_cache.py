@@ -0,0 +1,96 @@
+from backend.embedding_providers import HashingEmbeddingProvider
+
+class FillerBlindProvider(HashingEmbeddingProvider):
+    """Stands in for a semantic embedding model, which shrugs off filler words."""
+    model = "fake-semantic-v1"
+    filler = {"please", "my", "the", "can", "you"}
+
+    def embed_text(self, text):
+        return super().embed_text(" ".join(w for w in text.lower().split() if w not in self.filler))
+
+class FakeModelParser:
+    """Stands in for the reasoning model; counts round trips."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def parse(self, command_text):
+        self.calls += 1
+        if "dashboard" in command_text:
+            target = command_text.lower().split("my ", 1)[1]
+            return {"action": "navigate_to", "target": target, "url": "https://bi.example.com",
+                    "description": f"Opening the {target}"}
+        return {"action": "unknown", "description": f"Command not recognized: {command_text}"}
+
+def test_paraphrased_commands_hit_the_semantic_cache(conn):
+    from backend.assistant import ContextAssistant
+    from backend.intent_cache import command_parse_stats
+    from backend.writer import BackgroundWriter
+    model = FakeModelParser()
+    writer = BackgroundWriter()
+    assistant = ContextAssistant(conn, command_parser=model, writer=writer, intent_embedder=FillerBlindProvider())
+    assistant.execute_command = lambda parsed: "ok"  # don't open a browser
+
+    assistant.process_voice_command("Pull up my quarterly numbers dashboard")
+    assistant.process_voice_command("can you pull up the quarterly numbers dashboard please")
+    assistant.process_voice_command("pull up my weekly numbers dashboard")  # a different slot value
+    assistant.process_voice_command("open gmail")  # the intent table never reaches the model
+    assistant.process_voice_command("hum a tune")
+    assert model.calls == 3
+    writer.close()
+
+    rows = conn.execute("SELECT parse_source, parse_similarity FROM user_commands ORDER BY id").fetchall()
+    assert [source for source, _ in rows] == ["model", "semantic_cache", "model", "rules", "model"]
+    assert rows[1][1] > 0.9
+    stats = command_parse_stats(conn)
+    assert stats["by_source"] == {"model": 3, "semantic_cache": 1, "rules": 1}
+    assert stats["semantic_hit_rate"] == 1 / 4
+    assert conn.execute("SELECT COUNT(*), SUM(hit_count) FROM intent_cache").fetchone() == (2, 1)  # unknowns aren't cached
+
+def test_semantic_cache_stays_off_without_an_embedding_provider(conn):
+    from backend.assistant import ContextAssistant
+    from backend.intent_cache import get_intent_embedder
+    from backend.writer import BackgroundWriter
+    assert get_intent_embedder() is None  # INTENT_CACHE_EMBEDDINGS defaults to none
+    model = FakeModelParser()
+    writer = BackgroundWriter()
+    assistant = ContextAssistant(conn, command_parser=model, writer=writer)
+    assistant.execute_command = lambda parsed: "ok"
+
+    for command in ["Pull up my quarterly numbers dashboard", "Pull up my quarterly numbers dashboard"]:
+        assistant.process_voice_command(command)
+    assert model.calls == 2
+    assert writer.close(timeout=5)
+    assert conn.execute("SELECT parse_source FROM user_commands").fetchall() == [("model",), ("model",)]
+    assert conn.execute("SELECT COUNT(*) FROM intent_cache").fetchone() == (0,)
+
+def test_intent_cache_expires_and_evicts(conn):
+    import numpy as np
+    from backend.intent_cache import SemanticIntentCache
+    from backend.writer import BackgroundWriter
+    writer = BackgroundWriter()
+    cache = SemanticIntentCache(threshold=0.9, ttl_seconds=60, max_entries=2)
+    vectors = np.eye(3, dtype=np.float32)
+    for i in range(3):
+        cache.store(conn, f"command {i}", vectors[i], "m", {"action": "open_app", "app": f"app{i}"}, writer=writer)
+    assert writer.flush(timeout=5)
+    assert conn.execute("SELECT command_text FROM intent_cache ORDER BY id").fetchall() == [("command 1",), ("command 2",)]
+    assert cache.lookup(conn, "command 0", vectors[0], "m", writer=writer) is None
+
+    conn.execute("UPDATE intent_cache SET created_at = created_at - 120 WHERE command_text = 'command 1'")
+    conn.commit()
+    for entry in cache._entries.values():  # [command_key, parsed, created_at, last_used_at]
+        if entry[1]["app"] == "app1":
+            entry[2] -= 120
+    assert cache.lookup(conn, "command 1", vectors[1], "m", writer=writer) is None
+    assert cache.lookup(conn, "command 2", vectors[2], "m", writer=writer)[0]["app"] == "app2"
+    assert writer.flush(timeout=5)
+    assert conn.execute("SELECT command_text, hit_count FROM intent_cache").fetchall() == [("command 2", 1)]
+
+    # The same command stored again replaces its row rather than adding one
+    cache.store(conn, "Command 2!", vectors[2], "m", {"action": "open_app", "app": "app2b"}, writer=writer)
+    assert writer.close(timeout=5)
+    assert conn.execute("SELECT command_key, parsed_intent FROM intent_cache").fetchall() == [
+        ("command 2", '{"action": "open_app", "app": "app2b"}'),
+    ]
+    assert cache.stats()["entries"] == 1
@@ -0,0 +1,65 @@
+def test_builtin_intents_extract_slots():
+    from backend.intents import IntentEngine, INTENTS
+    engine = IntentEngine(INTENTS)
+    assert engine.parse("Open Gmail")["app"] == "gmail"
+    assert engine.parse("Search YouTube for lo-fi music")["url"] == "https://youtube.com/results?search_query=lo-fi+music"
+    assert engine.parse("search youtube for email tips")["action"] == "search_youtube"  # not open_app gmail
+    assert engine.parse("Google vendor pricing")["query"] == "vendor pricing"
+    assert engine.parse("create a task to send the report")["title"] == "send the report"
+    meeting = engine.parse("Schedule a meeting with Sarah at 3pm.")
+    assert (meeting["action"], meeting["attendee"], meeting["time"]) == ("schedule_meeting", "Sarah", "3pm")
+    assert engine.parse("go to github.com")["url"] == "https://github.com"
+    assert engine.parse("Go to example.com/Docs/ABC")["url"] == "https://example.com/Docs/ABC"
+    assert engine.parse("navigate to Slack")["url"] == "https://slack.com"
+    assert engine.parse("Sing me a song") == {"action": "unknown", "description": "Command not recognized: Sing me a song"}
+
+def test_engine_only_tries_keyword_candidates_and_caches_by_normalized_text():
+    from backend.intents import Intent, IntentEngine, INTENTS
+    engine = IntentEngine(INTENTS + [
+        Intent(f"tool_{i}", [f"tool{i}"], [rf"^open tool{i}$"], lambda slots, i=i: {"action": f"tool_{i}"})
+        for i in range(300)
+    ])
+    assert [intent.name for intent in engine.candidates("open tool42")] == ["navigate_to", "tool_42"]
+    assert engine.parse("open tool42") == {"action": "tool_42"}
+
+    parsed = engine.parse("  OPEN   tool42! ")
+    parsed["action"] = "mutated"
+    assert engine.parse("open tool42") == {"action": "tool_42"}
+    assert (engine.hits, engine.misses) == (2, 1)
+
+def test_cached_parses_keep_each_commands_own_case():
+    from backend.intents import IntentEngine, INTENTS
+    engine = IntentEngine(INTENTS)
+    assert engine.parse("create a task to email Dana")["title"] == "email Dana"
+    assert engine.parse("Create a task to EMAIL DANA")["title"] == "EMAIL DANA"
+    assert (engine.hits, engine.misses) == (1, 1)
+
+def chat_client(reply):
+    """Fake OpenAI client whose chat completion returns `reply` (or raises it)."""
+    from types import SimpleNamespace
+
+    def create(**kwargs):
+        if isinstance(reply, Exception):
+            raise reply
+        message = SimpleNamespace(content=reply)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+def test_model_parser_maps_failures_to_unknown():
+    from backend.intents import ModelCommandParser
+    unknown = {"action": "unknown", "description": "Command not recognized: hum a tune"}
+    reply = '{"action": "open_app", "app": "spotify", "description": "Opening Spotify"}'
+    assert ModelCommandParser(client=chat_client(reply)).parse("play some music")["app"] == "spotify"
+    assert ModelCommandParser(client=chat_client(TimeoutError("timed out"))).parse("hum a tune") == unknown
+    assert ModelCommandParser(client=chat_client("not json")).parse("hum a tune") == unknown
+    assert ModelCommandParser(client=chat_client('["open_app"]')).parse("hum a tune") == unknown
+
+def test_model_parser_is_built_once(monkeypatch):
+    from backend import intents
+    monkeypatch.setattr(intents, "_model_parser", None)
+    monkeypatch.setattr(intents, "ModelCommandParser", lambda: object())
+    monkeypatch.delenv("COMMAND_PARSER", raising=False)
+    assert intents.get_model_parser() is None
+    monkeypatch.setenv("COMMAND_PARSER", "model")
+    assert intents.get_model_parser() is intents.get_model_parser() is not None
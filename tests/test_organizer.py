@@ -0,0 +1,147 @@
+import json
+import sqlite3
+import pytest
+from conftest import query_plan
+from backend import db
+from backend.organizer import ContextOrganizer
+
+def test_migrations_upgrade_legacy_database(tmp_path, monkeypatch):
+    path = str(tmp_path / "legacy.db")
+    legacy = sqlite3.connect(path)
+    legacy.executescript("""
+        CREATE TABLE events (id INTEGER PRIMARY KEY AUTOINCREMENT, source TEXT NOT NULL,
+            content TEXT NOT NULL, metadata TEXT, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            processed BOOLEAN DEFAULT FALSE);
+        CREATE TABLE embeddings (id INTEGER PRIMARY KEY AUTOINCREMENT, event_id INTEGER,
+            embedding TEXT, model TEXT DEFAULT 'gpt-5', created_at DATETIME DEFAULT CURRENT_TIMESTAMP);
+        CREATE TABLE threads (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT, description TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP, updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            status TEXT DEFAULT 'active');
+    """)
+    legacy.execute("INSERT INTO events (source, content) VALUES ('Slack', 'hello')")
+    legacy.execute("INSERT INTO embeddings (event_id, embedding) VALUES (1, ?)", (json.dumps([0.5, 0.25]),))
+    legacy.commit()
+    legacy.close()
+
+    monkeypatch.setattr(db, "DB_NAME", path)
+    db.init_db()
+    conn = db.get_connection()
+    assert db.get_schema_version(conn) == db.MIGRATIONS[-1][0]
+    assert conn.execute("SELECT source, content FROM events").fetchall() == [("Slack", "hello")]
+    assert conn.execute("SELECT typeof(embedding), dim FROM embeddings").fetchone() == ("blob", 2)
+    assert db.migrate(conn) == []  # already up to date
+    conn.close()
+
+def test_unprocessed_events_query_uses_index(conn):
+    plan = query_plan(conn, "SELECT id FROM events WHERE processed = FALSE ORDER BY ts_epoch ASC, id ASC LIMIT 50")
+    assert "idx_events_processed_ts" in plan
+    assert "TEMP B-TREE" not in plan
+
+def test_embedding_and_membership_lookups_use_indexes(conn):
+    assert "idx_embeddings_event_id" in query_plan(conn, "SELECT embedding FROM embeddings WHERE event_id = ?", (1,))
+    assert "idx_thread_events_event_id" in query_plan(conn, "SELECT thread_id FROM thread_events WHERE event_id IN (1, 2)")
+
+def test_organize_batch_marks_events_processed(db_path):
+    organizer = ContextOrganizer()
+    organizer.conn.executemany(
+        "INSERT INTO events (source, content) VALUES (?, ?)",
+        [("Slack", "Q3 roadmap sync tomorrow"), ("Slack", "Q3 roadmap sync tomorrow"), ("Gmail", "Invoice #12345")],
+    )
+    organizer.conn.commit()
+    assert organizer.organize_events_into_threads() == 3
+    cur = organizer.conn.cursor()
+    assert cur.execute("SELECT COUNT(*) FROM events WHERE processed = FALSE").fetchone()[0] == 0
+    # Identical text lands in the same thread via its centroid
+    assert cur.execute("SELECT COUNT(*) FROM threads").fetchone()[0] == 2
+    organizer.conn.close()
+
+def test_failed_batch_commits_nothing(db_path, monkeypatch):
+    organizer = ContextOrganizer()
+    organizer.conn.executemany("INSERT INTO events (source, content) VALUES (?, ?)",
+                               [("Slack", "Q3 roadmap sync"), ("Gmail", "Invoice #12345")])
+    organizer.conn.commit()
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("disk full")
+    monkeypatch.setattr(organizer, "create_thread", fail)
+    for _ in range(2):  # the retry after a failure reloads the centroid index too
+        with pytest.raises(RuntimeError):
+            organizer.organize_batch(organizer.fetch_unprocessed_events())
+        check = db.get_connection()
+        assert check.execute("SELECT COUNT(*) FROM embeddings").fetchone() == (0,)
+        assert check.execute("SELECT COUNT(*) FROM events WHERE processed = FALSE").fetchone() == (2,)
+        check.close()
+
+    monkeypatch.undo()
+    assert organizer.organize_events_into_threads() == 2
+    assert organizer.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone() == (2,)
+    organizer.conn.close()
+
+def test_list_threads_pages_with_cursor(db_path):
+    organizer = ContextOrganizer()
+    cur = organizer.conn.cursor()
+    for i in range(5):
+        thread_id = organizer.create_thread(f"Thread {i}")
+        cur.execute("INSERT INTO events (source, content) VALUES (?, ?)", ("Slack", f"event {i}"))
+        cur.execute("INSERT INTO thread_events (thread_id, event_id) VALUES (?, ?)", (thread_id, cur.lastrowid))
+    organizer.conn.commit()
+
+    first = organizer.list_threads(limit=2)
+    second = organizer.list_threads(limit=2, cursor=first["next_cursor"])
+    last = organizer.list_threads(limit=2, cursor=second["next_cursor"])
+    ids = [t["id"] for page in (first, second, last) for t in page["threads"]]
+    assert ids == [5, 4, 3, 2, 1]
+    assert first["threads"][0]["event_count"] == 1
+    assert first["threads"][0]["sources"] == ["Slack"]
+    assert last["next_cursor"] is None
+    organizer.conn.close()
+
+def test_thread_page_after_cursor_seeks_index(conn):
+    plan = query_plan(conn, """
+        SELECT * FROM threads WHERE (updated_at, id) < (?, ?)
+        ORDER BY updated_at DESC, id DESC LIMIT 20
+    """, ("2024-01-14 00:00:00", 10))
+    assert "SEARCH threads USING INDEX idx_threads_updated_at_id" in plan
+
+def test_thread_stats_maintained_on_membership_changes(db_path):
+    organizer = ContextOrganizer()
+    cur = organizer.conn.cursor()
+    thread_id = organizer.create_thread("Q3 planning")
+    for source, timestamp in [("Slack", "2024-01-14 10:00:00"), ("Gmail", "2024-01-14 09:00:00"), ("Slack", "2024-01-14 11:00:00")]:
+        cur.execute("INSERT INTO events (source, content, timestamp) VALUES (?, 'x', ?)", (source, timestamp))
+        organizer.add_event_to_thread(thread_id, cur.lastrowid)
+
+    stats = "SELECT event_count, sources, first_event_at, last_event_at FROM threads WHERE id = ?"
+    assert cur.execute(stats, (thread_id,)).fetchone() == (3, "Slack,Gmail", "2024-01-14 09:00:00", "2024-01-14 11:00:00")
+    cur.execute("DELETE FROM thread_events WHERE thread_id = ? AND event_id = 2", (thread_id,))
+    assert cur.execute(stats, (thread_id,)).fetchone() == (2, "Slack", "2024-01-14 10:00:00", "2024-01-14 11:00:00")
+    organizer.conn.close()
+
+def test_thread_event_range_follows_epochs_not_text(db_path):
+    organizer = ContextOrganizer()
+    cur = organizer.conn.cursor()
+    thread_id = organizer.create_thread("Launch")
+    # Textually "T12:00" sorts after " 13:00", but it is the earlier event
+    for timestamp in ["2024-01-14 13:00:00", "2024-01-14T12:00:00+00:00"]:
+        cur.execute("INSERT INTO events (source, content, timestamp) VALUES ('Slack', 'x', ?)", (timestamp,))
+        organizer.add_event_to_thread(thread_id, cur.lastrowid)
+
+    stats = "SELECT first_event_at, last_event_at FROM threads WHERE id = ?"
+    assert cur.execute(stats, (thread_id,)).fetchone() == ("2024-01-14 12:00:00", "2024-01-14 13:00:00")
+    db.rebuild_thread_stats(cur)
+    assert cur.execute(stats, (thread_id,)).fetchone() == ("2024-01-14 12:00:00", "2024-01-14 13:00:00")
+    organizer.conn.close()
+
+def test_index_is_persisted_next_to_the_organizers_database(db_path, tmp_path):
+    import os
+    from backend.vector_index import index_path
+    other = str(tmp_path / "other.db")
+    conn = sqlite3.connect(other)
+    db.migrate(conn)
+    organizer = ContextOrganizer(index_type="ivf", conn=conn)
+    assert organizer.index_path() == index_path(other, "ivf")
+    organizer.index  # loads (empty) from the other database
+    organizer.save_index()
+    assert os.path.exists(index_path(other, "ivf"))
+    assert not os.path.exists(index_path(db_path, "ivf"))
+    conn.close()
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+def test_next_run_is_lead_time_before_configured_time():
+    from backend.scheduler import next_run
+    lead = timedelta(minutes=5)
+    assert next_run(datetime(2024, 1, 15, 8, 0), "09:00", lead) == datetime(2024, 1, 15, 8, 55)
+    assert next_run(datetime(2024, 1, 15, 8, 55), "09:00", lead) == datetime(2024, 1, 16, 8, 55)
+
+def test_load_schedule_reads_agent_config(tmp_path):
+    from backend.scheduler import load_schedule
+    config = tmp_path / "agent_assistant.yaml"
+    config.write_text(
+        "agent:\n"
+        "  briefing_types:\n"
+        "    - name: yesterday_recap\n"
+        "      time: \"07:30\"\n"
+        "    - name: today_plan\n"
+        "      time: 17:45\n"
+        "    - name: weekly_digest\n"
+        "      time: \"10:00\"\n"
+    )
+    assert load_schedule(str(config)) == {"yesterday": "07:30", "today": "17:45"}
+    assert load_schedule("/nonexistent.yaml") == {"yesterday": "09:00", "today": "09:05"}
+
+def test_scheduler_prepares_due_briefings_and_after_quiet_period(conn):
+    from backend import tts
+    from backend.assistant import ContextAssistant
+    from backend.scheduler import BriefingScheduler
+    backend, _ = tts.get_tts()
+    scheduler = BriefingScheduler(schedule={"yesterday": "09:00", "today": "09:05"}, lead_minutes=5, quiet_seconds=60)
+    start = datetime.now().replace(hour=8, minute=0, second=0, microsecond=0)
+
+    assert scheduler.run_pending(conn, start) == []
+    assert scheduler.run_pending(conn, start + timedelta(minutes=55)) == ["yesterday"]
+    assert scheduler.run_pending(conn, start + timedelta(minutes=60)) == ["today"]
+    assert scheduler.prepared == 2 and backend.calls == 2
+    assert ContextAssistant(conn).play_voice_briefing("today")["cached"]
+    assert backend.calls == 2
+
+    conn.execute("INSERT INTO events (source, content, ts_epoch) VALUES ('Calendar', 'Standup', ?)",
+                 (int(datetime.now().timestamp()),))
+    assert scheduler.run_pending(conn, start + timedelta(minutes=61)) == []
+    assert scheduler.run_pending(conn, start + timedelta(minutes=62)) == ["yesterday", "today"]
+    assert scheduler.prepared == 3 and backend.calls == 3
+    assert scheduler.run_pending(conn, start + timedelta(minutes=63)) == []
+
+def test_scheduler_tick_uses_the_connection_manager(conn):
+    from backend import db, tts
+    from backend.scheduler import BriefingScheduler
+    backend, _ = tts.get_tts()
+    manager = db.ConnectionManager()
+    scheduler = BriefingScheduler(schedule={"yesterday": "09:00", "today": "09:05"}, manager=manager)
+    scheduler._tick(["today"])
+    assert scheduler.prepared == 1 and backend.calls == 1
+    assert conn.execute("SELECT briefing_type FROM voice_briefings").fetchall() == [("plan",)]
+
+    scheduler._tick()  # nothing due yet: only reads, on a pooled connection
+    assert scheduler.prepared == 1 and manager._created == 1
+    manager.close()
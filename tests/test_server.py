@@ -0,0 +1,68 @@
+import asyncio
+import os
+import time
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_health_latency_stays_flat_during_slow_threads_call(db_path, monkeypatch):
+    monkeypatch.chdir(ROOT)  # the app mounts frontend/ relative to the working directory
+    from backend import server
+    from backend.organizer import ContextOrganizer
+
+    def slow_list_threads(self, limit=20, cursor=None):
+        time.sleep(0.5)  # stands in for a heavy query on a large database
+        return {"threads": [], "next_cursor": None}
+    monkeypatch.setattr(ContextOrganizer, "list_threads", slow_list_threads)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            heavy = asyncio.create_task(client.get("/threads"))
+            await asyncio.sleep(0.05)
+            latencies = []
+            for _ in range(10):
+                start = time.perf_counter()
+                response = await client.get("/health")
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200
+            health_done = heavy.done()
+            return latencies, health_done, await heavy
+
+    try:
+        latencies, heavy_done_first, threads_response = asyncio.run(scenario())
+    finally:
+        server.database.close()
+    assert threads_response.status_code == 200
+    assert not heavy_done_first
+    assert max(latencies) < 0.1
+
+def test_commands_run_without_holding_the_writer(db_path, monkeypatch):
+    monkeypatch.chdir(ROOT)
+    from backend import db, server
+    from backend.assistant import ContextAssistant
+    from backend.writer import get_writer
+    writer_held = []
+
+    def execute_command(self, parsed):
+        writer_held.append(db.get_manager()._writer_lock.locked())
+        return "ok"  # don't open a browser
+    monkeypatch.setattr(ContextAssistant, "execute_command", execute_command)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/command", json={"command": "open gmail"})
+
+    try:
+        response = asyncio.run(scenario())
+        assert get_writer().flush(timeout=5)
+    finally:
+        server.database.close()
+    assert response.status_code == 200 and response.json()["result"] == "ok"
+    assert writer_held == [False]
+    conn = db.get_connection()
+    assert conn.execute("SELECT request_id, parse_source FROM user_commands").fetchall() == [
+        (response.json()["command_id"], "rules"),
+    ]
+    conn.close()
@@ -0,0 +1,108 @@
+import asyncio
+import os
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_audio_cache_is_content_addressed_and_evicts_lru(tmp_path):
+    from backend.tts import AudioCache, FakeTTSBackend
+    rachel, faster = FakeTTSBackend(), FakeTTSBackend(speed=1.25)
+    assert AudioCache.key("Good  morning.", rachel) == AudioCache.key("Good morning.", rachel)
+    assert AudioCache.key("Good morning.", rachel) != AudioCache.key("Good morning.", faster)
+
+    cache = AudioCache(str(tmp_path), max_bytes=100)
+    keys = [AudioCache.key(text, rachel) for text in ("a", "b", "c")]
+    cache.put(keys[0], b"x" * 40)
+    cache.put(keys[1], b"x" * 40)
+    os.utime(cache.path(keys[0]), (0, 0))
+    os.utime(cache.path(keys[1]), (1, 1))
+    assert cache.get(keys[0])  # touching it makes keys[1] the least recently used
+    cache.put(keys[2], b"x" * 40)
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) and cache.get(keys[2])
+
+def test_streamed_synthesis_is_chunked_and_cached(audio_cache):
+    from backend.tts import FakeTTSBackend
+    backend = FakeTTSBackend()
+    text = "First sentence. " * 20 + "Last one."
+    chunks = list(audio_cache.stream(text, backend))
+    assert len(chunks) > 1 and backend.calls == len(chunks)
+    assert b"".join(audio_cache.stream(text, backend)) == b"".join(chunks)
+    assert backend.calls == len(chunks)
+
+def test_briefing_audio_served_with_range_requests(db_path, audio_cache, monkeypatch):
+    monkeypatch.chdir(ROOT)  # the app mounts frontend/ relative to the working directory
+    from backend import server
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            briefing = (await client.get("/briefing/today")).json()
+            full = await client.get(briefing["audio_url"])
+            partial = await client.get(briefing["audio_url"], headers={"Range": "bytes=1-4"})
+            suffix = await client.get(briefing["audio_url"], headers={"Range": "bytes=-3"})
+            bad = await client.get(briefing["audio_url"], headers={"Range": "bytes=9999-"})
+            streamed = await client.get("/briefing/today/stream")
+            missing = await client.get("/audio/" + "0" * 64)
+            return full, partial, suffix, bad, streamed, missing
+
+    full, partial, suffix, bad, streamed, missing = asyncio.run(scenario())
+    assert full.status_code == 200 and full.headers["accept-ranges"] == "bytes"
+    assert partial.status_code == 206 and partial.content == full.content[1:5]
+    assert partial.headers["content-range"] == f"bytes 1-4/{len(full.content)}"
+    assert suffix.content == full.content[-3:]
+    assert bad.status_code == 416
+    assert streamed.content == full.content
+    assert missing.status_code == 404
+
+def test_briefing_routes_synthesize_after_releasing_the_writer(db_path, audio_cache, monkeypatch):
+    monkeypatch.chdir(ROOT)  # the app mounts frontend/ relative to the working directory
+    from backend import db, server, tts
+    backend, _ = tts.get_tts()
+    synthesize = backend.synthesize
+    writer_held = []
+
+    def watched(text):
+        writer_held.append(db.get_manager()._writer_lock.locked())
+        return synthesize(text)
+    monkeypatch.setattr(backend, "synthesize", watched)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for path in ["/briefing/yesterday", "/briefing/today", "/briefing/weekly",
+                         "/briefing/range?start=2024-01-01&end=2024-01-03"]:
+                assert (await client.get(path)).status_code == 200
+            return (await client.get("/briefing/range?start=2024-01-03&end=2024-01-01")).status_code
+
+    assert asyncio.run(scenario()) == 400
+    assert writer_held == [False] * 4
+
+def test_whole_and_streamed_synthesis_store_the_same_audio(audio_cache):
+    from backend import tts
+    backend, _ = tts.get_tts()
+    text = "First sentence. " * 20 + "Last one."
+    path = tts.cached_audio(text)
+    with open(path, "rb") as f:
+        whole = f.read()
+    os.remove(path)
+    assert b"".join(audio_cache.stream(text, backend)) == whole
+
+def test_cache_key_ignores_speed_for_backends_without_one():
+    from backend.tts import AudioCache, FakeTTSBackend
+    rachel = FakeTTSBackend()
+    unset = FakeTTSBackend()
+    unset.speed = None
+    assert AudioCache.key("Hi.", unset) != AudioCache.key("Hi.", rachel)
+    assert AudioCache.key("Hi.", unset) == AudioCache.key("Hi. ", unset)
+
+def test_overwriting_a_key_does_not_double_count_its_size(tmp_path):
+    from backend.tts import AudioCache
+    cache = AudioCache(str(tmp_path), max_bytes=100)
+    cache.put("a", b"x" * 10)
+    cache.evict()  # scans the directory once to seed the running size
+    for _ in range(3):
+        cache.put("a", b"x" * 40)
+    cache.put("b", b"x" * 40)
+    assert cache._size == 80
+    assert cache.get("a") and cache.get("b")  # nothing evicted
@@ -0,0 +1,109 @@
+import numpy as np
+from backend.vector_index import EmbeddingMatrix, top_k
+
+def test_top_k_orders_best_first_and_applies_threshold():
+    scores = np.array([0.1, 0.9, 0.5, 0.7, 0.3], dtype=np.float32)
+    assert [pos for pos, _ in top_k(scores, 3)] == [1, 3, 2]
+    assert [pos for pos, _ in top_k(scores, None, threshold=0.4)] == [1, 3, 2]
+    assert [pos for pos, _ in top_k(scores, 10, threshold=0.8)] == [1]
+    assert top_k(scores, 2, threshold=0.95) == []
+
+def test_embedding_matrix_search_add_replace_remove():
+    matrix = EmbeddingMatrix(capacity=2)  # forces the backing arrays to grow
+    matrix.add_many([10, 20, 30], [[1, 0, 0], [0, 2, 0], [1, 1, 0]])
+    assert len(matrix) == 3 and 20 in matrix
+    assert np.allclose(matrix.get(20), [0, 1, 0])  # stored normalized
+
+    hits = matrix.search([1, 0.1, 0], k=2)
+    assert [event_id for event_id, _ in hits] == [10, 30]
+    assert hits[0][1] > hits[1][1]
+    assert [event_id for event_id, _ in matrix.search([1, 0, 0], k=2, exclude={10})] == [30, 20]
+    assert matrix.search([1, 0, 0], k=5, threshold=0.9) == [(10, 1.0)]
+
+    matrix.add(10, [0, 0, 1])  # replace keeps one row per event
+    assert len(matrix) == 3 and matrix.search([0, 0, 1], k=1)[0][0] == 10
+    assert matrix.remove(20) and not matrix.remove(20)
+    assert sorted(matrix.ids.tolist()) == [10, 30]
+    assert np.allclose(matrix.get(30), np.array([1, 1, 0]) / np.sqrt(2))
+
+def test_search_batch_matches_single_searches():
+    rng = np.random.default_rng(1)
+    matrix = EmbeddingMatrix()
+    matrix.add_many(list(range(50)), rng.normal(size=(50, 8)))
+    queries = rng.normal(size=(4, 8))
+    batch = matrix.search_batch(queries, k=5)
+    for hits, query in zip(batch, queries):
+        single = matrix.search(query, k=5)
+        assert [event_id for event_id, _ in hits] == [event_id for event_id, _ in single]
+        assert np.allclose([score for _, score in hits], [score for _, score in single], atol=1e-6)
+    assert EmbeddingMatrix().search_batch(queries, k=5) == [[], [], [], []]
+
+def test_ivf_recall_against_exact_search():
+    from backend.ann_eval import synthetic_embeddings, evaluate
+    vectors = synthetic_embeddings(2000, 32, clusters=20)
+    rows = evaluate(vectors, vectors[:50], k=10, nprobes=(1, 64), n_lists=40)
+    recall = {row["nprobe"]: row["recall"] for row in rows if row["index"] == "ivf"}
+    assert recall[64] == 1.0  # probing every list is exact
+    assert 0.3 < recall[1] <= 1.0
+
+def test_ivf_trains_once_large_enough_and_replaces_vectors():
+    from backend.vector_index import IVFIndex
+    rng = np.random.default_rng(0)
+    index = IVFIndex(n_lists=4, nprobe=4, min_train_size=100)
+    index.add_many(list(range(99)), rng.normal(size=(99, 8)))
+    assert index.centroids is None
+    index.add_many([99], rng.normal(size=(1, 8)))
+    assert index.centroids.shape == (4, 8) and len(index) == 100
+
+    index.add(5, [1, 0, 0, 0, 0, 0, 0, 0])
+    assert len(index) == 100 and np.allclose(index.get(5), [1, 0, 0, 0, 0, 0, 0, 0])
+    assert index.search([1, 0, 0, 0, 0, 0, 0, 0], k=1)[0][0] == 5
+    assert index.remove(5) and 5 not in index
+
+def test_ivf_persists_with_watermark_and_catches_up(conn, tmp_path):
+    from backend.embeddings import encode_embedding
+    from backend.vector_index import IVFIndex, load_index
+    rng = np.random.default_rng(2)
+    insert = "INSERT INTO embeddings (event_id, embedding, dim) VALUES (?, ?, 8)"
+    conn.executemany(insert, [(i, encode_embedding(v)) for i, v in enumerate(rng.normal(size=(120, 8)), 1)])
+    conn.commit()
+    path = str(tmp_path / "index.ivf.npz")
+
+    index = IVFIndex.from_connection(conn, path, n_lists=4, min_train_size=100)
+    assert len(index) == 120 and index.watermark == 120 and index.centroids is not None
+    index.save(path)
+
+    conn.executemany(insert, [(i, encode_embedding(v)) for i, v in enumerate(rng.normal(size=(3, 8)), 121)])
+    conn.commit()
+    loaded = load_index(conn, "ivf", path)
+    assert len(loaded) == 123 and loaded.watermark == 123
+    assert np.allclose(loaded.centroids, index.centroids)  # loaded without retraining
+    assert np.allclose(loaded.get(7), index.get(7))
+    assert loaded.refresh(conn) == 0
+
+def test_thread_centroids_keep_running_means_and_assign_above_threshold():
+    from backend.vector_index import ThreadCentroidIndex
+    index = ThreadCentroidIndex()
+    assert index.assign([1, 0, 0]) is None
+    index.add_member(1, [2, 0, 0])  # members are normalized before averaging
+    mean, count = index.add_member(1, [0, 1, 0])
+    assert count == 2 and np.allclose(mean, [0.5, 0.5, 0])
+    index.add_member(2, [0, 0, 1])
+
+    thread_id, similarity = index.assign([1, 1, 0.1], threshold=0.8)
+    assert thread_id == 1 and similarity > 0.8
+    assert index.assign([1, -1, 0], threshold=0.8) is None
+    assert index.remove(1) and 1 not in index and len(index) == 1
+    assert index.assign([1, 1, 0.1], threshold=0.8) is None
+
+def test_thread_centroids_load_only_active_threads(conn):
+    from backend.embeddings import encode_embedding
+    from backend.vector_index import ThreadCentroidIndex
+    conn.executemany("INSERT INTO threads (title, status, centroid, member_count) VALUES (?, ?, ?, ?)", [
+        ("active", "active", encode_embedding([1, 0]), 3),
+        ("archived", "archived", encode_embedding([0, 1]), 2),
+        ("no centroid yet", "active", None, 0),
+    ])
+    index = ThreadCentroidIndex.from_connection(conn)
+    assert len(index) == 1 and index.get(1)[1] == 3
+    assert index.assign([0, 1], threshold=0.5) is None
@@ -0,0 +1,75 @@
+import pytest
+from backend import db
+from backend.writer import BackgroundWriter
+
+INSERT = "INSERT INTO events (id, source, content) VALUES (?, 'Slack', ?)"
+
+def test_poisoned_statement_is_dead_lettered_without_dropping_the_batch(conn):
+    writer = BackgroundWriter(flush_interval=0.2).start()
+    writer.submit(INSERT, (1, "first"))
+    writer.submit(INSERT, (1, "duplicate primary key"))
+    writer.submit(INSERT, (2, "second"))
+    assert writer.flush(timeout=5) is False
+
+    rows = conn.execute("SELECT id, content FROM events ORDER BY id").fetchall()
+    assert rows == [(1, "first"), (2, "second")]
+    assert writer.written == 2 and writer.failed == 1
+    sql, params, error = writer.dead_letters[0]
+    assert params == (1, "duplicate primary key") and "UNIQUE" in str(error)
+
+    # Later flushes only report their own failures
+    writer.submit(INSERT, (3, "third"))
+    assert writer.flush(timeout=5) is True
+    assert writer.close(timeout=5) is True and writer.close() is True
+
+def test_flush_raises_when_the_writer_thread_has_died(db_path):
+    writer = BackgroundWriter()
+
+    def crash(conn, batch):
+        raise MemoryError("writer blew up")
+
+    writer._write = crash
+    writer.submit(INSERT, (1, "lost"))
+    with pytest.raises(RuntimeError, match="writer blew up"):
+        writer.flush(timeout=5)
+    with pytest.raises(RuntimeError):
+        writer.flush()  # no timeout still returns instead of hanging
+
+def test_flush_times_out_while_writes_are_pending(db_path):
+    writer = BackgroundWriter().start()
+    lock = db.get_connection()
+    lock.execute("BEGIN IMMEDIATE")  # hold the write lock so the batch cannot commit
+    try:
+        writer.submit(INSERT, (1, "waiting"))
+        assert writer.flush(timeout=0.3) is False
+    finally:
+        lock.rollback()
+        lock.close()
+    assert writer.close(timeout=30) is True
+
+def test_batches_wait_for_the_managers_writer_connection(conn):
+    manager = db.ConnectionManager()
+    writer = BackgroundWriter(manager=manager).start()
+    with manager.writer():  # e.g. a request-path write in progress
+        writer.submit(INSERT, (1, "queued"))
+        assert writer.flush(timeout=0.3) is False
+    assert writer.flush(timeout=5) is True
+    assert conn.execute("SELECT content FROM events").fetchall() == [("queued",)]
+    writer.close()
+    manager.close()
+
+def test_process_writer_shutdown_is_explicit_and_idempotent(conn):
+    from backend import writer as writer_module
+    shared = writer_module.get_writer().start()
+    shared.submit(INSERT, (1, "before shutdown"))
+    assert writer_module.close_writer(timeout=5) is True
+    assert writer_module.close_writer() is True  # e.g. atexit after the server's shutdown hook
+    assert conn.execute("SELECT content FROM events").fetchall() == [("before shutdown",)]
+    with pytest.raises(RuntimeError, match="closed"):
+        shared.submit(INSERT, (2, "after shutdown"))
+
+    fresh = writer_module.get_writer()
+    assert fresh is not shared
+    fresh.submit(INSERT, (2, "new writer"))
+    assert writer_module.close_writer(timeout=5) is True
+    assert conn.execute("SELECT COUNT(*) FROM events").fetchone() == (2,)
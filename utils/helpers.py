@@ -1,5 +1,23 @@
 # utils/helpers.py
+from datetime import datetime, date, timedelta
 
 def format_event(event):
     """Format event tuple into a readable string (placeholder)."""
-    return f"[{event[3]}] {event[1]}: {event[2]}"
\ No newline at end of file
+    return f"[{event[3]}] {event[1]}: {event[2]}"
+
+def to_epoch(value):
+    """Unix seconds for a datetime or ISO-8601 string; naive values are local time."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return int(value.timestamp())
+
+def now_with_offset():
+    """Current local time as (naive datetime, epoch seconds, UTC offset in minutes)."""
+    now = datetime.now().astimezone()
+    return now.replace(tzinfo=None), int(now.timestamp()), int(now.utcoffset().total_seconds() // 60)
+
+def day_window(day: date, days: int = 1):
+    """Half-open [start, end) epoch bounds for local calendar day(s), DST-safe."""
+    start = datetime.combine(day, datetime.min.time()).astimezone()
+    end = datetime.combine(day + timedelta(days=days), datetime.min.time()).astimezone()
+    return int(start.timestamp()), int(end.timestamp())